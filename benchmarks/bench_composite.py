@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare the NumPy HUD overlay with composite_over() on a video frame.
+
+    python benchmarks/bench_composite.py [width height]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import blend2d
+
+REPEAT = 20
+
+
+def make_hud(width, height):
+    """Draw a sparse, partly translucent overlay like the HUD demo's."""
+    img = blend2d.BLImage(width, height)
+    ctx = blend2d.BLContext(img)
+    ctx.clear_all()
+    ctx.set_fill_style(0x80203040)
+    ctx.fill_rect(20, height - 120, 360, 100)
+    ctx.set_stroke_style(0xFF00FF80)
+    for i in range(12):
+        ctx.stroke_circle(width / 2, height / 2, 20 + i * 6)
+    ctx.set_fill_style(0xC0FFFFFF)
+    ctx.fill_rect(0, 0, width, 40)
+    ctx.end()
+    return img
+
+
+def overlay_numpy(frame, hud_array):
+    """The straight NumPy blend hud.py used before composite_over()."""
+    result_frame = frame.copy()
+    alpha = hud_array[:, :, 3] / 255.0
+    mask = alpha > 0.01
+    for c in range(3):
+        result_frame[:, :, c][mask] = (
+            hud_array[:, :, c][mask] * alpha[mask] + result_frame[:, :, c][mask] * (1 - alpha[mask])
+        ).astype(np.uint8)
+    return result_frame
+
+
+def overlay_native(frame, img):
+    """Copy the frame and blend the overlay into it natively."""
+    result_frame = frame.copy()
+    blend2d.composite_over(result_frame, img, "bgr")
+    return result_frame
+
+
+def bench(label, overlay):
+    """Time `overlay()` and print the mean per frame."""
+    overlay()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        overlay()
+    elapsed = (time.perf_counter() - start) / REPEAT
+    print(f"{label:>24}: {elapsed * 1000:9.2f} ms")
+
+
+def main():
+    width, height = (int(arg) for arg in sys.argv[1:3]) if len(sys.argv) > 2 else (1920, 1080)
+    img = make_hud(width, height)
+    frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    batch = np.stack([frame] * 4)
+    print(f"{width}x{height} BGR frame")
+    bench("NumPy overlay", lambda: overlay_numpy(frame, np.asarray(img)))
+    bench("composite_over + copy", lambda: overlay_native(frame, img))
+    bench("composite_over in place", lambda: blend2d.composite_over(frame, img))
+    bench("batch of 4 frames", lambda: blend2d.composite_over(batch, img))
+
+
+if __name__ == "__main__":
+    main()
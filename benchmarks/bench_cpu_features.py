@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare rendering throughput with the JIT limited to each SIMD level.
+
+Shows how a workload would run on older CPUs without leaving this machine.
+Levels the host doesn't support are skipped:
+
+    python benchmarks/bench_cpu_features.py
+"""
+
+import math
+import time
+
+import blend2d
+
+F = blend2d.BLRuntimeCpuFeatures
+# Blend2D keeps everything up to the highest level given
+LEVELS = [
+    ("SSE2", F.X86_SSE2),
+    ("SSE4.2", F.X86_SSE4_2),
+    ("AVX2", F.X86_AVX2),
+    ("AVX-512", F.X86_AVX512),
+]
+FRAMES = 50
+SIZE = 512
+
+
+def make_scene():
+    """Build the path, gradient and sprite drawn every frame."""
+    path = blend2d.BLPath()
+    path.move_to(SIZE / 2, 10)
+    for i in range(1, 200):
+        r = SIZE * (0.2 + 0.25 * (i % 2))
+        path.line_to(SIZE / 2 + r * math.cos(i * 0.31), SIZE / 2 + r * math.sin(i * 0.31))
+    gradient = blend2d.create_linear_gradient(0, 0, SIZE, SIZE)
+    gradient.add_stop(0.0, (1.0, 0.2, 0.2, 0.8))
+    gradient.add_stop(1.0, (0.2, 0.2, 1.0, 0.8))
+    sprite = blend2d.BLImage(32, 32)
+    sprite_ctx = blend2d.BLContext(sprite)
+    sprite_ctx.set_fill_style(0x80FFFFFF)
+    sprite_ctx.fill_circle(16, 16, 15)
+    sprite_ctx.end()
+    return path, gradient, sprite
+
+
+def bench(cpu_features, scene):
+    """Return the milliseconds per frame with the given feature limit."""
+    path, gradient, sprite = scene
+    img = blend2d.BLImage(SIZE, SIZE)
+    ctx = blend2d.BLContext(img, cpu_features=cpu_features)
+
+    def frame():
+        ctx.clear_all()
+        ctx.set_fill_style(gradient)
+        ctx.fill_path(path)
+        ctx.set_stroke_style(0xFF000000)
+        ctx.stroke_path(path)
+        for i in range(100):
+            ctx.blit_image(blend2d.BLPoint((i * 37) % SIZE + 0.5, (i * 53) % SIZE + 0.5), sprite)
+        ctx.flush()
+
+    frame()  # Compile the pipelines
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        frame()
+    elapsed = time.perf_counter() - start
+    ctx.end()
+    return elapsed / FRAMES * 1000
+
+
+def main():
+    enabled = blend2d.get_runtime_build_info()["cpuFeatures"]["ENABLED"]
+    scene = make_scene()
+    baseline = None
+    for name, level in LEVELS:
+        if not enabled & level.value:
+            print(f"{name:>8}: not supported by this CPU")
+            continue
+        ms = bench(level, scene)
+        if baseline is None:
+            baseline = ms
+        print(f"{name:>8}: {ms:7.2f} ms/frame  {baseline / ms:5.2f}x vs {LEVELS[0][0]}")
+    print(f"{'host':>8}: {bench(None, scene):7.2f} ms/frame (shared JIT runtime)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Compare replaying a DisplayList with issuing the same calls from Python.
+
+The scene is the static part of the HUD compass and reticle: a main line,
+tick marks, two triangles and a ring of reticle ticks, drawn every frame.
+The compass ticks are drawn one call each, the way small widgets usually
+are, so the Python dispatch cost is visible next to rasterization.
+"""
+
+import math
+import time
+
+import blend2d
+
+WIDTH, HEIGHT = 800, 480
+FRAMES = 2000
+
+
+def build_paths():
+    """Create the tick and triangle paths used by the scene."""
+    ticks = blend2d.BLPath()
+    for i in range(36):
+        x = 100 + i * 17
+        ticks.move_to(x, 40)
+        ticks.line_to(x, 48 if i % 3 else 54)
+
+    triangle = blend2d.BLPath()
+    triangle.move_to(400, 60)
+    triangle.line_to(392, 72)
+    triangle.line_to(408, 72)
+    triangle.close()
+
+    reticle = blend2d.BLPath()
+    for i in range(24):
+        angle = i * 2 * math.pi / 24
+        reticle.move_to(400 + 60 * math.cos(angle), 240 + 60 * math.sin(angle))
+        reticle.line_to(400 + 70 * math.cos(angle), 240 + 70 * math.sin(angle))
+
+    return ticks, triangle, reticle
+
+
+def draw_scene(ctx, paths):
+    """Issue the scene's drawing calls on a BLContext or a DisplayList."""
+    ticks, triangle, reticle = paths
+
+    ctx.save()
+    ctx.set_fill_style((0.0, 0.8, 1.0, 1.0))
+    ctx.fill_rect(blend2d.BLRect(100, 39.5, 600, 1.0))
+
+    for i in range(120):
+        ctx.fill_rect(blend2d.BLRect(100 + i * 5, 30, 1.0, 8.0 if i % 5 else 12.0))
+
+    ctx.set_stroke_style((0.0, 0.8, 1.0, 1.0))
+    ctx.stroke_width = 1.5
+    ctx.stroke_path(ticks)
+
+    ctx.set_fill_style((1.0, 1.0, 1.0, 1.0))
+    ctx.fill_path(triangle)
+    ctx.translate(0, 8)
+    ctx.fill_path(triangle)
+    ctx.reset_transform()
+
+    ctx.set_stroke_style((0.7, 0.7, 0.7, 1.0))
+    ctx.stroke_width = 1.0
+    ctx.stroke_path(reticle)
+    ctx.stroke_circle(400, 240, 75)
+    ctx.restore()
+
+
+def bench(label, frame):
+    """Time `frame()` over FRAMES iterations and print the per-frame cost."""
+    frame()  # Warm up pipelines
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        frame()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10}: {elapsed / FRAMES * 1e6:8.2f} us/frame")
+    return elapsed
+
+
+def main():
+    img = blend2d.BLImage(WIDTH, HEIGHT)
+    ctx = blend2d.BLContext(img)
+    paths = build_paths()
+
+    display_list = blend2d.DisplayList()
+    draw_scene(display_list, paths)
+
+    python = bench("python", lambda: draw_scene(ctx, paths))
+    replay = bench("replay", lambda: ctx.replay(display_list))
+    print(f"{'speedup':>10}: {python / replay:8.2f}x ({len(display_list)} commands)")
+
+
+if __name__ == "__main__":
+    main()
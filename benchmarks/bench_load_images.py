@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Compare decoding a directory of PNG sprites serially and with load_images().
+
+    python benchmarks/bench_load_images.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import blend2d
+
+SIZE = 256
+
+
+def make_sprites(directory, count):
+    """Write `count` distinct PNG sprites and return their paths."""
+    paths = []
+    for i in range(count):
+        img = blend2d.BLImage(SIZE, SIZE)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        ctx.set_fill_style(0xFF000000 | (i * 2654435761 & 0xFFFFFF))
+        ctx.fill_circle(SIZE / 2, SIZE / 2, 40 + i % 80)
+        ctx.end()
+        path = os.path.join(directory, f"sprite{i}.png")
+        img.writeToFile(path)
+        paths.append(path)
+    return paths
+
+
+def bench(label, load):
+    """Time one call of `load()` and print it."""
+    start = time.perf_counter()
+    images = load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>24}: {elapsed * 1000:9.1f} ms ({len(images)} images)")
+
+
+def load_serially(paths):
+    """Decode one file after another, as before load_images()."""
+    images = []
+    for path in paths:
+        img = blend2d.BLImage()
+        img.readFromFile(path)
+        images.append(img)
+    return images
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sprites(directory, count)
+        print(f"{count} sprites of {SIZE}x{SIZE}, {os.cpu_count()} CPUs")
+        bench("readFromFile loop", lambda: load_serially(paths))
+        bench("load_images", lambda: blend2d.load_images(paths))
+        bench("ImageLoader unordered", lambda: list(blend2d.ImageLoader(paths, ordered=False)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compare ways of stroking a long sampled signal across a 1920 px wide image.
+
+    python benchmarks/bench_polyline.py [samples]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import blend2d
+
+WIDTH = 1920
+HEIGHT = 400
+
+
+def make_signal(count):
+    """Return a noisy random walk spanning the image width."""
+    rng = np.random.default_rng(1)
+    xs = np.linspace(0, WIDTH - 1, count)
+    ys = HEIGHT / 2 + np.cumsum(rng.normal(0, 1, count)) * 450 / np.sqrt(count) + 40 * np.sin(xs / 50)
+    return xs, ys
+
+
+def bench(label, draw):
+    """Time one frame drawn by `draw(ctx)` and print it."""
+    img = blend2d.BLImage(WIDTH, HEIGHT)
+    ctx = blend2d.BLContext(img)
+    ctx.clear_all()
+    ctx.set_stroke_style(0xFFFFFFFF)
+    start = time.perf_counter()
+    draw(ctx)
+    ctx.end()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>24}: {elapsed * 1000:9.1f} ms")
+
+
+def stroke_with_path(ctx, xs, ys):
+    """Build the polyline vertex by vertex from Python, as before stroke_polyline."""
+    path = blend2d.BLPath()
+    path.move_to(xs[0], ys[0])
+    for x, y in zip(xs[1:].tolist(), ys[1:].tolist()):
+        path.line_to(x, y)
+    ctx.stroke_path(path)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    xs, ys = make_signal(count)
+    print(f"{count} samples")
+    if count <= 1_000_000:
+        bench("BLPath.line_to loop", lambda ctx: stroke_with_path(ctx, xs, ys))
+    bench("stroke_polyline none", lambda ctx: ctx.stroke_polyline(xs, ys))
+    bench("stroke_polyline minmax", lambda ctx: ctx.stroke_polyline(xs, ys, decimate="minmax"))
+
+
+if __name__ == "__main__":
+    main()
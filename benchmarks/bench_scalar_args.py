@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare calls per second for geometry objects, plain scalars and tuples.
+
+Each call draws something tiny, so the cost measured is mostly argument
+conversion and dispatch. Text calls are included when a font file is given:
+
+    python benchmarks/bench_scalar_args.py [font.ttf]
+"""
+
+import sys
+import time
+
+import blend2d
+
+CALLS = 200000
+
+
+def bench(label, call):
+    """Time `call()` over CALLS iterations and print the calls per second."""
+    call()  # Warm up pipelines
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>28}: {CALLS / elapsed / 1e6:6.2f} M calls/s")
+    return elapsed
+
+
+def compare(name, variants):
+    """Run each variant of one call and print its speedup over the first."""
+    print(name)
+    baseline = None
+    for label, call in variants:
+        elapsed = bench(label, call)
+        if baseline is None:
+            baseline = elapsed
+        else:
+            print(f"{'speedup':>28}: {baseline / elapsed:6.2f}x")
+
+
+def main():
+    img = blend2d.BLImage(64, 64)
+    ctx = blend2d.BLContext(img)
+    ctx.clear_all()
+    sprite = blend2d.BLImage(2, 2)
+
+    compare("fill_rect", [
+        ("BLRect", lambda: ctx.fill_rect(blend2d.BLRect(1.0, 1.0, 1.0, 1.0))),
+        ("scalars", lambda: ctx.fill_rect(1.0, 1.0, 1.0, 1.0)),
+        ("tuple", lambda: ctx.fill_rect((1.0, 1.0, 1.0, 1.0))),
+    ])
+    compare("clip_to_rect", [
+        ("BLRect", lambda: ctx.clip_to_rect(blend2d.BLRect(0.0, 0.0, 64.0, 64.0))),
+        ("scalars", lambda: ctx.clip_to_rect(0.0, 0.0, 64.0, 64.0)),
+    ])
+    compare("blit_image", [
+        ("BLPoint", lambda: ctx.blit_image(blend2d.BLPoint(1.0, 1.0), sprite)),
+        ("scalars", lambda: ctx.blit_image(1.0, 1.0, sprite)),
+        ("tuple", lambda: ctx.blit_image((1.0, 1.0), sprite)),
+    ])
+
+    if len(sys.argv) > 1:
+        face = blend2d.BLFontFace.create_from_file(sys.argv[1])
+        font = blend2d.BLFont()
+        font.create_from_face(face, 8.0)
+        compare("fill_text", [
+            ("BLPoint", lambda: ctx.fill_text(blend2d.BLPoint(1.0, 8.0), font, "1")),
+            ("scalars", lambda: ctx.fill_text(1.0, 8.0, font, "1")),
+        ])
+
+    ctx.flush()
+
+
+if __name__ == "__main__":
+    main()
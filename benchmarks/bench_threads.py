@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Compare rendering into separate images serially and on Python threads.
+
+Drawing calls release the GIL, so on a machine with several CPUs the
+threaded run should take a fraction of the serial one:
+
+    python benchmarks/bench_threads.py [threads]
+"""
+
+import math
+import os
+import sys
+import threading
+import time
+
+import blend2d
+
+SIZE = 512
+
+
+def make_path():
+    """Build a self-intersecting path that takes a while to rasterize."""
+    path = blend2d.BLPath()
+    path.move_to(SIZE / 2, SIZE / 2)
+    for i in range(500):
+        path.line_to(SIZE / 2 + 250 * math.cos(i * 0.7), SIZE / 2 + 250 * math.sin(i * 1.3))
+    return path
+
+
+def render(path):
+    """Fill and stroke `path` into a new image a few times."""
+    img = blend2d.BLImage(SIZE, SIZE)
+    ctx = blend2d.BLContext(img)
+    for _ in range(20):
+        ctx.fill_path(path)
+        ctx.stroke_path(path)
+    ctx.flush()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else min(os.cpu_count() or 1, 4)
+    path = make_path()
+    render(path)  # Warm up pipelines
+
+    start = time.perf_counter()
+    for _ in range(count):
+        render(path)
+    serial = time.perf_counter() - start
+
+    threads = [threading.Thread(target=render, args=(path,)) for _ in range(count)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    parallel = time.perf_counter() - start
+
+    print(f"{count} images, {os.cpu_count()} CPUs")
+    print(f"{'serial':>10}: {serial * 1000:9.1f} ms")
+    print(f"{'threads':>10}: {parallel * 1000:9.1f} ms ({serial / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+import numpy as np
+
+
+class TestBatch(unittest.TestCase):
+    def test_context_batch_primitives(self):
+        """Test drawing many primitives from NumPy arrays in one call."""
+        img = blend2d.BLImage(100, 100)
+        ctx = blend2d.BLContext(img)
+        ctx.set_fill_style((1.0, 1.0, 1.0, 1.0))
+
+        ctx.fill_rects(np.array([[0, 0, 10, 10], [20, 20, 10, 10]], dtype=np.float64))
+        ctx.fill_circles(np.array([[50, 50, 5]], dtype=np.float64),
+                         colors=np.array([0xFFFF0000], dtype=np.uint32))
+        ctx.stroke_rects(np.array([[60, 60, 10, 10]], dtype=np.float64))
+        ctx.stroke_circles(np.array([[80, 20, 5]], dtype=np.float64))
+        ctx.stroke_lines(np.array([[0, 90, 99, 90]], dtype=np.float64))
+        ctx.flush()
+
+        data = img.getDataAsNumPy()
+        self.assertEqual(list(data[5, 5]), [255, 255, 255, 255])
+        self.assertEqual(list(data[25, 25]), [255, 255, 255, 255])
+        # BGRA byte order, per-item color overrides the fill style
+        self.assertEqual(list(data[50, 50]), [0, 0, 255, 255])
+
+        with self.assertRaises(ValueError):
+            ctx.fill_rects(np.zeros((3, 4)), colors=np.zeros(2, dtype=np.uint32))
+
+    def test_blit_batch(self):
+        """Test blitting many atlas areas in one call."""
+        atlas = blend2d.BLImage(8, 4)
+        atlas_ctx = blend2d.BLContext(atlas)
+        atlas_ctx.set_fill_style(0xFFFF0000)
+        atlas_ctx.fill_rect(blend2d.BLRect(0, 0, 4, 4))
+        atlas_ctx.set_fill_style(0xFF0000FF)
+        atlas_ctx.fill_rect(blend2d.BLRect(4, 0, 4, 4))
+        atlas_ctx.end()
+
+        img = blend2d.BLImage(32, 32)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        src = np.array([[0, 0, 4, 4], [4, 0, 4, 4], [0, 0, 4, 4]])
+        ctx.blit_batch(atlas, src, np.array([[0.0, 0.0], [10.0, 0.0], [20.0, 0.0]]),
+                       alphas=np.array([1.0, 1.0, 0.0]))
+        ctx.blit_batch(atlas, src[:1], np.array([[0.0, 10.0, 8.0, 8.0]]))
+        self.assertAlmostEqual(ctx.global_alpha, 1.0)
+        ctx.flush()
+
+        pixels = img.getDataAsNumPy()
+        self.assertEqual(list(pixels[2, 2]), [0, 0, 255, 255])
+        self.assertEqual(list(pixels[2, 12]), [255, 0, 0, 255])
+        self.assertEqual(list(pixels[2, 22]), [0, 0, 0, 0])
+        self.assertEqual(list(pixels[16, 6]), [0, 0, 255, 255])
+
+        with self.assertRaises(ValueError):
+            ctx.blit_batch(atlas, src, np.zeros((2, 2)))
+
+        # Damage and stats match the same blits issued one by one
+        def tracked(draw):
+            ctx = blend2d.BLContext(blend2d.BLImage(32, 32))
+            ctx.damage_tracking = True
+            ctx.collect_stats = True
+            draw(ctx)
+            stats = ctx.stats()
+            return [(r.x, r.y, r.w, r.h) for r in ctx.damage_rects()], stats["blits"], stats["bytes_touched"]
+
+        def one_by_one(ctx):
+            ctx.blit_image(blend2d.BLPoint(20, 20), atlas, blend2d.BLRectI(4, 0, 4, 4))
+            ctx.blit_image(blend2d.BLRect(0.5, 10, 8, 8), atlas, blend2d.BLRectI(0, 0, 4, 4))
+
+        def batched(ctx):
+            ctx.blit_batch(atlas, src[1:2], np.array([[20.0, 20.0]]))
+            ctx.blit_batch(atlas, src[:1], np.array([[0.5, 10.0, 8.0, 8.0]]))
+
+        self.assertEqual(tracked(batched), tracked(one_by_one))
+
+    def test_path_instances(self):
+        """Test drawing one path at many offsets and transforms."""
+        img = blend2d.BLImage(40, 40)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+
+        square = blend2d.BLPath()
+        square.add_rect(blend2d.BLRect(0, 0, 4, 4))
+        ctx.set_fill_style(0xFFFFFFFF)
+        ctx.fill_path_instances(square, np.array([[0.0, 0.0], [10.0, 0.0]]),
+                                colors=np.array([0xFFFF0000, 0xFF00FF00], dtype=np.uint32))
+        # Rows are (m00, m01, m10, m11, m20, m21), applied on the user transform
+        ctx.translate(0, 20)
+        ctx.fill_path_instances(square, np.array([[2.0, 0.0, 0.0, 2.0, 0.0, 0.0],
+                                                  [1.0, 0.0, 0.0, 1.0, 20.0, 0.0]]))
+        # The user transform is restored afterwards
+        ctx.fill_rect(blend2d.BLRect(30, 0, 4, 4))
+        ctx.flush()
+
+        pixels = img.getDataAsNumPy()
+        self.assertEqual(list(pixels[2, 2]), [0, 0, 255, 255])
+        self.assertEqual(list(pixels[2, 12]), [0, 255, 0, 255])
+        self.assertEqual(list(pixels[27, 7]), [255, 255, 255, 255])
+        self.assertEqual(list(pixels[22, 22]), [255, 255, 255, 255])
+        self.assertEqual(list(pixels[27, 22]), [0, 0, 0, 0])
+        self.assertEqual(list(pixels[22, 32]), [255, 255, 255, 255])
+
+        with self.assertRaises(ValueError):
+            ctx.stroke_path_instances(square, np.zeros((2, 2)), colors=np.zeros(3, dtype=np.uint32))
+
+    def test_stroke_polyline(self):
+        """Test stroking a long sampled signal with and without decimation."""
+        xs = np.linspace(0, 99, 100000)
+        ys = 50 + 30 * np.sin(xs / 5) + 10 * np.sin(xs * 37)
+
+        def render(scale=1.0, join=None, **kwargs):
+            img = blend2d.BLImage(200, 100)
+            ctx = blend2d.BLContext(img)
+            ctx.clear_all()
+            ctx.scale(scale, 1.0)
+            ctx.set_stroke_style(0xFFFFFFFF)
+            if join is not None:
+                ctx.stroke_join = join
+            ctx.stroke_polyline(xs, ys, **kwargs)
+            ctx.end()
+            return img.getDataAsNumPy()[:, :, 3].astype(int)
+
+        # Columns are counted in device pixels, after the transform
+        for scale in (1.0, 2.0):
+            full = render(scale)
+            decimated = render(scale, decimate="minmax")
+            # Same rows and columns visibly touched
+            for axis in (0, 1):
+                np.testing.assert_array_equal(np.nonzero((full > 32).any(axis=axis)), np.nonzero((decimated > 32).any(axis=axis)))
+            # Miter spikes at the many turns of the full polyline move around
+            # even when every second sample is dropped, so only a few pixels
+            # are allowed to differ by more than 32
+            self.assertLess((np.abs(full - decimated) > 32).mean(), 0.03)
+
+            # Without the spikes, the decimated stroke matches the full one
+            full = render(scale, blend2d.BLStrokeJoin.JOIN_ROUND)
+            decimated = render(scale, blend2d.BLStrokeJoin.JOIN_ROUND, decimate="minmax")
+            self.assertLessEqual(np.abs(full - decimated).max(), 64)
+            self.assertLess(np.abs(full - decimated).mean(), 0.5)
+        # Decimation is lossy, so it is opt-in
+        np.testing.assert_array_equal(render(decimate="none"), render(decimate=None))
+        np.testing.assert_array_equal(render(), render(decimate=None))
+
+        # NaN samples leave a gap
+        img = blend2d.BLImage(20, 20)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        ctx.set_stroke_style(0xFFFFFFFF)
+        ctx.stroke_polyline(np.array([0.0, 8.0, np.nan, 12.0, 20.0]), np.full(5, 10.5))
+        ctx.end()
+        pixels = img.getDataAsNumPy()
+        self.assertEqual(pixels[10, 4, 3], 255)
+        self.assertEqual(pixels[10, 10, 3], 0)
+        self.assertEqual(pixels[10, 16, 3], 255)
+
+        with self.assertRaises(ValueError):
+            ctx.stroke_polyline(np.zeros(3), np.zeros(2))
+        with self.assertRaises(ValueError):
+            ctx.stroke_polyline(np.zeros(3), np.zeros(3), decimate="lttb")
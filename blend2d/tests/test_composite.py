@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+import numpy as np
+
+
+class TestComposite(unittest.TestCase):
+    def test_composite_over(self):
+        """Test blending a premultiplied image over NumPy frames in place."""
+        img = blend2d.BLImage(32, 16)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        ctx.set_fill_style(0x80FF8000)
+        ctx.fill_rect(0, 0, 16, 16)
+        ctx.set_fill_style(0xFF0000FF)
+        ctx.fill_rect(16, 0, 8, 8)
+        ctx.end()
+        pixels = np.asarray(img).astype(np.float64)
+        alpha = pixels[..., 3:4] / 255
+
+        frame = np.random.default_rng(0).integers(0, 256, (16, 32, 3), dtype=np.uint8)
+        out = frame.copy()
+        self.assertIsNone(blend2d.composite_over(out, img))
+        expected = np.rint(pixels[..., :3] + frame * (1 - alpha))
+        np.testing.assert_array_equal(out, expected)
+
+        rgb = frame[..., ::-1].copy()
+        blend2d.composite_over(rgb, img, "rgb")
+        np.testing.assert_array_equal(rgb[..., ::-1], out)
+
+        # Straight-alpha destination
+        rgba = np.zeros((16, 32, 4), dtype=np.uint8)
+        blend2d.composite_over(rgba, img, "rgba")
+        np.testing.assert_array_equal(rgba[0, 0], [255, 128, 0, 128])
+        np.testing.assert_array_equal(rgba[0, 16], [0, 0, 255, 255])
+        np.testing.assert_array_equal(rgba[0, 31], [0, 0, 0, 0])
+
+        shifted = frame.copy()
+        blend2d.composite_over(shifted, img, offset=(-16, 8))
+        np.testing.assert_array_equal(shifted[:8], frame[:8])
+        np.testing.assert_array_equal(shifted[8:, :8], [[[255, 0, 0]] * 8] * 8)
+        np.testing.assert_array_equal(shifted[8:, 8:], frame[8:, 8:])
+        # Offsets past the frame leave it alone, even next to the int limits
+        for offset in ((2**31 - 1, 0), (0, 2**31 - 1), (-(2**31), 0), (0, -(2**31))):
+            blend2d.composite_over(shifted, img, offset=offset)
+        np.testing.assert_array_equal(shifted[8:, :8], [[[255, 0, 0]] * 8] * 8)
+        np.testing.assert_array_equal(shifted[8:, 8:], frame[8:, 8:])
+
+        batch = np.stack([frame] * 3)
+        blend2d.composite_over(batch, img)
+        for item in batch:
+            np.testing.assert_array_equal(item, out)
+
+        with self.assertRaises(ValueError):
+            blend2d.composite_over(frame, img, "bgra")
+        with self.assertRaises(ValueError):
+            blend2d.composite_over(frame, img, "bbr")
+        with self.assertRaises(ValueError):
+            blend2d.composite_over(np.zeros((16, 32), dtype=np.uint8), img)
+
+        # Strided uint8 views are blended in place, anything that would need a
+        # converted copy is refused
+        wide = np.repeat(frame, 2, axis=1)
+        blend2d.composite_over(wide[:, ::2], img)
+        np.testing.assert_array_equal(wide[:, ::2], out)
+        np.testing.assert_array_equal(wide[:, 1::2], frame)
+        readonly = frame.copy()
+        readonly.flags.writeable = False
+        for bad in (frame.astype(np.int32), frame.astype(np.float32), readonly, np.zeros((16, 3, 32), dtype=np.uint8).transpose(0, 2, 1)):
+            with self.assertRaises(TypeError):
+                blend2d.composite_over(bad, img)
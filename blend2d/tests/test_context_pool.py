@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+
+class TestContextPool(unittest.TestCase):
+    def test_context_begin_end_and_pool(self):
+        """Test retargeting contexts and reusing them from a ContextPool."""
+        front = blend2d.BLImage(20, 20)
+        back = blend2d.BLImage(20, 20)
+
+        ctx = blend2d.BLContext(front)
+        ctx.end()
+        self.assertFalse(ctx.is_active)
+        ctx.begin(back)
+        self.assertTrue(ctx.is_active)
+        ctx.set_fill_style(0xFFFFFFFF)
+        ctx.fill_all()
+        ctx.end()
+        self.assertEqual(list(back.getDataAsNumPy()[0, 0]), [255, 255, 255, 255])
+
+        pool = blend2d.ContextPool(capacity=2)
+        first = pool.acquire(front)
+        first.stroke_width = 5.0
+        first.save()
+        # The same context comes back for the same image, with fresh state
+        self.assertIs(pool.acquire(front), first)
+        self.assertEqual(first.stroke_width, 1.0)
+        self.assertIsNot(pool.acquire(back), first)
+        self.assertEqual(len(pool), 2)
+
+        # Pooled contexts draw into the caller's image, not a copy
+        first.set_fill_style(0xFFFF0000)
+        first.fill_all()
+        pool.release(first)
+        self.assertEqual(list(front.getDataAsNumPy()[0, 0]), [0, 0, 255, 255])
+        ctx = pool.acquire(front)
+        self.assertIs(ctx, first)
+        ctx.set_fill_style(0xFF00FF00)
+        ctx.fill_all()
+        pool.release(ctx)
+        self.assertEqual(list(front.getDataAsNumPy()[0, 0]), [0, 255, 0, 255])
+        with self.assertRaises(TypeError):
+            pool.acquire(None)
+
+        pool.acquire(blend2d.BLImage(10, 10))
+        self.assertEqual(len(pool), 2)
+        pool.release(first)
+        pool.clear()
+        self.assertEqual(len(pool), 0)
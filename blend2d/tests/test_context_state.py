@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+
+class TestContextState(unittest.TestCase):
+    def test_style_fast_paths(self):
+        """Test packed integer colors, color objects and Style handles."""
+        img = blend2d.BLImage(10, 10)
+        ctx = blend2d.BLContext(img)
+
+        ctx.set_fill_style(0xFFFF0000)
+        ctx.fill_all()
+        self.assertEqual(list(img.getDataAsNumPy()[0, 0]), [0, 0, 255, 255])
+
+        ctx.set_fill_style(blend2d.BLRgba32(0, 255, 0))
+        ctx.fill_all()
+        self.assertEqual(list(img.getDataAsNumPy()[0, 0]), [0, 255, 0, 255])
+
+        ctx.set_fill_style(blend2d.BLRgba(0.0, 0.0, 1.0))
+        ctx.fill_all()
+        self.assertEqual(list(img.getDataAsNumPy()[0, 0]), [255, 0, 0, 255])
+
+        style = blend2d.Style(0x80000000)
+        self.assertTrue(style.is_color)
+        ctx.set_stroke_style(style)
+
+        gradient = blend2d.create_linear_gradient(0, 0, 10, 0)
+        gradient.add_stop(0.0, (1.0, 1.0, 1.0, 1.0))
+        style = blend2d.Style(gradient)
+        self.assertTrue(style.is_gradient)
+        ctx.set_fill_style(style)
+        ctx.fill_all()
+
+        color = blend2d.BLRgba32(0x11223344)
+        self.assertEqual((color.a, color.r, color.g, color.b), (0x11, 0x22, 0x33, 0x44))
+
+        # Every form of one color paints the same pixels (BGRA bytes)
+        def painted(style):
+            ctx.set_fill_style(style)
+            ctx.fill_all()
+            return list(img.getDataAsNumPy()[0, 0])
+
+        orange = [0, 128, 255, 255]
+        self.assertEqual(painted((1.0, 128 / 255, 0.0, 1.0)), orange)
+        self.assertEqual(painted(0xFFFF8000), orange)
+        self.assertEqual(painted(blend2d.BLRgba32(255, 128, 0)), orange)
+        self.assertEqual(painted(blend2d.BLRgba(1.0, 128 / 255, 0.0)), orange)
+        self.assertEqual(painted(blend2d.Style((1.0, 128 / 255, 0.0, 1.0))), orange)
+        self.assertEqual(painted(blend2d.Style(0xFFFF8000)), orange)
+
+        ctx.fill_rect(blend2d.BLRect(0, 0, 10, 10), blend2d.ContextState(fill_style=(0.0, 0.0, 1.0, 1.0)))
+        self.assertEqual(list(img.getDataAsNumPy()[0, 0]), [255, 0, 0, 255])
+        display_list = blend2d.DisplayList()
+        display_list.set_fill_style((1.0, 128 / 255, 0.0, 1.0))
+        display_list.fill_all()
+        ctx.replay(display_list)
+        self.assertEqual(list(img.getDataAsNumPy()[0, 0]), orange)
+
+        gradient = blend2d.create_linear_gradient(0, 0, 10, 0)
+        gradient.add_stop(0.0, (1.0, 128 / 255, 0.0, 1.0))
+        gradient.add_stop(1.0, (1.0, 128 / 255, 0.0, 1.0))
+        self.assertEqual(painted(gradient), orange)
+
+    def test_context_state(self):
+        """Test applying bundled ContextState objects."""
+        img = blend2d.BLImage(20, 20)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+
+        state = blend2d.ContextState(fill_style=0xFFFF0000, stroke_width=3.0, global_alpha=0.5)
+        self.assertEqual(state.stroke_width, 3.0)
+        self.assertIsNone(state.fill_rule)
+        ctx.set_state(state)
+        self.assertEqual(ctx.stroke_width, 3.0)
+        self.assertAlmostEqual(ctx.global_alpha, 0.5)
+
+        # Inline state is scoped to the call
+        ctx.global_alpha = 1.0
+        inline = blend2d.ContextState(fill_style=0xFF00FF00, stroke_width=7.0)
+        ctx.fill_rect(blend2d.BLRect(0, 0, 10, 10), inline)
+        self.assertEqual(ctx.stroke_width, 3.0)
+        self.assertEqual(list(img.getDataAsNumPy()[5, 5]), [0, 255, 0, 255])
+        self.assertEqual(list(img.getDataAsNumPy()[15, 15]), [0, 0, 0, 0])
+
+        snapshot = ctx.get_state()
+        ctx.stroke_width = 1.0
+        ctx.set_state(snapshot)
+        self.assertEqual(ctx.stroke_width, 3.0)
+
+        display_list = blend2d.DisplayList()
+        display_list.set_state(inline)
+        self.assertEqual(display_list.stroke_width, 7.0)
+        ctx.replay(display_list)
+        self.assertEqual(ctx.stroke_width, 3.0)
+
+    def test_scalar_and_tuple_arguments(self):
+        """Test passing plain numbers and tuples instead of geometry objects."""
+        img = blend2d.BLImage(20, 20)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        ctx.set_fill_style(0xFFFFFFFF)
+
+        ctx.clip_to_rect(0, 0, 15, 20)
+        ctx.fill_rect(0, 0, 5, 5)
+        ctx.fill_rect((10, 0, 10, 5))
+        ctx.blit_image((0, 10), img, (0, 0, 3, 3))
+        ctx.blit_image(10.0, 10.0, img)
+        ctx.flush()
+
+        pixels = img.getDataAsNumPy()
+        self.assertEqual(list(pixels[2, 2]), [255, 255, 255, 255])
+        self.assertEqual(list(pixels[2, 12]), [255, 255, 255, 255])
+        self.assertEqual(list(pixels[2, 17]), [0, 0, 0, 0])
+        self.assertEqual(list(pixels[11, 1]), [255, 255, 255, 255])
+        self.assertEqual(list(pixels[12, 12]), [255, 255, 255, 255])
+
+        point = blend2d.BLPoint((1.5, 2.5))
+        self.assertEqual((point.x, point.y), (1.5, 2.5))
+        with self.assertRaises(TypeError):
+            ctx.fill_rect((1, 2))
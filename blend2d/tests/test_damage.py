@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+
+class TestDamage(unittest.TestCase):
+    def test_damage_tracking(self):
+        """Test damage rects and clearing only the previous frame's damage."""
+        img = blend2d.BLImage(100, 100)
+        ctx = blend2d.BLContext(img)
+        with self.assertRaises(RuntimeError):
+            ctx.damage_rects()
+
+        ctx.clear_all()
+        ctx.damage_tracking = True
+        self.assertEqual(ctx.damage_rects(), [])
+
+        ctx.set_fill_style(0xFFFFFFFF)
+        ctx.fill_rect(blend2d.BLRect(10, 10, 10, 10))
+        ctx.fill_rect(blend2d.BLRect(15, 15, 10, 10))
+        rects = [(r.x, r.y, r.w, r.h) for r in ctx.damage_rects()]
+        self.assertEqual(len(rects), 1)
+        x, y, w, h = rects[0]
+        self.assertTrue(x <= 10 and y <= 10 and x + w >= 25 and y + h >= 25)
+
+        # The next frame clears the old rects and reports them as damage too
+        ctx.clear_damage()
+        self.assertEqual(list(img.getDataAsNumPy()[12, 12]), [0, 0, 0, 0])
+        ctx.fill_rect(blend2d.BLRect(80, 80, 5, 5))
+        self.assertEqual(len(ctx.damage_rects()), 2)
+
+        display_list = blend2d.DisplayList()
+        display_list.fill_rect(blend2d.BLRect(50, 0, 5, 5))
+        ctx.replay(display_list)
+        self.assertEqual(len(ctx.damage_rects()), 3)
+
+        ctx.reset_damage()
+        self.assertEqual(ctx.damage_rects(), [])
+
+        # Damage stops at the clip, and is clipped again after a restore()
+        # brings back an outer clip
+        ctx.clip_to_rect(0, 0, 20, 20)
+        ctx.fill_rect(blend2d.BLRect(0, 0, 100, 100))
+        self.assertEqual([(r.x, r.y, r.w, r.h) for r in ctx.damage_rects()], [(0, 0, 20, 20)])
+        ctx.save()
+        ctx.clip_to_rect(10, 10, 5, 5)
+        ctx.restore()
+        ctx.save()
+        ctx.fill_rect(blend2d.BLRect(0, 0, 100, 100))
+        ctx.restore()
+        self.assertEqual([(r.x, r.y, r.w, r.h) for r in ctx.damage_rects()], [(0, 0, 20, 20)])
+
+        # Clearing under a clip still clears every damaged pixel
+        ctx.restore_clipping()
+        ctx.clear_all()
+        ctx.reset_damage()
+        ctx.fill_rect(blend2d.BLRect(40, 40, 30, 30))
+        ctx.clip_to_rect(0, 0, 20, 20)
+        ctx.clear_damage()
+        ctx.flush()
+        self.assertEqual(img.getDataAsNumPy()[..., 3].sum(), 0)
+        ctx.damage_tracking = False
+        self.assertFalse(ctx.damage_tracking)
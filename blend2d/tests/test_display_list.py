@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+import tempfile
+import os
+
+import numpy as np
+
+
+class TestDisplayList(unittest.TestCase):
+    def test_display_list_replay(self):
+        """Test recording drawing calls and replaying them on a context."""
+        display_list = blend2d.DisplayList()
+        display_list.save()
+        display_list.set_fill_style((1.0, 1.0, 1.0, 1.0))
+        display_list.stroke_width = 3.0
+        display_list.fill_rect(blend2d.BLRect(0, 0, 10, 10))
+        display_list.restore()
+        self.assertEqual(len(display_list), 5)
+        self.assertAlmostEqual(display_list.stroke_width, 1.0)
+
+        img = blend2d.BLImage(100, 100)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        ctx.replay(display_list)
+        ctx.replay(display_list, blend2d.make_translation_matrix(50, 50))
+        ctx.flush()
+
+        data = img.getDataAsNumPy()
+        self.assertEqual(list(data[5, 5]), [255, 255, 255, 255])
+        self.assertEqual(list(data[55, 55]), [255, 255, 255, 255])
+        self.assertEqual(list(data[30, 30]), [0, 0, 0, 0])
+
+        # Replaying leaves the caller's state untouched
+        self.assertTrue(ctx.get_meta_transform().is_identity())
+        self.assertAlmostEqual(ctx.stroke_width, 1.0)
+
+        display_list.clear()
+        self.assertTrue(display_list.empty())
+
+    def test_tiled_renderer(self):
+        """Test rendering a canvas tile by tile into each kind of sink."""
+        display_list = blend2d.DisplayList()
+        display_list.set_fill_style(0xFFFF0000)
+        display_list.fill_rect(blend2d.BLRect(10, 10, 30, 20))
+        renderer = blend2d.TiledRenderer(50, 40, tile_width=16, tile_height=16)
+
+        canvas = np.zeros((40, 50, 4), dtype=np.uint8)
+        renderer.render(display_list, canvas)
+        self.assertEqual(list(canvas[15, 20]), [0, 0, 255, 255])
+        self.assertEqual(list(canvas[35, 45]), [0, 0, 0, 0])
+        self.assertEqual(int((canvas[..., 3] == 255).sum()), 30 * 20)
+
+        # Callbacks draw in canvas coordinates
+        def draw(ctx, tile):
+            self.assertIsInstance(tile, blend2d.BLRectI)
+            ctx.set_fill_style(0xFFFF0000)
+            ctx.fill_rect(blend2d.BLRect(10, 10, 30, 20))
+
+        tiles = {}
+        renderer.render(draw, lambda x, y, pixels: tiles.__setitem__((x, y), pixels))
+        self.assertEqual(len(tiles), 4 * 3)
+        self.assertEqual(tiles[(48, 32)].shape, (8, 2, 4))
+        assembled = np.zeros_like(canvas)
+        for (x, y), pixels in tiles.items():
+            assembled[y:y + pixels.shape[0], x:x + pixels.shape[1]] = pixels
+        self.assertTrue(np.array_equal(assembled, canvas))
+
+        with tempfile.NamedTemporaryFile(suffix=".qoi", delete=False) as tmp:
+            temp_filename = tmp.name
+        try:
+            renderer.render(display_list, temp_filename)
+            img = blend2d.BLImage()
+            img.readFromFile(temp_filename)
+            self.assertTrue(np.array_equal(img.getDataAsNumPy(), canvas))
+        finally:
+            os.unlink(temp_filename)
+
+        with self.assertRaises(ValueError):
+            renderer.render(display_list, "out.png")
+        with self.assertRaises(ValueError):
+            renderer.render(display_list, np.zeros((10, 10, 4), dtype=np.uint8))
+
+        # Arrays that would need a converted copy are rejected, not rendered
+        # into the copy
+        for wrong in (np.zeros((40, 50, 4), dtype=np.int32), np.zeros((40, 50, 4), dtype=np.float32)):
+            with self.assertRaises(TypeError):
+                renderer.render(display_list, wrong)
+            self.assertEqual(wrong.max(), 0)
+        read_only = np.zeros((40, 50, 4), dtype=np.uint8)
+        read_only.flags.writeable = False
+        with self.assertRaises(TypeError):
+            renderer.render(display_list, read_only)
+        with self.assertRaises(ValueError):
+            renderer.render(display_list, np.zeros((50, 40, 4), dtype=np.uint8).transpose(1, 0, 2))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+import tempfile
+import os
+import sys
+
+import numpy as np
+
+
+class TestImages(unittest.TestCase):
+    def test_zero_copy_pixel_views(self):
+        """Test buffer protocol, array interface and DLPack views outliving the image."""
+        img = blend2d.BLImage(8, 4)
+        ctx = blend2d.BLContext(img)
+        ctx.set_fill_style(0xFF102030)
+        ctx.fill_all()
+        ctx.flush()
+
+        views = [np.asarray(img), np.asarray(memoryview(img)), np.from_dlpack(img), img.getDataAsNumPy()]
+        interface = img.__array_interface__
+        self.assertEqual(interface["shape"], (4, 8, 4))
+        self.assertEqual(interface["typestr"], "|u1")
+        # Consumers of the array interface alone must pin the pixels too
+        views.append(np.asarray(type("Exporter", (), {"__array_interface__": interface})()))
+        del interface
+        self.assertEqual(img.__dlpack_device__(), (1, 0))
+        for view in views:
+            self.assertEqual(view.shape, (4, 8, 4))
+            self.assertEqual(list(view[3, 7]), [48, 32, 16, 255])
+
+        # Views share the pixels with the image while it is drawn to
+        ctx.set_fill_style(0xFFFFFFFF)
+        ctx.fill_rect(0, 0, 1, 1)
+        ctx.end()
+        for view in views:
+            self.assertEqual(list(view[0, 0]), [255, 255, 255, 255])
+
+        img.reset()
+        del ctx, img
+        blend2d.BLImage(8, 4)  # Would likely reuse freed pixels
+        for view in views:
+            self.assertEqual(list(view[3, 7]), [48, 32, 16, 255])
+
+        mask = blend2d.BLImage(3, 2, blend2d.BLFormat.A8)
+        self.assertEqual(memoryview(mask).shape, (2, 3))
+        with self.assertRaises(BufferError):
+            memoryview(blend2d.BLImage())
+
+    def test_image_from_buffer(self):
+        """Test rendering straight into NumPy arrays and shared memory."""
+        from multiprocessing import shared_memory
+
+        frame = np.zeros((4, 8, 4), dtype=np.uint8)
+        img = blend2d.BLImage.from_buffer(frame)
+        self.assertEqual(img.size, (8, 4))
+        ctx = blend2d.BLContext(img)
+        ctx.set_fill_style(0xFF102030)
+        ctx.fill_rect(0, 0, 2, 2)
+        ctx.end()
+        self.assertEqual(list(frame[1, 1]), [48, 32, 16, 255])
+        self.assertEqual(list(frame[3, 3]), [0, 0, 0, 0])
+
+        # The image keeps the buffer exported until it is gone
+        refs = sys.getrefcount(frame)
+        del ctx, img
+        self.assertEqual(sys.getrefcount(frame), refs - 1)
+
+        shm = shared_memory.SharedMemory(create=True, size=16 * 10 * 4)
+        try:
+            img = blend2d.BLImage.from_buffer(shm.buf, blend2d.BLFormat.PRGB32, stride=64)
+            self.assertEqual(img.size, (16, 10))
+            ctx = blend2d.BLContext(img)
+            ctx.set_fill_style(0xFFFFFFFF)
+            ctx.fill_all()
+            ctx.end()
+            self.assertEqual(bytes(shm.buf[-4:]), b"\xff\xff\xff\xff")
+            del ctx, img
+        finally:
+            shm.close()
+            shm.unlink()
+
+        self.assertEqual(blend2d.BLImage.from_buffer(np.zeros((3, 5), dtype=np.uint32)).size, (5, 3))
+        mask = np.zeros((3, 5), dtype=np.uint8)
+        self.assertEqual(blend2d.BLImage.from_buffer(mask, blend2d.BLFormat.A8).size, (5, 3))
+
+        # Read-only memory is copied before it is drawn to
+        data = bytes(64)
+        img = blend2d.BLImage.from_buffer(data, stride=16)
+        ctx = blend2d.BLContext(img)
+        ctx.fill_all()
+        ctx.end()
+        self.assertEqual(data, bytes(64))
+
+        with self.assertRaises(ValueError):
+            blend2d.BLImage.from_buffer(mask)
+        with self.assertRaises(ValueError):
+            blend2d.BLImage.from_buffer(frame[:, ::2])
+        with self.assertRaises(ValueError):
+            blend2d.BLImage.from_buffer(frame, stride=4)
+        with self.assertRaises(ValueError):
+            blend2d.BLImage.from_buffer(bytes(64))
+
+    def test_image_encode_decode_in_memory(self):
+        """Test writing images to bytes with each codec and reading them back."""
+        img = blend2d.BLImage(64, 64)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+        ctx.set_fill_style(0xFF336699)
+        ctx.fill_circle(32, 32, 20)
+        ctx.end()
+
+        for codec, magic in (("png", b"\x89PNG"), ("qoi", b"qoif"), ("bmp", b"BM")):
+            data = img.write_to_data(codec)
+            self.assertIsInstance(data, bytes)
+            self.assertTrue(data.startswith(magic))
+            decoded = blend2d.BLImage()
+            decoded.read_from_data(memoryview(data))
+            self.assertTrue(np.array_equal(np.asarray(decoded), np.asarray(img)))
+
+        self.assertGreater(len(img.write_to_data("png", compression=0)),
+                           len(img.write_to_data("png", compression=12)))
+
+        with self.assertRaises(ValueError):
+            img.write_to_data("gif")
+        with self.assertRaises(ValueError):
+            img.write_to_data("png", level=3)
+        with self.assertRaises(RuntimeError):
+            blend2d.BLImage().read_from_data(b"not an image")
+
+    def test_load_images(self):
+        """Test decoding many files on worker threads, in order and as completed."""
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i in range(12):
+                img = blend2d.BLImage(16, 8)
+                ctx = blend2d.BLContext(img)
+                ctx.set_fill_style(0xFF000000 | i)
+                ctx.fill_all()
+                ctx.end()
+                paths.append(os.path.join(directory, f"{i}.png"))
+                img.writeToFile(paths[-1])
+
+            images = blend2d.load_images(paths, workers=3)
+            self.assertEqual([int(np.asarray(img)[0, 0, 0]) for img in images], list(range(12)))
+            images = blend2d.load_images(paths[:2], format=blend2d.BLFormat.XRGB32)
+            self.assertEqual(images[0].format, blend2d.BLFormat.XRGB32)
+
+            loader = blend2d.ImageLoader(paths, workers=2, prefetch=1, ordered=False)
+            self.assertEqual(len(loader), 12)
+            self.assertEqual(sorted(path for path, _ in loader), sorted(paths))
+
+            loader = blend2d.ImageLoader([paths[0], os.path.join(directory, "missing.png"), paths[1]])
+            self.assertEqual(next(loader)[0], paths[0])
+            with self.assertRaises(RuntimeError):
+                next(loader)
+            self.assertEqual(next(loader)[0], paths[1])
+            with self.assertRaises(StopIteration):
+                next(loader)
+
+            # Dropping a loader with work left stops its threads
+            loader = blend2d.ImageLoader(paths, prefetch=1)
+            next(loader)
+            del loader
+
+    def test_fill_mask_and_blit_array(self):
+        """Test drawing NumPy masks and pixel arrays in place."""
+        img = blend2d.BLImage(32, 32)
+        ctx = blend2d.BLContext(img)
+        ctx.clear_all()
+
+        mask = np.zeros((10, 10), dtype=np.uint8)
+        mask[2:8, 2:8] = 255
+        ctx.set_fill_style(0xFF00FF00)
+        ctx.fill_mask(blend2d.BLPoint(0, 0), mask)
+        # Non-contiguous views are read with their strides
+        ctx.fill_mask(blend2d.BLPoint(20, 0), np.asfortranarray(mask)[::-1, ::2])
+        ctx.flush()
+        pixels = img.getDataAsNumPy()
+        self.assertEqual(list(pixels[5, 5]), [0, 255, 0, 255])
+        self.assertEqual(list(pixels[0, 0]), [0, 0, 0, 0])
+        self.assertEqual(list(pixels[5, 22]), [0, 255, 0, 255])
+
+        sprite = np.zeros((4, 4, 4), dtype=np.uint8)
+        sprite[...] = [255, 0, 0, 128]
+        ctx.blit_array(blend2d.BLPoint(0, 20), sprite, premultiplied=False)
+        ctx.blit_array(blend2d.BLRect(10, 20, 8, 8), sprite)
+        ctx.flush()
+        pixels = img.getDataAsNumPy()
+        self.assertEqual(list(pixels[21, 1]), [128, 0, 0, 128])
+        self.assertEqual(list(pixels[25, 15]), [255, 0, 0, 128])
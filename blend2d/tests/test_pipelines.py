@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+import numpy as np
+
+
+class TestPipelines(unittest.TestCase):
+    def test_pipeline_warmup(self):
+        """Test recording the pipelines a run uses and compiling them up front."""
+        img = blend2d.BLImage(20, 20)
+        blend2d.start_pipeline_recording()
+        ctx = blend2d.BLContext(img)
+        ctx.set_fill_style(0xFFFF0000)
+        ctx.fill_rect(1.5, 1.5, 5, 5)
+        ctx.blit_image(blend2d.BLRect(0, 0, 4, 4), img)
+        ctx.end()
+        profile = blend2d.stop_pipeline_recording()
+        self.assertIn((blend2d.BLFormat.PRGB32, blend2d.BLCompOp.SRC_OVER, blend2d.StyleKind.SOLID), profile)
+        self.assertIn((blend2d.BLFormat.PRGB32, blend2d.BLCompOp.SRC_OVER, blend2d.StyleKind.PATTERN), profile)
+
+        # The profile can be stored as plain integers
+        profile = [tuple(v.value for v in key) for key in profile]
+        self.assertGreaterEqual(blend2d.warmup_pipelines(profile), 0)
+        self.assertEqual(blend2d.warmup_pipelines(profile), 0)
+        blend2d.warmup_pipelines(formats=[blend2d.BLFormat.XRGB32], style_kinds=[blend2d.StyleKind.RADIAL_GRADIENT])
+        self.assertEqual(blend2d.stop_pipeline_recording(), [])
+
+    def test_cpu_features_override(self):
+        """Test limiting pipelines to a SIMD level per context and globally."""
+        gradient = blend2d.create_linear_gradient(0, 0, 32, 32)
+        gradient.add_stop(0.0, (1.0, 0.0, 0.0, 1.0))
+        gradient.add_stop(1.0, (0.0, 0.0, 1.0, 0.5))
+
+        def render(**kwargs):
+            img = blend2d.BLImage(32, 32)
+            ctx = blend2d.BLContext(img, **kwargs)
+            ctx.clear_all()
+            ctx.set_fill_style(gradient)
+            ctx.fill_circle(16, 16, 12.5)
+            ctx.end()
+            return img.getDataAsNumPy()
+
+        expected = render()
+        sse2 = blend2d.BLRuntimeCpuFeatures.X86_SSE2
+        np.testing.assert_array_equal(render(cpu_features=sse2), expected)
+
+        self.assertIsNone(blend2d.get_cpu_features())
+        blend2d.set_cpu_features(sse2)
+        try:
+            self.assertEqual(blend2d.get_cpu_features(), sse2)
+            np.testing.assert_array_equal(render(), expected)
+        finally:
+            blend2d.set_cpu_features(None)
+        self.assertIsNone(blend2d.get_cpu_features())
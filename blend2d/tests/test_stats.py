@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+import numpy as np
+
+
+class TestStats(unittest.TestCase):
+    def test_context_stats(self):
+        """Test the per-context command, byte and flush counters."""
+        img = blend2d.BLImage(100, 100)
+        ctx = blend2d.BLContext(img)
+        with self.assertRaises(RuntimeError):
+            ctx.stats()
+
+        ctx.collect_stats = True
+        ctx.clear_all()
+        ctx.set_fill_style(0xFFFFFFFF)
+        ctx.fill_rect(blend2d.BLRect(10, 10, 10, 10))
+        ctx.fill_rects(np.array([[0, 0, 5, 5], [50, 50, 5, 5]], dtype=np.float64))
+        ctx.stroke_circle(50, 50, 10)
+        ctx.fill_glyph_run(10, 50, blend2d.ShapedText(blend2d.BLFont(), "abc"))
+        sprite = blend2d.BLImage(8, 8)
+        ctx.blit_image(blend2d.BLPoint(0, 0), sprite)
+        ctx.blit_image(blend2d.BLRect(0, 0, 16, 16), sprite)
+        display_list = blend2d.DisplayList()
+        display_list.fill_rect(blend2d.BLRect(90, 90, 20, 20))
+        ctx.replay(display_list)
+        ctx.flush()
+
+        stats = ctx.stats()
+        self.assertEqual((stats["fills"], stats["strokes"], stats["texts"], stats["blits"]), (5, 1, 1, 2))
+        self.assertGreaterEqual(stats["process_pipelines_compiled"], 0)
+        self.assertEqual(stats["glyphs"], 3)
+        self.assertEqual(stats["flushes"], 1)
+        self.assertGreaterEqual(stats["flush_time"], 0.0)
+        # clear_all() alone covers the whole image, the replayed rect is clipped
+        self.assertGreater(stats["bytes_touched"], 100 * 100 * 4)
+        self.assertLess(stats["bytes_touched"], 2 * 100 * 100 * 4)
+
+        ctx.reset_stats()
+        ctx.fill_rect(blend2d.BLRect(90, 90, 20, 20))
+        ctx.end()
+        stats = ctx.stats()
+        self.assertEqual(stats["fills"], 1)
+        self.assertEqual(stats["bytes_touched"], 10 * 10 * 4)
+        self.assertEqual(stats["flushes"], 1)
+        ctx.collect_stats = False
+        self.assertFalse(ctx.collect_stats)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+
+
+class TestText(unittest.TestCase):
+    def test_shaped_text(self):
+        """Test drawing pre-shaped text as glyph runs."""
+        font = blend2d.BLFont()
+        shaped = blend2d.ShapedText(font, "NO AMMO")
+        self.assertEqual(shaped.text, "NO AMMO")
+        self.assertEqual(shaped.metrics, font.get_text_metrics("NO AMMO"))
+        self.assertEqual(shaped.width, shaped.metrics[0])
+        self.assertIsInstance(shaped.bounding_box, blend2d.BLBox)
+
+        img = blend2d.BLImage(100, 40)
+        ctx = blend2d.BLContext(img)
+        ctx.fill_glyph_run(blend2d.BLPoint(5, 30), shaped)
+        ctx.stroke_glyph_run(blend2d.BLPoint(5, 30), shaped)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import blend2d
+import os
+import sys
+import math
+import threading
+import time
+
+import numpy as np
+
+
+class TestThreads(unittest.TestCase):
+    def test_context_multithreaded(self):
+        """Test that a context can be created with worker threads."""
+        img = blend2d.BLImage(400, 300)
+        ctx = blend2d.BLContext(img, thread_count=2)
+        self.assertEqual(ctx.thread_count, 2)
+
+        ctx.fill_all()
+        ctx.flush(sync=False)
+        ctx.flush()
+        self.assertEqual(ctx.accumulated_error_flags, 0)
+
+        # A context created without create info renders synchronously
+        ctx = blend2d.BLContext(blend2d.BLImage(10, 10))
+        self.assertEqual(ctx.thread_count, 0)
+
+    def test_flush_async(self):
+        """Test waiting for a flush through a future and from asyncio."""
+        import asyncio
+        import concurrent.futures
+
+        img = blend2d.BLImage(64, 64)
+        ctx = blend2d.BLContext(img, thread_count=2)
+        ctx.set_fill_style(0xFFFF0000)
+        ctx.fill_all()
+        future = ctx.flush_async()
+        self.assertIsInstance(future, concurrent.futures.Future)
+        self.assertIsNone(future.result(timeout=10))
+        self.assertEqual(list(img.getDataAsNumPy()[10, 10]), [0, 0, 255, 255])
+
+        async def render():
+            ctx.set_fill_style(0xFF00FF00)
+            ctx.fill_all()
+            await asyncio.wrap_future(ctx.flush_async())
+
+        asyncio.run(render())
+        self.assertEqual(list(img.getDataAsNumPy()[10, 10]), [0, 255, 0, 255])
+
+    def test_flush_async_at_exit(self):
+        """Test that pending flushes finish before the interpreter shuts down."""
+        import subprocess
+
+        script = (
+            "import atexit\n"
+            "futures = []\n"
+            "def check():\n"
+            "    print(all(f.done() for f in futures))\n"
+            "    try:\n"
+            "        blend2d.BLContext(blend2d.BLImage(8, 8)).flush_async()\n"
+            "    except RuntimeError:\n"
+            "        print('refused')\n"
+            "atexit.register(check)\n"
+            "import blend2d\n"
+            "for _ in range(50):\n"
+            "    ctx = blend2d.BLContext(blend2d.BLImage(256, 256), thread_count=2)\n"
+            "    ctx.fill_all()\n"
+            "    futures.append(ctx.flush_async())\n"
+        )
+        # Handlers run last-registered first, so check() sees the worker stopped
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60, env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), ["True", "refused"])
+
+    def test_drawing_releases_gil(self):
+        """Test that another Python thread runs while a drawing call is in progress."""
+        path = blend2d.BLPath()
+        path.move_to(256, 256)
+        for i in range(20000):
+            path.line_to(256 + 250 * math.cos(i * 0.7), 256 + 250 * math.sin(i * 1.3))
+        ctx = blend2d.BLContext(blend2d.BLImage(512, 512))
+
+        started = threading.Event()
+        done = threading.Event()
+        progress = [0]
+
+        def count():
+            started.set()
+            while not done.is_set():
+                progress[0] += 1
+                time.sleep(0)
+
+        # Without a long switch interval the counter could also run because
+        # the interpreter preempted a call that holds the GIL
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(30)
+        thread = threading.Thread(target=count)
+        try:
+            thread.start()
+            started.wait()
+            before = progress[0]
+            ctx.stroke_path(path)
+            after = progress[0]
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval(interval)
+        self.assertGreater(after, before)
+
+    def test_threads_stress(self):
+        """Test many threads rendering with shared paths, gradients and display lists."""
+        path = blend2d.BLPath()
+        path.move_to(32, 4)
+        for i in range(1, 40):
+            path.line_to(32 + 28 * math.cos(i * 2.1), 32 + 28 * math.sin(i * 2.1))
+        gradient = blend2d.create_linear_gradient(0, 0, 64, 64)
+        gradient.add_stop(0.0, (1.0, 0.0, 0.0, 1.0))
+        gradient.add_stop(1.0, (0.0, 0.0, 1.0, 1.0))
+        display_list = blend2d.DisplayList()
+        display_list.set_fill_style((0.0, 1.0, 0.0, 1.0))
+        display_list.fill_rect(blend2d.BLRect(40, 40, 20, 20))
+
+        def render(ctx):
+            ctx.clear_all()
+            ctx.set_fill_style(gradient)
+            ctx.fill_path(path)
+            ctx.stroke_path(path)
+            ctx.replay(display_list)
+
+        def render_image():
+            img = blend2d.BLImage(64, 64)
+            ctx = blend2d.BLContext(img)
+            render(ctx)
+            ctx.end()
+            return img.getDataAsNumPy()
+
+        expected = render_image()
+        # Contexts, display lists, pools, states and styles serialize calls
+        # with their own locks, with or without the GIL
+        shared_ctx = blend2d.BLContext(blend2d.BLImage(64, 64))
+        shared_list = blend2d.DisplayList()
+        shared_style = blend2d.Style(gradient)
+        shared_state = blend2d.ContextState(fill_style=shared_style)
+        pool = blend2d.ContextPool(capacity=2)
+        pool_images = [blend2d.BLImage(64, 64) for _ in range(2)]
+        errors = []
+
+        def worker():
+            try:
+                for i in range(50):
+                    if not np.array_equal(render_image(), expected):
+                        errors.append("mismatch")
+                    render(shared_ctx)
+                    shared_list.fill_circle(8, 8, 4)
+                    shared_ctx.fill_rect(blend2d.BLRect(0, 0, 16, 16), shared_state)
+                    shared_list.set_state(shared_state)
+                    shared_state.fill_style = shared_style if i % 2 else (0.0, 1.0, 0.0, 1.0)
+                    shared_ctx.set_fill_style(shared_style)
+                    if i % 10 == 9:
+                        shared_style.reset()
+                    pool_ctx = pool.acquire(pool_images[i % 2])
+                    pool_ctx.fill_path(path)
+                    pool.release(pool_ctx)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(shared_list), 16 * 50 * 2)
@@ -12,7 +12,6 @@ import time
 import threading
 import random
 import statistics
-import tempfile
 import numpy as np
 import cv2
 import time
@@ -671,6 +670,11 @@ class CompassRenderer:
         self.ordinal_metrics_cache = {}
         self.heading_metrics_cache = {}
         
+        # Pre-shaped label text, drawn as glyph runs without re-shaping
+        self.cardinal_shaped_cache = {}
+        self.ordinal_shaped_cache = {}
+        self.heading_shaped_cache = {}
+        
         # Pre-cached primitive shapes
         self.main_line_rect = blend2d.BLRect(self.compass_start_x, self.cy - 0.5, self.compass_width, 1.0)
         
@@ -805,6 +809,14 @@ class CompassRenderer:
         self.central_triangles[1].line_to(self.cx + self.triangle_coords['inner'][2][0], 
                                          self.cy + self.triangle_coords['inner'][2][1])
         self.central_triangles[1].close()
+        
+        # Threat marker at the origin, drawn at each threat's position
+        coords = self.triangle_coords['marker']
+        self.threat_marker = blend2d.BLPath()
+        self.threat_marker.move_to(coords[0][0], coords[0][1])
+        self.threat_marker.line_to(coords[1][0], coords[1][1])
+        self.threat_marker.line_to(coords[2][0], coords[2][1])
+        self.threat_marker.close()
     
     def init_fonts(self):
         """Initialize fonts and pre-compute text metrics if not already done"""
@@ -818,10 +830,14 @@ class CompassRenderer:
                 try:
                     if is_cardinal:
                         if name not in self.cardinal_metrics_cache:
-                            self.cardinal_metrics_cache[name] = self.cardinal_font.get_text_metrics(name)
+                            shaped = blend2d.ShapedText(self.cardinal_font, name)
+                            self.cardinal_shaped_cache[name] = shaped
+                            self.cardinal_metrics_cache[name] = shaped.metrics
                     else:
                         if name not in self.ordinal_metrics_cache:
-                            self.ordinal_metrics_cache[name] = self.ordinal_font.get_text_metrics(name)
+                            shaped = blend2d.ShapedText(self.ordinal_font, name)
+                            self.ordinal_shaped_cache[name] = shaped
+                            self.ordinal_metrics_cache[name] = shaped.metrics
                 except Exception:
                     # Fallback approximation if metrics calculation fails
                     if is_cardinal:
@@ -833,7 +849,9 @@ class CompassRenderer:
             for h in range(360):
                 heading_text = f"{h}°"
                 try:
-                    self.heading_metrics_cache[heading_text] = self.heading_font.get_text_metrics(heading_text)
+                    shaped = blend2d.ShapedText(self.heading_font, heading_text)
+                    self.heading_shaped_cache[heading_text] = shaped
+                    self.heading_metrics_cache[heading_text] = shaped.metrics
                 except Exception:
                     self.heading_metrics_cache[heading_text] = (len(heading_text) * 15, 0)
             
@@ -902,19 +920,17 @@ class CompassRenderer:
                 'ordinal_text': ordinal_text_groups
             }
     
-    def get_threat_path(self, visible_threats):
-        """Create path for threat indicators based on the given visible threats"""
-        path = blend2d.BLPath()
-        
-        # Add each threat triangle to the path (no glow triangles)
-        coords = self.triangle_coords['marker']
-        for x_pos, _ in visible_threats:
-            path.move_to(x_pos + coords[0][0], self.cy + coords[0][1])
-            path.line_to(x_pos + coords[1][0], self.cy + coords[1][1])
-            path.line_to(x_pos + coords[2][0], self.cy + coords[2][1])
-            path.close()
-        
-        return path
+    def draw_label(self, ctx, pt, font, shaped_cache, text):
+        """Draw a label from its pre-shaped glyph run, shaping it only if it wasn't cached"""
+        shaped = shaped_cache.get(text)
+        if shaped is not None:
+            ctx.fill_glyph_run(pt, shaped)
+        else:
+            ctx.fill_text(pt, font, text)
+    
+    def get_threat_offsets(self, visible_threats):
+        """Get the (N, 2) marker positions for the given visible threats"""
+        return np.array([(x_pos, self.cy) for x_pos, _ in visible_threats], dtype=np.float64)
     
     def draw_compass(self, ctx, heading, threats=None):
         """Draw the compass using pre-computed values for maximum performance"""
@@ -961,7 +977,8 @@ class CompassRenderer:
             ctx.set_fill_style(get_cached_color(brightness, brightness, brightness, 1.0))
             
             for name, x_pos, width in items:
-                ctx.fill_text(blend2d.BLPoint(x_pos - width/2, self.cy - y_offset), self.cardinal_font, name)
+                self.draw_label(ctx, blend2d.BLPoint(x_pos - width/2, self.cy - y_offset), 
+                                self.cardinal_font, self.cardinal_shaped_cache, name)
         
         # Draw ordinal direction text
         for brightness, items in brightness_groups['ordinal_text'].items():
@@ -969,7 +986,8 @@ class CompassRenderer:
             ctx.set_fill_style(get_cached_color(gray, gray, gray, 1.0))
             
             for name, x_pos, width in items:
-                ctx.fill_text(blend2d.BLPoint(x_pos - width/2, self.cy - y_offset), self.ordinal_font, name)
+                self.draw_label(ctx, blend2d.BLPoint(x_pos - width/2, self.cy - y_offset), 
+                                self.ordinal_font, self.ordinal_shaped_cache, name)
         
         # Handle threats with efficient rendering (no glow triangles)
         if threats and len(threats) > 0:
@@ -992,10 +1010,9 @@ class CompassRenderer:
             
             # Efficient threat rendering (only single red triangles, no glow)
             if visible_threats:
-                # Create and draw main threat indicators in a single operation
-                marker_path = self.get_threat_path(visible_threats)
+                # Draw all threat markers from one cached path in a single call
                 ctx.set_fill_style(RED_COLOR)
-                ctx.fill_path(marker_path)
+                ctx.fill_path_instances(self.threat_marker, self.get_threat_offsets(visible_threats))
         
         # Draw current heading value using cached metrics
         heading_text = f"{heading}°"
@@ -1003,7 +1020,8 @@ class CompassRenderer:
         # Use pre-computed metrics
         metrics = self.heading_metrics_cache.get(heading_text, (len(heading_text) * 15, 0))
         ctx.set_fill_style(TEXT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.cx - metrics[0]/2, self.cy + 40), self.heading_font, heading_text)
+        self.draw_label(ctx, blend2d.BLPoint(self.cx - metrics[0]/2, self.cy + 40), 
+                        self.heading_font, self.heading_shaped_cache, heading_text)
         
         # Draw central indicator triangles using pre-computed paths
         ctx.set_fill_style(ACCENT_COLOR)
@@ -1053,7 +1071,7 @@ class AltitudeRenderer:
         
         # Draw text with single operation
         ctx.set_fill_style(TEXT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.cx - metrics[0]/2, self.cy), self.font, alt_text)
+        ctx.fill_text(self.cx - metrics[0]/2, self.cy, self.font, alt_text)
         
         ctx.restore()
 
@@ -1345,7 +1363,7 @@ class AmmoCounterRenderer:
         
         # Draw percentage text
         ctx.set_fill_style(TEXT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.circle_x - metrics[0]/2, self.circle_y + 4), 
+        ctx.fill_text(self.circle_x - metrics[0]/2, self.circle_y + 4, 
                       self.font_percent, percent_text)
         
         # Draw "RELOADING" text with subtle pulse
@@ -1356,7 +1374,7 @@ class AmmoCounterRenderer:
         
         # Draw the main text
         ctx.set_fill_style(get_cached_color(0.9, 0.7, 0.3, 1.0))  # Golden color
-        ctx.fill_text(blend2d.BLPoint(self.x, self.y - 100), self.font_reload, reload_label)
+        ctx.fill_text(self.x, self.y - 100, self.font_reload, reload_label)
     
     def _draw_normal_state(self, ctx, ammo_text, ammo_max, ammo):
         """Draw the ammo counter in normal state"""
@@ -1368,7 +1386,7 @@ class AmmoCounterRenderer:
         
         # Draw main ammo count
         ctx.set_fill_style(text_color)
-        ctx.fill_text(blend2d.BLPoint(self.x, self.y), self.font_large, ammo_text)
+        ctx.fill_text(self.x, self.y, self.font_large, ammo_text)
         
         # Draw max ammo
         max_text = f"/ {ammo_max}"
@@ -1382,7 +1400,7 @@ class AmmoCounterRenderer:
         
         # Draw max ammo text
         ctx.set_fill_style(TEXT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.x + 175, self.y), self.font_small, max_text)
+        ctx.fill_text(self.x + 175, self.y, self.font_small, max_text)
 
 # Weapon info renderer
 class WeaponInfoRenderer:
@@ -1442,17 +1460,17 @@ class WeaponInfoRenderer:
         if ammo_capacity <= 0:
             # Draw just a gray empty bar with text
             ctx.set_fill_style(self.bg_color)
-            ctx.fill_rect(blend2d.BLRect(self.x, self.y, self.bar_width, self.bar_height))
+            ctx.fill_rect(self.x, self.y, self.bar_width, self.bar_height)
             
             # Draw "NO AMMO" text
             ctx.set_fill_style(self.red_color)
-            ctx.fill_text(blend2d.BLPoint(self.cx - 30, self.y + 15), self.font, "NO AMMO")
+            ctx.fill_text(self.cx - 30, self.y + 15, self.font, "NO AMMO")
             ctx.restore()
             return  # Exit early
         
         # 1. Draw background
         ctx.set_fill_style(self.bg_color)
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y, self.bar_width, self.bar_height))
+        ctx.fill_rect(self.x, self.y, self.bar_width, self.bar_height)
         
         # 2. Draw remaining ammo indicator
         if ammo_count > 0:
@@ -1469,7 +1487,7 @@ class WeaponInfoRenderer:
                 ctx.set_fill_style(self.blue_color)
                 
             # Draw filled portion
-            ctx.fill_rect(blend2d.BLRect(self.x, self.y, filled_width, self.bar_height))
+            ctx.fill_rect(self.x, self.y, filled_width, self.bar_height)
         
         # 3. Draw tick marks
         if ammo_capacity > 1:  # Only need ticks if we have multiple bullets
@@ -1503,7 +1521,7 @@ class WeaponInfoRenderer:
         
         # Draw text centered on bar
         ctx.set_fill_style(TEXT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.cx - metrics[0]/2, self.y + 15), self.font, ammo_text)
+        ctx.fill_text(self.cx - metrics[0]/2, self.y + 15, self.font, ammo_text)
         
         ctx.restore()
 
@@ -1549,10 +1567,10 @@ class HealthShieldRenderer:
         
         # Draw background for health bar
         ctx.set_fill_style(self.bg_color)
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y, self.bar_width, self.bar_height))
+        ctx.fill_rect(self.x, self.y, self.bar_width, self.bar_height)
         
         # Draw background for shield bar
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y + self.spacing, self.bar_width, self.bar_height))
+        ctx.fill_rect(self.x, self.y + self.spacing, self.bar_width, self.bar_height)
         
         # Handle health bar
         self._draw_health_bar(ctx, health)
@@ -1579,11 +1597,11 @@ class HealthShieldRenderer:
             ctx.set_fill_style(self.normal_health_color)
         
         # Draw filled health bar
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y, filled_width, self.bar_height))
+        ctx.fill_rect(self.x, self.y, filled_width, self.bar_height)
         
         # Add highlight to health bar
         ctx.set_fill_style(self.highlight_color)
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y, filled_width, 2))
+        ctx.fill_rect(self.x, self.y, filled_width, 2)
     
     def _draw_shield_bar(self, ctx, shield):
         """Draw the shield bar with pulsing effect if recharging"""
@@ -1604,11 +1622,11 @@ class HealthShieldRenderer:
             ctx.set_fill_style(self.shield_color)
         
         # Draw filled shield bar
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y + self.spacing, filled_width, self.bar_height))
+        ctx.fill_rect(self.x, self.y + self.spacing, filled_width, self.bar_height)
         
         # Add highlight to shield bar
         ctx.set_fill_style(self.highlight_color)
-        ctx.fill_rect(blend2d.BLRect(self.x, self.y + self.spacing, filled_width, 2))
+        ctx.fill_rect(self.x, self.y + self.spacing, filled_width, 2)
     
     def _draw_percentages(self, ctx, health, shield):
         """Draw percentage text for health and shield"""
@@ -1626,11 +1644,11 @@ class HealthShieldRenderer:
         
         # Draw health percentage
         ctx.set_fill_style(ACCENT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.x + self.bar_width + 10, self.y + 9), 
+        ctx.fill_text(self.x + self.bar_width + 10, self.y + 9, 
                        self.font, health_text)
         
         # Draw shield percentage
-        ctx.fill_text(blend2d.BLPoint(self.x + self.bar_width + 10, self.y + self.spacing + 9), 
+        ctx.fill_text(self.x + self.bar_width + 10, self.y + self.spacing + 9, 
                        self.font, shield_text)
 
 # Movement indicator renderer
@@ -1709,7 +1727,7 @@ class MovementIndicatorRenderer:
         
         # Draw icon text centered
         ctx.set_fill_style(color)
-        ctx.fill_text(blend2d.BLPoint(self.x - metrics[0]/2, self.y + 6), self.font, icon)
+        ctx.fill_text(self.x - metrics[0]/2, self.y + 6, self.font, icon)
         
         ctx.restore()
 
@@ -1753,7 +1771,7 @@ class FpsCounterRenderer:
         
         # Draw text
         ctx.set_fill_style(ACCENT_COLOR)
-        ctx.fill_text(blend2d.BLPoint(self.x - metrics[0]/2, self.y), self.font, fps_text)
+        ctx.fill_text(self.x - metrics[0]/2, self.y, self.font, fps_text)
         
         ctx.restore()
 
@@ -1780,8 +1798,12 @@ class HudRenderer:
         """Draw the complete HUD with all components using their optimized renderers"""
         # Clear the canvas with the background color
         ctx.comp_op = blend2d.BLCompOp.SRC_COPY  # Use SRC_COPY for faster rendering without alpha blending
-        # clear the canvas
-        ctx.clear_all()
+        # clear the canvas, or only what the previous frame drew when the
+        # context tracks damage
+        if ctx.damage_tracking:
+            ctx.clear_damage()
+        else:
+            ctx.clear_all()
 
         #ctx.set_fill_style(BG_COLOR)
         #ctx.fill_all()
@@ -1826,9 +1848,15 @@ class HudManager:
         self.width = width
         self.height = height
         
+        # Compile the solid, gradient and image pipelines before the first
+        # frame instead of stalling on it
+        blend2d.warmup_pipelines()
+        
         # Initialize blend2d image and context for rendering
         self.img = blend2d.BLImage(width, height)
         self.ctx = blend2d.BLContext(self.img)
+        self.ctx.clear_all()
+        self.ctx.damage_tracking = True
         
         # Initialize the sensor system
         self.sensors = SensorSystem()
@@ -1841,9 +1869,6 @@ class HudManager:
         self.fps_values = []
         self.last_fps_update = time.time()
         self.current_fps_display = 0
-        
-        # Create a temporary file for image transfer (if needed)
-        self.temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
     
     def update_sensors(self, input_data=None):
         """Update sensor data with optional input from external sources"""
@@ -1916,7 +1941,13 @@ class HudManager:
         # Calculate and update FPS
         frame_time = time.time() - start_time
         self._update_fps(frame_time)
-        
+
+        # Blend the premultiplied HUD natively when the frame matches it
+        if frame.dtype == np.uint8 and frame.shape[:2] == (self.height, self.width) and frame.shape[2] in (3, 4):
+            result_frame = frame.copy()
+            blend2d.composite_over(result_frame, self.img, "bgr" if frame.shape[2] == 3 else "bgra")
+            return result_frame
+
         # Convert blend2d image to numpy array
         hud_array = self._blend2d_to_numpy()
         
@@ -1941,17 +1972,15 @@ class HudManager:
             return img_array
         except Exception as e:
             print(f"Warning: Direct pixel access failed ({e}). Using file method instead.")
-            return self._blend2d_to_numpy_using_file()
+            return self._blend2d_to_numpy_using_png()
     
-    def _blend2d_to_numpy_using_file(self):
-        """Convert blend2d image to numpy array using temporary file"""
+    def _blend2d_to_numpy_using_png(self):
+        """Convert blend2d image to numpy array by encoding it in memory"""
         import cv2
         
-        # Save the blend2d image to the temporary file
-        self.img.writeToFile(self.temp_file)
-        
-        # Read the file with OpenCV
-        img_array = cv2.imread(self.temp_file, cv2.IMREAD_UNCHANGED)
+        # Encode the blend2d image and decode it with OpenCV
+        png = np.frombuffer(self.img.write_to_data("png", compression=1), dtype=np.uint8)
+        img_array = cv2.imdecode(png, cv2.IMREAD_UNCHANGED)
         
         # Convert from BGR to RGB if needed
         if img_array.shape[2] >= 3:
@@ -2080,14 +2109,6 @@ class HudManager:
         """Stop the sensor system and clean up resources"""
         if self.sensors:
             self.sensors.stop()
-        
-        # Remove temporary file if it exists
-        import os
-        if hasattr(self, 'temp_file') and os.path.exists(self.temp_file):
-            try:
-                os.remove(self.temp_file)
-            except:
-                pass
 
 def download_video(url, save_path='/tmp'):
     """
@@ -0,0 +1,203 @@
+#pragma once
+
+#include "nanobind_common.h"
+
+#include <cstring>
+#include <memory>
+#include <optional>
+#include <stdexcept>
+
+// A8 masks as 2-D uint8 arrays, 32-bit pixels as HxWx4 uint8 arrays in
+// Blend2D's byte order (B, G, R, A on little-endian, as getDataAsNumPy()).
+// Any strides are accepted.
+using MaskArray = nb::ndarray<const uint8_t, nb::ndim<2>, nb::device::cpu>;
+using PixelArray = nb::ndarray<const uint8_t, nb::shape<-1, -1, 4>, nb::device::cpu>;
+
+static void _release_array(void *impl, void *externalData, void *userData) noexcept
+{
+    // May run on a worker thread once an asynchronous context is done with
+    // the image; nanobind takes the GIL if this drops the last reference
+    delete static_cast<nb::ndarray<> *>(userData);
+}
+
+// Makes `image` use the memory of `array` without copying. The image holds a
+// reference to the array, so it stays valid for as long as Blend2D needs it.
+// Returns false when pixels within a row aren't packed, which Blend2D can't
+// address in place.
+template <typename Array>
+static bool _wrap_array(BLImage &image, const Array &array, BLFormat format)
+{
+    int64_t pixelSize = format == BL_FORMAT_A8 ? 1 : 4;
+    if (array.stride(1) != pixelSize || (format != BL_FORMAT_A8 && array.stride(2) != 1))
+        return false;
+
+    auto *ref = new nb::ndarray<>(array);
+    void *pixels = const_cast<uint8_t *>(array.data());
+    BLResult result = image.createFromData(int(array.shape(1)), int(array.shape(0)), format, pixels, intptr_t(array.stride(0)),
+                                           BL_DATA_ACCESS_READ, _release_array, ref);
+    if (result != BL_SUCCESS) {
+        delete ref;
+        throw std::runtime_error("Failed to create an image from the array");
+    }
+    return true;
+}
+
+// Holds an exported Python buffer until Blend2D is done with the image
+struct BufferRef
+{
+    Py_buffer view{};
+    bool held = false;
+
+    ~BufferRef()
+    {
+        if (held)
+            PyBuffer_Release(&view);
+    }
+};
+
+static void _release_buffer(void *impl, void *externalData, void *userData) noexcept
+{
+    // May run without the GIL, on a context worker thread or from a
+    // native_section
+    if (!Py_IsInitialized())
+        return;
+    nb::gil_scoped_acquire acquire;
+    delete static_cast<BufferRef *>(userData);
+}
+
+// Makes an image over the memory of any object with the buffer protocol.
+// Shaped buffers are (height, width, 4) bytes or (height, width) 32-bit items
+// for PRGB32/XRGB32 and (height, width) bytes for A8, with packed pixels and
+// any row stride. Flat buffers need `stride`, which then sets the row size
+// and width. Read-only buffers give an image that is copied on first draw.
+static BLImage _image_from_buffer(nb::handle obj, BLFormat format, std::optional<intptr_t> stride)
+{
+    if (format != BL_FORMAT_PRGB32 && format != BL_FORMAT_XRGB32 && format != BL_FORMAT_A8) {
+        throw nb::value_error("Unsupported format, expected PRGB32, XRGB32 or A8");
+    }
+
+    auto ref = std::make_unique<BufferRef>();
+    bool writable = true;
+    if (PyObject_GetBuffer(obj.ptr(), &ref->view, PyBUF_RECORDS) != 0) {
+        PyErr_Clear();
+        writable = false;
+        if (PyObject_GetBuffer(obj.ptr(), &ref->view, PyBUF_RECORDS_RO) != 0) {
+            throw nb::python_error();
+        }
+    }
+    ref->held = true;
+
+    const Py_buffer &view = ref->view;
+    Py_ssize_t pixelSize = format == BL_FORMAT_A8 ? 1 : 4;
+    Py_ssize_t w, h, rowStride;
+    if (view.ndim == 1) {
+        if (!stride) {
+            throw nb::value_error("A flat buffer needs the row stride");
+        }
+        if (view.strides[0] != view.itemsize || *stride < pixelSize) {
+            throw nb::value_error("Expected a contiguous buffer and a stride of at least one pixel");
+        }
+        rowStride = *stride;
+        w = rowStride / pixelSize;
+        h = view.len / rowStride;
+    }
+    else {
+        bool packed;
+        if (view.ndim == 3)
+            packed = pixelSize == 4 && view.itemsize == 1 && view.shape[2] == 4 && view.strides[2] == 1 && view.strides[1] == 4;
+        else
+            packed = view.ndim == 2 && view.itemsize == pixelSize && view.strides[1] == pixelSize;
+        if (!packed) {
+            throw nb::value_error("Expected a (height, width, 4) byte or (height, width) 32-bit buffer for 32-bit formats, "
+                                  "or (height, width) bytes for A8, with packed pixels");
+        }
+        rowStride = view.strides[0];
+        w = view.shape[1];
+        h = view.shape[0];
+        if (stride && *stride != rowStride) {
+            throw nb::value_error("The stride doesn't match the row stride of the buffer");
+        }
+    }
+    if (w <= 0 || h <= 0 || rowStride < w * pixelSize) {
+        throw nb::value_error("The buffer doesn't hold a whole row of pixels");
+    }
+
+    BLImage image;
+    BLDataAccessFlags access = writable ? BL_DATA_ACCESS_RW : BL_DATA_ACCESS_READ;
+    BLResult result = image.createFromData(int(w), int(h), format, view.buf, intptr_t(rowStride), access, _release_buffer, ref.get());
+    if (result != BL_SUCCESS) {
+        throw std::runtime_error("Failed to create an image from the buffer");
+    }
+    ref.release();
+    return image;
+}
+
+// Copies `array` row by row into a new image, honoring any strides
+template <typename Array>
+static void _copy_array(BLImage &image, const Array &array, BLFormat format)
+{
+    int w = int(array.shape(1));
+    int h = int(array.shape(0));
+    if (image.create(w, h, format) != BL_SUCCESS) {
+        throw std::runtime_error("Failed to create an image from the array");
+    }
+
+    BLImageData data;
+    image.getData(&data);
+    int channels = format == BL_FORMAT_A8 ? 1 : 4;
+    int64_t rowStride = array.stride(0);
+    int64_t pixelStride = array.stride(1);
+    int64_t channelStride = channels == 1 ? 0 : array.stride(2);
+    for (int y = 0; y < h; y++) {
+        const uint8_t *src = array.data() + y * rowStride;
+        uint8_t *dst = static_cast<uint8_t *>(data.pixelData) + y * data.stride;
+        for (int x = 0; x < w; x++) {
+            for (int c = 0; c < channels; c++)
+                dst[x * channels + c] = src[x * pixelStride + c * channelStride];
+        }
+    }
+}
+
+// Returns an image over the array's memory, or over a packed copy when the
+// array's layout requires one
+template <typename Array>
+static BLImage _image_from_array(const Array &array, BLFormat format)
+{
+    BLImage image;
+    if (!_wrap_array(image, array, format))
+        _copy_array(image, array, format);
+    return image;
+}
+
+// Copies straight-alpha pixels into a new PRGB32 image, premultiplying them
+static BLImage _premultiplied_image(const PixelArray &array)
+{
+    const uint8_t *src = array.data();
+    intptr_t srcStride = intptr_t(array.stride(0));
+
+    // The converter needs packed rows
+    BLImage packed;
+    if (array.stride(1) != 4 || array.stride(2) != 1) {
+        _copy_array(packed, array, BL_FORMAT_PRGB32);
+        BLImageData data;
+        packed.getData(&data);
+        src = static_cast<const uint8_t *>(data.pixelData);
+        srcStride = data.stride;
+    }
+
+    BLFormatInfo dstInfo, srcInfo;
+    dstInfo.query(BL_FORMAT_PRGB32);
+    srcInfo = dstInfo;
+    srcInfo.clearFlags(BL_FORMAT_FLAG_PREMULTIPLIED);
+
+    BLImage image;
+    BLImageData data;
+    BLPixelConverter converter;
+    if (image.create(int(array.shape(1)), int(array.shape(0)), BL_FORMAT_PRGB32) != BL_SUCCESS ||
+        image.getData(&data) != BL_SUCCESS ||
+        converter.create(dstInfo, srcInfo) != BL_SUCCESS) {
+        throw std::runtime_error("Failed to premultiply the array");
+    }
+    converter.convertRect(data.pixelData, data.stride, src, srcStride, uint32_t(data.size.w), uint32_t(data.size.h));
+    return image;
+}
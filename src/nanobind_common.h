@@ -30,21 +30,98 @@
 #include <nanobind/ndarray.h>
 #include <nanobind/stl/tuple.h>
 #include <nanobind/stl/pair.h>
+#include <nanobind/stl/optional.h>
+#include <nanobind/stl/vector.h>
 
 #include <blend2d.h>
 #include <string>
 #include <vector>
 #include <cmath>
+#include <optional>
+#include <mutex>
 
 namespace nb = nanobind;
 using namespace nb::literals;
 
+// Scope for native work (rasterization, image IO, text shaping) that doesn't
+// touch Python objects. The thread detaches from the interpreter: it drops
+// the GIL, and on free-threaded builds it doesn't hold up stop-the-world
+// pauses while it runs.
+using native_section = nb::gil_scoped_release;
+
+// Call guard for bindings that do native work. Arguments are converted
+// before the guard is entered, so the lambda only sees C++ values.
+using release_gil = nb::call_guard<native_section>;
+
+// Holds the lock of an object whose native state Python threads share
+// (BLContext, DisplayList, ContextPool). nb::lock_self() can't protect those:
+// its critical section is suspended whenever the thread detaches, which is
+// exactly when the native work runs. The mutex stays held across native
+// sections instead, and a thread that has to wait for it waits detached, so
+// it never blocks the GIL or the interpreter. For attached threads.
+class object_lock
+{
+public:
+    explicit object_lock(std::mutex &mutex) : lock(mutex, std::try_to_lock)
+    {
+        if (!lock.owns_lock()) {
+            native_section release;
+            lock.lock();
+        }
+    }
+
+private:
+    std::unique_lock<std::mutex> lock;
+};
+
+// Lock of a BLContext, which has no room for one of its own
+std::mutex &_context_mutex(const BLContext &ctx);
+void _forget_context_mutex(const BLContext &ctx);
+inline std::mutex &_object_mutex(const BLContext &ctx) { return _context_mutex(ctx); }
+
+// Lock of a Style, a BLVar bound as is, kept aside like the context ones
+std::mutex &_style_mutex(const BLVar &style);
+void _forget_style_mutex(const BLVar &style);
+inline std::mutex &_object_mutex(const BLVar &style) { return _style_mutex(style); }
+
+// Wrap binding lambdas whose first parameter is the object to serialize
+// calls on. _locked() takes the object's lock for the whole call, _native()
+// also runs the whole call detached, in place of release_gil().
+template <typename F, typename R, typename Self, typename... Args>
+auto _locked_impl(F f, R (F::*)(Self, Args...) const)
+{
+    return [f = std::move(f)](Self self, Args... args) -> R
+    {
+        object_lock lock(_object_mutex(self));
+        return f(self, std::forward<Args>(args)...);
+    };
+}
+
+template <typename F, typename R, typename Self, typename... Args>
+auto _native_impl(F f, R (F::*)(Self, Args...) const)
+{
+    return [f = std::move(f)](Self self, Args... args) -> R
+    {
+        native_section release;
+        std::lock_guard<std::mutex> lock(_object_mutex(self));
+        return f(self, std::forward<Args>(args)...);
+    };
+}
+
+template <typename F>
+auto _locked(F f) { return _locked_impl(std::move(f), &F::operator()); }
+
+template <typename F>
+auto _native(F f) { return _native_impl(std::move(f), &F::operator()); }
+
 // Helper functions (equivalent to the ones in _capi.pyx)
 static void _destroy_array_data(void *impl, void *externalData, void *userData) noexcept
 {
     // In the original this was empty, keeping it that way
 }
 
+// Packs an (r, g, b[, a]) tuple of floats into 0xAARRGGBB, the order packed
+// ints, BLRgba32 and gradient stops use too
 static uint32_t _get_rgba32_value(const nb::tuple &color)
 {
     uint32_t r, g, b, alpha;
@@ -62,7 +139,34 @@ static uint32_t _get_rgba32_value(const nb::tuple &color)
         alpha = 255;
     }
 
-    return (alpha << 24) | (b << 16) | (g << 8) | r;
+    return (alpha << 24) | (r << 16) | (g << 8) | b;
+}
+
+// Copies a Style under its lock, another thread may reset() it meanwhile
+static BLVar _copy_style(const BLVar &style)
+{
+    object_lock lock(_object_mutex(style));
+    return style;
+}
+
+// Converts anything set_fill_style() accepts into a BLVar style
+static BLVar _style_from_object(nb::handle obj)
+{
+    if (nb::isinstance<BLVar>(obj))
+        return _copy_style(nb::cast<const BLVar &>(obj));
+    if (nb::isinstance<nb::int_>(obj))
+        return BLVar(BLRgba32(nb::cast<uint32_t>(obj)));
+    if (nb::isinstance<BLRgba32>(obj))
+        return BLVar(nb::cast<BLRgba32>(obj));
+    if (nb::isinstance<BLRgba>(obj))
+        return BLVar(nb::cast<BLRgba>(obj));
+    if (nb::isinstance<nb::tuple>(obj))
+        return BLVar(BLRgba32(_get_rgba32_value(nb::borrow<nb::tuple>(obj))));
+    if (nb::isinstance<BLGradient>(obj))
+        return BLVar(nb::cast<const BLGradient &>(obj));
+    if (nb::isinstance<BLPattern>(obj))
+        return BLVar(nb::cast<const BLPattern &>(obj));
+    throw nb::type_error("Expected a color, gradient, pattern or Style");
 }
 
 static std::string _utf8_string(const nb::object &s)
@@ -77,15 +181,29 @@ static std::string _utf8_string(const nb::object &s)
     }
 }
 
+// Limits the JIT pipelines of a context about to be created to `cpuFeatures`,
+// or to the set_cpu_features() setting when not given. Overridden contexts
+// compile into their own JIT runtime, the shared pipeline cache only holds
+// pipelines for the full feature set of the host.
+void _apply_cpu_features(BLContextCreateInfo &createInfo, std::optional<BLRuntimeCpuFeatures> cpuFeatures = std::nullopt);
+
 // Function declarations for binding each module
 void register_enums(nb::module_ &m);
 void register_geometry(nb::module_ &m);
 void register_array(nb::module_ &m);
 void register_image(nb::module_ &m);
+void register_image_loader(nb::module_ &m);
 void register_font(nb::module_ &m);
 void register_path(nb::module_ &m);
 void register_gradient(nb::module_ &m);
 void register_pattern(nb::module_ &m);
+void register_style(nb::module_ &m);
+void register_context_state(nb::module_ &m);
+void register_display_list(nb::module_ &m);
 void register_context(nb::module_ &m);
+void register_context_pool(nb::module_ &m);
+void register_tiled_renderer(nb::module_ &m);
+void register_pipelines(nb::module_ &m);
 void register_misc(nb::module_ &m);
-void register_pixel_convert(nb::module_ &m);
\ No newline at end of file
+void register_pixel_convert(nb::module_ &m);
+void register_composite(nb::module_ &m);
\ No newline at end of file
@@ -0,0 +1,206 @@
+#include "nanobind_common.h"
+
+#include <algorithm>
+#include <cctype>
+#include <stdexcept>
+#include <utility>
+
+// HxWxC or NxHxWxC uint8 frames, any strides. Bound with noconvert(), so
+// frames of other dtypes or read-only frames are refused rather than blended
+// into a temporary copy.
+using FrameArray = nb::ndarray<uint8_t, nb::device::cpu>;
+
+// x * y / 255, rounded
+static inline uint32_t _mul255(uint32_t x, uint32_t y)
+{
+    uint32_t t = x * y + 128;
+    return (t + (t >> 8)) >> 8;
+}
+
+// Byte offsets of each channel in a destination pixel, -1 for no alpha
+struct ChannelOrder
+{
+    int r, g, b, a;
+};
+
+static ChannelOrder _channel_order(const std::string &order, size_t channels)
+{
+    ChannelOrder result{-1, -1, -1, -1};
+    if (order.size() == channels) {
+        for (size_t i = 0; i < order.size(); i++) {
+            int *slot = nullptr;
+            switch (std::tolower(static_cast<unsigned char>(order[i]))) {
+                case 'r': slot = &result.r; break;
+                case 'g': slot = &result.g; break;
+                case 'b': slot = &result.b; break;
+                case 'a': slot = &result.a; break;
+            }
+            if (!slot || *slot != -1)
+                break;
+            *slot = int(i);
+        }
+    }
+    if (result.r < 0 || result.g < 0 || result.b < 0 || (channels == 4 && result.a < 0)) {
+        throw nb::value_error("channel_order must name r, g, b (and a) once per channel of the frame, e.g. \"bgr\" or \"rgba\"");
+    }
+    return result;
+}
+
+// Columns [x0, x1) of a source row that hold any coverage
+struct Span
+{
+    int x0, x1;
+};
+
+// Blends one row of premultiplied source pixels over `dst`. Destination
+// pixels with alpha are straight (not premultiplied), as in video frames.
+// This is scalar code: the per-pixel alpha cases keep the compiler from
+// vectorizing the blend, only the transparency tests are. The speed comes
+// from skipping transparent chunks and rows trimmed to their coverage.
+template <bool HasAlpha>
+static void _blend_row(uint8_t *dst, int64_t pixelStride, const uint32_t *src, int count, const ChannelOrder &order)
+{
+    constexpr int kChunk = 8;
+    int x = 0;
+    while (x < count) {
+        // Skip transparent runs a chunk at a time
+        if (x + kChunk <= count) {
+            uint32_t alpha = 0;
+            for (int i = 0; i < kChunk; i++)
+                alpha |= src[x + i];
+            if ((alpha >> 24) == 0) {
+                x += kChunk;
+                continue;
+            }
+        }
+
+        int end = std::min(x + kChunk, count);
+        for (; x < end; x++) {
+            uint32_t p = src[x];
+            uint32_t sa = p >> 24;
+            if (sa == 0)
+                continue;
+
+            uint8_t *d = dst + x * pixelStride;
+            uint32_t sr = (p >> 16) & 0xFF;
+            uint32_t sg = (p >> 8) & 0xFF;
+            uint32_t sb = p & 0xFF;
+            uint32_t inv = 255 - sa;
+            uint32_t da = HasAlpha ? d[order.a] : 255;
+            if (sa == 255) {
+                d[order.r] = uint8_t(sr);
+                d[order.g] = uint8_t(sg);
+                d[order.b] = uint8_t(sb);
+                if (HasAlpha)
+                    d[order.a] = 255;
+            }
+            else if (da == 255) {
+                d[order.r] = uint8_t(sr + _mul255(d[order.r], inv));
+                d[order.g] = uint8_t(sg + _mul255(d[order.g], inv));
+                d[order.b] = uint8_t(sb + _mul255(d[order.b], inv));
+            }
+            else {
+                // Blend in 255 * 255 scale and divide by the new alpha,
+                // which keeps faint pixels exact
+                uint32_t dw = da * inv;
+                uint32_t oa = sa * 255 + dw;
+                d[order.r] = uint8_t(std::min<uint32_t>((sr * 65025 + d[order.r] * dw + oa / 2) / oa, 255));
+                d[order.g] = uint8_t(std::min<uint32_t>((sg * 65025 + d[order.g] * dw + oa / 2) / oa, 255));
+                d[order.b] = uint8_t(std::min<uint32_t>((sb * 65025 + d[order.b] * dw + oa / 2) / oa, 255));
+                d[order.a] = uint8_t((oa + 127) / 255);
+            }
+        }
+    }
+}
+
+void register_composite(nb::module_ &m)
+{
+     m.def("composite_over", [](FrameArray dst, const BLImage &src, const std::string &channel_order, std::pair<int, int> offset)
+           {
+            if (dst.ndim() != 3 && dst.ndim() != 4) {
+                throw nb::value_error("Expected a (height, width, channels) frame or a (count, height, width, channels) batch");
+            }
+            size_t batched = dst.ndim() == 4 ? 1 : 0;
+            size_t channels = dst.shape(batched + 2);
+            if (channels != 3 && channels != 4) {
+                throw nb::value_error("Frames must have 3 or 4 channels");
+            }
+            ChannelOrder order = _channel_order(channel_order, channels);
+
+            BLImageData data;
+            if (src.format() != BL_FORMAT_PRGB32 && src.format() != BL_FORMAT_XRGB32) {
+                throw nb::value_error("The source image must be PRGB32 or XRGB32");
+            }
+            src.getData(&data);
+
+            size_t count = batched ? dst.shape(0) : 1;
+            int64_t frameStride = batched ? dst.stride(0) : 0;
+            int64_t rowStride = dst.stride(batched);
+            int64_t pixelStride = dst.stride(batched + 1);
+            int64_t channelStride = dst.stride(batched + 2);
+            if (channelStride != 1) {
+                throw nb::type_error("The channels of a frame pixel must be adjacent");
+            }
+
+            // Part of the source inside the frame, the far edges are computed
+            // in 64 bits as offsets near INT_MAX would overflow
+            int frameW = int(dst.shape(batched + 1));
+            int frameH = int(dst.shape(batched));
+            int x0 = std::max(offset.first, 0);
+            int y0 = std::max(offset.second, 0);
+            int x1 = int(std::min(int64_t(offset.first) + data.size.w, int64_t(frameW)));
+            int y1 = int(std::min(int64_t(offset.second) + data.size.h, int64_t(frameH)));
+            if (x0 >= x1 || y0 >= y1 || count == 0)
+                return;
+
+            // Trim every row to its covered columns once for the whole batch
+            bool opaque = data.format == BL_FORMAT_XRGB32;
+            std::vector<uint32_t> xrgb;
+            std::vector<Span> spans(size_t(y1 - y0));
+            for (int y = y0; y < y1; y++) {
+                const uint32_t *row = reinterpret_cast<const uint32_t *>(static_cast<const uint8_t *>(data.pixelData) + intptr_t(y - offset.second) * data.stride);
+                Span span{x1, x0};
+                if (opaque) {
+                    span = Span{x0, x1};
+                }
+                else {
+                    for (int x = x0; x < x1; x++) {
+                        if (row[x - offset.first] >> 24) {
+                            span.x0 = x;
+                            break;
+                        }
+                    }
+                    for (int x = x1 - 1; x >= span.x0; x--) {
+                        if (row[x - offset.first] >> 24) {
+                            span.x1 = x + 1;
+                            break;
+                        }
+                    }
+                }
+                spans[size_t(y - y0)] = span;
+            }
+
+            for (size_t i = 0; i < count; i++) {
+                uint8_t *frame = dst.data() + int64_t(i) * frameStride;
+                for (int y = y0; y < y1; y++) {
+                    Span span = spans[size_t(y - y0)];
+                    if (span.x0 >= span.x1)
+                        continue;
+
+                    const uint32_t *pixels = reinterpret_cast<const uint32_t *>(static_cast<const uint8_t *>(data.pixelData) + intptr_t(y - offset.second) * data.stride) + (span.x0 - offset.first);
+                    if (opaque) {
+                        // XRGB32 leaves the alpha byte undefined
+                        xrgb.assign(pixels, pixels + (span.x1 - span.x0));
+                        for (uint32_t &p : xrgb)
+                            p |= 0xFF000000u;
+                        pixels = xrgb.data();
+                    }
+
+                    uint8_t *row = frame + int64_t(y) * rowStride + int64_t(span.x0) * pixelStride;
+                    if (channels == 4)
+                        _blend_row<true>(row, pixelStride, pixels, span.x1 - span.x0, order);
+                    else
+                        _blend_row<false>(row, pixelStride, pixels, span.x1 - span.x0, order);
+                }
+            } }, nb::arg("dst").noconvert(), nb::arg("src"), nb::arg("channel_order") = "bgr", nb::arg("offset") = std::make_pair(0, 0), release_gil());
+}
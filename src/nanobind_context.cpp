@@ -1,136 +1,927 @@
 #include "nanobind_common.h"
+#include "nanobind_array_image.h"
+#include "nanobind_context_state.h"
+#include "nanobind_draw_record.h"
+#include "nanobind_display_list.h"
+#include "nanobind_shaped_text.h"
+#include <algorithm>
+#include <condition_variable>
+#include <deque>
+#include <mutex>
+#include <optional>
+#include <shared_mutex>
+#include <stdexcept>
+#include <thread>
+#include <unordered_map>
+
+// Batch geometry is passed as rows of doubles, one row per item
+template <int64_t Columns>
+using BatchArray = nb::ndarray<const double, nb::shape<-1, Columns>, nb::c_contig, nb::device::cpu>;
+
+// Per-item colors are packed BLRgba32 values (0xAARRGGBB)
+using ColorArray = nb::ndarray<const uint32_t, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+// Source areas in an image, one (x, y, w, h) row per item
+using AreaArray = nb::ndarray<const int32_t, nb::shape<-1, 4>, nb::c_contig, nb::device::cpu>;
+
+// Per-item opacity, multiplied with the global alpha
+using AlphaArray = nb::ndarray<const double, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+// One coordinate per polyline sample
+using SampleArray = nb::ndarray<const double, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+// Calls `draw(row)` or `draw(row, BLRgba32(color))` for every row of `items`
+// in a single native loop with the GIL released.
+template <typename Array, typename DrawFn>
+static void _draw_batch(const Array &items, const std::optional<ColorArray> &colors, DrawFn &&draw)
+{
+    size_t count = items.shape(0);
+    size_t columns = items.shape(1);
+    const double *row = items.data();
+    const uint32_t *colorData = nullptr;
+
+    if (colors) {
+        if (colors->shape(0) != count) {
+            throw nb::value_error("colors must have one entry per item");
+        }
+        colorData = colors->data();
+    }
+
+    native_section release;
+    if (colorData) {
+        for (size_t i = 0; i < count; i++, row += columns)
+            draw(row, BLRgba32(colorData[i]));
+    }
+    else {
+        for (size_t i = 0; i < count; i++, row += columns)
+            draw(row);
+    }
+}
+
+// Calls `blit(row, area)` for every row of `targets` and its source area in
+// a single native loop with the GIL released.
+template <typename Array, typename BlitFn>
+static void _blit_batch(BLContext &ctx, const AreaArray &areas, const Array &targets, const std::optional<AlphaArray> &alphas, BlitFn &&blit)
+{
+    size_t count = areas.shape(0);
+    size_t columns = targets.shape(1);
+    const int32_t *area = areas.data();
+    const double *row = targets.data();
+    const double *alphaData = nullptr;
+
+    if (targets.shape(0) != count) {
+        throw nb::value_error("src_rects and the destinations must have the same number of rows");
+    }
+    if (alphas) {
+        if (alphas->shape(0) != count) {
+            throw nb::value_error("alphas must have one entry per item");
+        }
+        alphaData = alphas->data();
+    }
+
+    native_section release;
+    double globalAlpha = ctx.globalAlpha();
+    for (size_t i = 0; i < count; i++, area += 4, row += columns) {
+        if (alphaData)
+            ctx.setGlobalAlpha(globalAlpha * alphaData[i]);
+        blit(row, BLRectI(area[0], area[1], area[2], area[3]));
+    }
+    if (alphaData)
+        ctx.setGlobalAlpha(globalAlpha);
+}
+
+// Calls `draw(style...)` once per row of `transforms`, with the row
+// (m00, m01, m10, m11, m20, m21) applied on top of the user transform.
+// The user transform is restored afterwards.
+template <typename DrawFn>
+static void _draw_transformed(BLContext &ctx, const BatchArray<6> &transforms, const std::optional<ColorArray> &colors, DrawFn &&draw)
+{
+    BLMatrix2D user = ctx.userTransform();
+    _draw_batch(transforms, colors, [&](const double *v, const auto &...style)
+                {
+        ctx.setTransform(user);
+        ctx.applyTransform(BLMatrix2D(v[0], v[1], v[2], v[3], v[4], v[5]));
+        draw(style...); });
+    ctx.setTransform(user);
+}
+
+// Sub-columns per device pixel used by `_append_polyline`.
+static constexpr double kPolylineSubColumns = 16;
+
+// Appends the samples of a polyline to `path`. With a `transform`, every run
+// of samples that maps into the same 1/16 of a device pixel column is
+// replaced by a vertical span from its lowest to its highest y in the middle
+// of the sub-column, joined to its neighbours at the y where the polyline
+// crosses the sub-column boundary, so the path has O(columns) vertices. Runs
+// of up to four samples are kept as they are. The stroke covers the same
+// area as the full polyline up to antialiasing, but this is still lossy and
+// only done when asked for. NaN samples split the line.
+static void _append_polyline(BLPath &path, const double *xs, const double *ys, size_t count, const BLMatrix2D *transform)
+{
+    BLMatrix2D inverse;
+    if (transform && BLMatrix2D::invert(inverse, *transform) != BL_SUCCESS)
+        transform = nullptr;
+
+    bool open = false;
+    BLPoint previous;
+    auto emit = [&](BLPoint p)
+    {
+        if (!open)
+            path.moveTo(p);
+        else if (p != previous)
+            path.lineTo(p);
+        previous = p;
+        open = true;
+    };
+    auto emitDevice = [&](double x, double y)
+    { emit(inverse.mapPoint(x, y)); };
+
+    if (!transform) {
+        for (size_t i = 0; i < count; i++) {
+            if (std::isnan(xs[i]) || std::isnan(ys[i]))
+                open = false;
+            else
+                emit(BLPoint(xs[i], ys[i]));
+        }
+        return;
+    }
+
+    // The run in sub-column `column` has `length` samples, the first four of
+    // which are in `kept`. It starts at device point `entry`, which is on the
+    // boundary with the previous run if `crossed`, and at its first sample
+    // otherwise.
+    bool inRun = false, crossed = false;
+    double column = 0, yMin = 0, yMax = 0;
+    BLPoint entry, last;
+    size_t length = 0, kept[4], lastIndex = 0;
+    auto endRun = [&](BLPoint exit, bool crossing)
+    {
+        if (crossed)
+            emitDevice(entry.x, entry.y);
+        if (length <= 4) {
+            for (size_t k = 0; k < length; k++)
+                emit(BLPoint(xs[kept[k]], ys[kept[k]]));
+        }
+        else {
+            double lo = std::min({yMin, entry.y, exit.y});
+            double hi = std::max({yMax, entry.y, exit.y});
+            double x = (column + 0.5) / kPolylineSubColumns;
+            bool lowFirst = entry.y - lo < hi - entry.y;
+            if (!crossed)
+                emit(BLPoint(xs[kept[0]], ys[kept[0]]));
+            emitDevice(x, lowFirst ? lo : hi);
+            emitDevice(x, lowFirst ? hi : lo);
+            if (!crossing)
+                emit(BLPoint(xs[lastIndex], ys[lastIndex]));
+        }
+        inRun = false;
+    };
+
+    for (size_t i = 0; i < count; i++) {
+        if (std::isnan(xs[i]) || std::isnan(ys[i])) {
+            if (inRun)
+                endRun(last, false);
+            open = false;
+            continue;
+        }
+
+        BLPoint p = transform->mapPoint(xs[i], ys[i]);
+        double x = std::floor(p.x * kPolylineSubColumns);
+        if (inRun && x == column) {
+            yMin = std::min(yMin, p.y);
+            yMax = std::max(yMax, p.y);
+        }
+        else {
+            // Runs in neighbouring sub-columns meet where the segment between
+            // them crosses their common boundary
+            bool crossing = inRun && std::abs(x - column) == 1;
+            BLPoint start = p;
+            if (crossing) {
+                double boundary = std::max(x, column) / kPolylineSubColumns;
+                double t = (boundary - last.x) / (p.x - last.x);
+                start = BLPoint(boundary, last.y + t * (p.y - last.y));
+            }
+            if (inRun)
+                endRun(start, crossing);
+            inRun = true;
+            crossed = crossing;
+            column = x;
+            entry = start;
+            yMin = yMax = p.y;
+            length = 0;
+        }
+        if (length < 4)
+            kept[length] = i;
+        length++;
+        last = p;
+        lastIndex = i;
+    }
+    if (inRun)
+        endRun(last, false);
+}
+
+static std::mutex cpuFeaturesMutex;
+static std::optional<BLRuntimeCpuFeatures> globalCpuFeatures;
+
+void _apply_cpu_features(BLContextCreateInfo &createInfo, std::optional<BLRuntimeCpuFeatures> cpuFeatures)
+{
+    if (!cpuFeatures) {
+        std::lock_guard<std::mutex> lock(cpuFeaturesMutex);
+        cpuFeatures = globalCpuFeatures;
+    }
+    if (cpuFeatures) {
+        // Blend2D only honors the override in an isolated JIT runtime
+        createInfo.flags |= BL_CONTEXT_CREATE_FLAG_ISOLATED_JIT_RUNTIME | BL_CONTEXT_CREATE_FLAG_OVERRIDE_CPU_FEATURES;
+        createInfo.cpuFeatures = *cpuFeatures;
+    }
+}
+
+static BLContextCreateInfo _create_info(uint32_t thread_count, uint32_t command_queue_limit, BLContextCreateFlags flags, uint32_t saved_state_limit,
+                                        std::optional<BLRuntimeCpuFeatures> cpu_features)
+{
+    BLContextCreateInfo createInfo{};
+    createInfo.flags = flags;
+    createInfo.threadCount = thread_count;
+    createInfo.commandQueueLimit = command_queue_limit;
+    createInfo.savedStateLimit = saved_state_limit;
+    _apply_cpu_features(createInfo, cpu_features);
+    return createInfo;
+}
+
+static DamageTracker &_damage_tracker(const BLContext &ctx)
+{
+    DamageTracker *damage = DamageTracker::of(ctx);
+    if (!damage) {
+        throw std::runtime_error("Damage tracking is not enabled on this context");
+    }
+    return *damage;
+}
+
+static ContextStats &_context_stats(const BLContext &ctx)
+{
+    ContextStats *stats = ContextStats::of(ctx);
+    if (!stats) {
+        throw std::runtime_error("Stats collection is not enabled on this context");
+    }
+    return *stats;
+}
+
+// Locks live outside of BLContext, keyed by the context object like the
+// damage trackers and stats. Entries are only added, for each context on its
+// first call, and removed when it is deleted, so lookups share the table.
+static std::shared_mutex contextMutexesMutex;
+static std::unordered_map<const BLContext *, std::mutex> contextMutexes;
+
+std::mutex &_context_mutex(const BLContext &ctx)
+{
+    {
+        std::shared_lock<std::shared_mutex> lock(contextMutexesMutex);
+        auto it = contextMutexes.find(&ctx);
+        if (it != contextMutexes.end())
+            return it->second;
+    }
+    std::unique_lock<std::shared_mutex> lock(contextMutexesMutex);
+    return contextMutexes[&ctx];
+}
+
+void _forget_context_mutex(const BLContext &ctx)
+{
+    std::unique_lock<std::shared_mutex> lock(contextMutexesMutex);
+    contextMutexes.erase(&ctx);
+}
+
+// Waits for asynchronous flushes on a native thread and resolves their
+// futures, in submission order. The thread is started on first use and
+// joined at interpreter exit, after the futures still pending are resolved.
+class FlushWorker
+{
+public:
+    static void submit(nb::object context, nb::object future)
+    {
+        std::lock_guard<std::mutex> lock(instanceMutex);
+        if (stopped) {
+            throw std::runtime_error("flush_async() can't be used during interpreter shutdown");
+        }
+        if (!instance)
+            instance = new FlushWorker();
+        {
+            std::lock_guard<std::mutex> jobsLock(instance->mutex);
+            instance->jobs.push_back(Job{&nb::cast<BLContext &>(context), std::move(context), std::move(future)});
+        }
+        instance->cv.notify_one();
+    }
+
+    // Lets the thread finish the jobs it has and joins it. Called without the
+    // GIL, which the thread needs to resolve the futures.
+    static void shutdown()
+    {
+        FlushWorker *worker;
+        {
+            std::lock_guard<std::mutex> lock(instanceMutex);
+            stopped = true;
+            worker = instance;
+        }
+        if (!worker)
+            return;
+        {
+            std::lock_guard<std::mutex> lock(worker->mutex);
+            worker->stopping = true;
+        }
+        worker->cv.notify_one();
+        worker->thread.join();
+    }
+
+private:
+    struct Job
+    {
+        BLContext *ctx;
+        // Keeps the context alive until the flush is done
+        nb::object context;
+        nb::object future;
+    };
+
+    static inline std::mutex instanceMutex;
+    static inline FlushWorker *instance = nullptr;
+    static inline bool stopped = false;
+
+    std::mutex mutex;
+    std::condition_variable cv;
+    std::deque<Job> jobs;
+    bool stopping = false;
+    std::thread thread;
+
+    FlushWorker() : thread([this]
+                           { run(); })
+    {
+    }
+
+    void run()
+    {
+        for (;;) {
+            Job job;
+            {
+                std::unique_lock<std::mutex> lock(mutex);
+                cv.wait(lock, [this]
+                        { return !jobs.empty() || stopping; });
+                if (jobs.empty())
+                    return;
+                job = std::move(jobs.front());
+                jobs.pop_front();
+            }
+
+            BLResult result;
+            {
+                // Other threads may still draw to the context
+                std::lock_guard<std::mutex> lock(_context_mutex(*job.ctx));
+                result = _timed_flush(*job.ctx, BL_CONTEXT_FLUSH_SYNC);
+            }
+
+            nb::gil_scoped_acquire acquire;
+            try {
+                if (result == BL_SUCCESS)
+                    job.future.attr("set_result")(nb::none());
+                else
+                    job.future.attr("set_exception")(nb::handle(PyExc_RuntimeError)("Failed to flush the rendering context"));
+            }
+            catch (nb::python_error &e) {
+                e.discard_as_unraisable("flush_async");
+            }
+            // References must be dropped while holding the GIL
+            job = Job();
+        }
+    }
+};
 
 void register_context(nb::module_ &m)
 {
      nb::class_<BLContext>(m, "BLContext")
          .def(nb::init<>()) // Default constructor
-         .def(nb::init<BLImage &>(), nb::arg("image"))
+         .def("__init__", [](BLContext *self, BLImage &image, uint32_t thread_count, uint32_t command_queue_limit, BLContextCreateFlags flags, uint32_t saved_state_limit,
+                             std::optional<BLRuntimeCpuFeatures> cpu_features)
+              {
+            new (self) BLContext();
+            BLContextCreateInfo createInfo = _create_info(thread_count, command_queue_limit, flags, saved_state_limit, cpu_features);
+            if (self->begin(image, createInfo) != BL_SUCCESS) {
+                throw std::runtime_error("Failed to create rendering context");
+            } }, nb::arg("image"), nb::arg("thread_count") = 0, nb::arg("command_queue_limit") = 0, nb::arg("flags") = BL_CONTEXT_CREATE_NO_FLAGS, nb::arg("saved_state_limit") = 0,
+              nb::arg("cpu_features") = nb::none(), release_gil())
+         .def("begin", _native([](BLContext &self, BLImage &image, uint32_t thread_count, uint32_t command_queue_limit, BLContextCreateFlags flags, uint32_t saved_state_limit,
+                          std::optional<BLRuntimeCpuFeatures> cpu_features)
+              {
+            BLContextCreateInfo createInfo = _create_info(thread_count, command_queue_limit, flags, saved_state_limit, cpu_features);
+            if (self.begin(image, createInfo) != BL_SUCCESS) {
+                throw std::runtime_error("Failed to begin rendering to the image");
+            }
+            // Rects measured on the previous target don't apply to this one
+            if (DamageTracker *damage = DamageTracker::of(self)) {
+                damage->reset();
+                damage->resetClip();
+            } }), nb::arg("image"), nb::arg("thread_count") = 0, nb::arg("command_queue_limit") = 0, nb::arg("flags") = BL_CONTEXT_CREATE_NO_FLAGS, nb::arg("saved_state_limit") = 0,
+              nb::arg("cpu_features") = nb::none())
+         .def("end", _native([](BLContext &self)
+              {
+            // end() flushes, count that as the last flush of the frame
+            if (ContextStats::of(self))
+                _timed_flush(self, BL_CONTEXT_FLUSH_SYNC);
+            self.end(); }))
+         .def_prop_ro("is_active", _locked([](const BLContext &self)
+                      { return self.isValid(); }))
          .def("__del__", [](BLContext *self)
               {
-            self->end();
-            self->reset(); })
-         .def("__enter__", [](BLContext &self)
+            {
+                // Nothing else references the context anymore, a pending
+                // flush_async() job included
+                native_section release;
+                DamageTracker::setEnabled(*self, false);
+                ContextStats::setEnabled(*self, false);
+                self->end();
+                self->reset();
+            }
+            _forget_context_mutex(*self); })
+         .def("__enter__", _locked([](BLContext &self)
               {
             self.save();
-            return &self; })
-         .def("__exit__", [](BLContext &self, nb::object exc_type, nb::object exc_value, nb::object traceback)
-              { self.restore(); })
-         .def("clear_all", [](BLContext &self)
-              { self.clearAll(); })
-         .def("fill_all", [](BLContext &self)
-              { self.fillAll(); })
-         .def("flush", [](BLContext &self)
-              { self.flush(BL_CONTEXT_FLUSH_SYNC); })
-         .def("restore", [](BLContext &self)
-              { self.restore(); })
-         .def("save", [](BLContext &self)
-              { self.save(); })
-         .def("clip_to_rect", [](BLContext &self, const BLRect &rect)
-              { self.clipToRect(rect); }, nb::arg("rect"))
-         .def("restore_clipping", [](BLContext &self)
-              { self.restoreClipping(); })
-         .def("get_meta_transform", [](BLContext &self)
-              { return self.metaTransform(); })
-         .def("get_user_transform", [](BLContext &self)
-              { return self.userTransform(); })
-         .def("reset_transform", [](BLContext &self)
-              { self.resetTransform(); })
-         .def("rotate", [](BLContext &self, double angle)
-              { self.rotate(angle); }, nb::arg("angle"))
-         .def("rotate_around", [](BLContext &self, double angle, double x, double y)
+            return &self; }))
+         .def("__exit__", _locked([](BLContext &self, nb::object exc_type, nb::object exc_value, nb::object traceback)
+              {
+            self.restore();
+            _track_restore(self); }))
+         .def("clear_all", _native([](BLContext &self)
+              {
+            self.clearAll();
+            _record_clear(self);
+            _record_draw_all(self); }))
+         .def("fill_all", _native([](BLContext &self)
+              {
+            self.fillAll();
+            _record_draw_all(self); }))
+         .def("flush", _native([](BLContext &self, bool sync)
+              { _timed_flush(self, sync ? BL_CONTEXT_FLUSH_SYNC : BL_CONTEXT_FLUSH_NO_FLAGS); }), nb::arg("sync") = true)
+         .def("flush_async", [](nb::object self)
+              {
+            // The context must not be drawn to until the future is done
+            nb::object future = nb::module_::import_("concurrent.futures").attr("Future")();
+            future.attr("set_running_or_notify_cancel")();
+            FlushWorker::submit(self, future);
+            return future; })
+         .def_prop_ro("thread_count", _locked([](const BLContext &self)
+                      { return self.threadCount(); }))
+         .def_prop_ro("accumulated_error_flags", _locked([](const BLContext &self)
+                      { return uint32_t(self.accumulatedErrorFlags()); }))
+         .def_prop_rw("damage_tracking", _locked([](const BLContext &self)
+                      { return DamageTracker::of(self) != nullptr; }), _locked([](BLContext &self, bool enabled)
+                      { DamageTracker::setEnabled(self, enabled); }))
+         .def("damage_rects", _locked([](const BLContext &self)
+              { return _damage_tracker(self).rects(); }))
+         .def("clear_damage", _native([](BLContext &self)
+              { _damage_tracker(self).clear(self); }))
+         .def("reset_damage", _locked([](BLContext &self)
+              { _damage_tracker(self).reset(); }))
+         .def_prop_rw("collect_stats", _locked([](const BLContext &self)
+                      { return ContextStats::of(self) != nullptr; }), _locked([](BLContext &self, bool enabled)
+                      { ContextStats::setEnabled(self, enabled); }))
+         .def("stats", _locked([](const BLContext &self)
+              { return _context_stats(self).toDict(); }))
+         .def("reset_stats", _locked([](BLContext &self)
+              { _context_stats(self).reset(); }))
+         .def("restore", _locked([](BLContext &self)
+              {
+            self.restore();
+            _track_restore(self); }))
+         .def("save", _locked([](BLContext &self)
+              { self.save(); }))
+         .def("set_state", _locked([](BLContext &self, const ContextState &state)
+              {
+            object_lock lock(_object_mutex(state));
+            state.apply(self); }), nb::arg("state"))
+         .def("get_state", _locked([](const BLContext &self)
+              { return ContextState::capture(self); }))
+         .def("clip_to_rect", _native([](BLContext &self, const BLRect &rect)
+              {
+            self.clipToRect(rect);
+            _track_clip(self, rect); }), nb::arg("rect"))
+         .def("clip_to_rect", _native([](BLContext &self, double x, double y, double w, double h)
+              {
+            self.clipToRect(x, y, w, h);
+            _track_clip(self, BLRect(x, y, w, h)); }), nb::arg("x"), nb::arg("y"), nb::arg("w"), nb::arg("h"))
+         .def("restore_clipping", _locked([](BLContext &self)
+              {
+            self.restoreClipping();
+            _track_restore_clipping(self); }))
+         .def("get_meta_transform", _locked([](BLContext &self)
+              { return self.metaTransform(); }))
+         .def("get_user_transform", _locked([](BLContext &self)
+              { return self.userTransform(); }))
+         .def("reset_transform", _locked([](BLContext &self)
+              { self.resetTransform(); }))
+         .def("rotate", _locked([](BLContext &self, double angle)
+              { self.rotate(angle); }), nb::arg("angle"))
+         .def("rotate_around", _locked([](BLContext &self, double angle, double x, double y)
               { 
             // Use _applyTransformOp with BL_TRANSFORM_OP_ROTATE_PT
             double values[3] = { angle, x, y };
-            self._applyTransformOp(BL_TRANSFORM_OP_ROTATE_PT, values); }, nb::arg("angle"), nb::arg("x"), nb::arg("y"))
-         .def("scale", [](BLContext &self, double x, double y)
-              { self.scale(x, y); }, nb::arg("x"), nb::arg("y"))
-         .def("skew", [](BLContext &self, double x, double y)
-              { self.skew(x, y); }, nb::arg("x"), nb::arg("y"))
-         .def("transform", [](BLContext &self, const BLMatrix2D &matrix)
+            self._applyTransformOp(BL_TRANSFORM_OP_ROTATE_PT, values); }), nb::arg("angle"), nb::arg("x"), nb::arg("y"))
+         .def("scale", _locked([](BLContext &self, double x, double y)
+              { self.scale(x, y); }), nb::arg("x"), nb::arg("y"))
+         .def("skew", _locked([](BLContext &self, double x, double y)
+              { self.skew(x, y); }), nb::arg("x"), nb::arg("y"))
+         .def("transform", _locked([](BLContext &self, const BLMatrix2D &matrix)
               { 
             // Use setTransform instead of transform
-            self.setTransform(matrix); }, nb::arg("matrix"))
-         .def("translate", [](BLContext &self, double x, double y)
-              { self.translate(x, y); }, nb::arg("x"), nb::arg("y"))
-         .def("user_to_meta", [](BLContext &self)
-              { self.userToMeta(); })
-         .def_prop_rw("comp_op", [](const BLContext &self)
-                      { return self.compOp(); }, [](BLContext &self, BLCompOp op)
-                      { self.setCompOp(op); })
-         .def_prop_rw("global_alpha", [](const BLContext &self)
-                      { return self.globalAlpha(); }, [](BLContext &self, double alpha)
-                      { self.setGlobalAlpha(alpha); })
-         .def_prop_rw("fill_alpha", [](const BLContext &self)
-                      { return self.fillAlpha(); }, [](BLContext &self, double alpha)
-                      { self.setFillAlpha(alpha); })
-         .def_prop_rw("fill_rule", [](const BLContext &self)
-                      { return self.fillRule(); }, [](BLContext &self, BLFillRule rule)
-                      { self.setFillRule(rule); })
-         .def("set_fill_style", [](BLContext &self, const nb::tuple &color)
+            self.setTransform(matrix); }), nb::arg("matrix"))
+         .def("translate", _locked([](BLContext &self, double x, double y)
+              { self.translate(x, y); }), nb::arg("x"), nb::arg("y"))
+         .def("user_to_meta", _locked([](BLContext &self)
+              { self.userToMeta(); }))
+         .def_prop_rw("comp_op", _locked([](const BLContext &self)
+                      { return self.compOp(); }), _locked([](BLContext &self, BLCompOp op)
+                      { self.setCompOp(op); }))
+         .def_prop_rw("global_alpha", _locked([](const BLContext &self)
+                      { return self.globalAlpha(); }), _locked([](BLContext &self, double alpha)
+                      { self.setGlobalAlpha(alpha); }))
+         .def_prop_rw("fill_alpha", _locked([](const BLContext &self)
+                      { return self.fillAlpha(); }), _locked([](BLContext &self, double alpha)
+                      { self.setFillAlpha(alpha); }))
+         .def_prop_rw("fill_rule", _locked([](const BLContext &self)
+                      { return self.fillRule(); }), _locked([](BLContext &self, BLFillRule rule)
+                      { self.setFillRule(rule); }))
+         .def("set_fill_style", _locked([](BLContext &self, uint32_t rgba32)
+              { self.setFillStyle(BLRgba32(rgba32)); }), nb::arg("rgba32"))
+         .def("set_fill_style", _locked([](BLContext &self, const BLVar &style)
+              { self.setFillStyle(_copy_style(style)); }), nb::arg("style"))
+         .def("set_fill_style", _locked([](BLContext &self, const BLRgba32 &color)
+              { self.setFillStyle(color); }), nb::arg("color"))
+         .def("set_fill_style", _locked([](BLContext &self, const BLRgba &color)
+              { self.setFillStyle(color); }), nb::arg("color"))
+         .def("set_fill_style", _locked([](BLContext &self, const nb::tuple &color)
               {
             uint32_t packed = _get_rgba32_value(color);
-            self.setFillStyle(BLRgba32(packed)); }, nb::arg("color"))
-         .def("set_fill_style", [](BLContext &self, const BLGradient &gradient)
-              { self.setFillStyle(gradient); }, nb::arg("gradient"))
-         .def("set_fill_style", [](BLContext &self, const BLPattern &pattern)
-              { self.setFillStyle(pattern); }, nb::arg("pattern"))
-         .def_prop_rw("stroke_alpha", [](const BLContext &self)
-                      { return self.strokeAlpha(); }, [](BLContext &self, double alpha)
-                      { self.setStrokeAlpha(alpha); })
-         .def("set_stroke_style", [](BLContext &self, const nb::tuple &color)
+            self.setFillStyle(BLRgba32(packed)); }), nb::arg("color"))
+         .def("set_fill_style", _locked([](BLContext &self, const BLGradient &gradient)
+              { self.setFillStyle(gradient); }), nb::arg("gradient"))
+         .def("set_fill_style", _locked([](BLContext &self, const BLPattern &pattern)
+              { self.setFillStyle(pattern); }), nb::arg("pattern"))
+         .def_prop_rw("stroke_alpha", _locked([](const BLContext &self)
+                      { return self.strokeAlpha(); }), _locked([](BLContext &self, double alpha)
+                      { self.setStrokeAlpha(alpha); }))
+         .def("set_stroke_style", _locked([](BLContext &self, uint32_t rgba32)
+              { self.setStrokeStyle(BLRgba32(rgba32)); }), nb::arg("rgba32"))
+         .def("set_stroke_style", _locked([](BLContext &self, const BLVar &style)
+              { self.setStrokeStyle(_copy_style(style)); }), nb::arg("style"))
+         .def("set_stroke_style", _locked([](BLContext &self, const BLRgba32 &color)
+              { self.setStrokeStyle(color); }), nb::arg("color"))
+         .def("set_stroke_style", _locked([](BLContext &self, const BLRgba &color)
+              { self.setStrokeStyle(color); }), nb::arg("color"))
+         .def("set_stroke_style", _locked([](BLContext &self, const nb::tuple &color)
               {
             uint32_t packed = _get_rgba32_value(color);
-            self.setStrokeStyle(BLRgba32(packed)); }, nb::arg("color"))
-         .def("set_stroke_style", [](BLContext &self, const BLGradient &gradient)
-              { self.setStrokeStyle(gradient); }, nb::arg("gradient"))
-         .def("set_stroke_style", [](BLContext &self, const BLPattern &pattern)
-              { self.setStrokeStyle(pattern); }, nb::arg("pattern"))
-         .def_prop_rw("stroke_width", [](const BLContext &self)
-                      { return self.strokeWidth(); }, [](BLContext &self, double width)
-                      { self.setStrokeWidth(width); })
-         .def_prop_rw("stroke_miter_limit", [](const BLContext &self)
-                      { return self.strokeMiterLimit(); }, [](BLContext &self, double limit)
-                      { self.setStrokeMiterLimit(limit); })
-         .def("set_stroke_cap", [](BLContext &self, BLStrokeCapPosition position, BLStrokeCap cap)
-              { self.setStrokeCap(position, cap); }, nb::arg("position"), nb::arg("cap"))
-         .def("set_stroke_caps", [](BLContext &self, BLStrokeCap cap)
-              { self.setStrokeCaps(cap); }, nb::arg("cap"))
-         .def_prop_rw("stroke_join", [](const BLContext &self)
-                      { return self.strokeJoin(); }, [](BLContext &self, BLStrokeJoin join)
-                      { self.setStrokeJoin(join); })
-         .def_prop_rw("stroke_dash_offset", [](const BLContext &self)
-                      { return self.strokeDashOffset(); }, [](BLContext &self, double offset)
-                      { self.setStrokeDashOffset(offset); })
-         .def("set_stroke_dash_array", [](BLContext &self, const BLArray<double> &array)
-              { self.setStrokeDashArray(array); }, nb::arg("array"))
-         .def("clear_rect", [](BLContext &self, const BLRect &rect)
-              { self.clearRect(rect); }, nb::arg("rect"))
-         .def("fill_rect", [](BLContext &self, const BLRect &rect)
-              { self.fillRect(rect); }, nb::arg("rect"))
-         .def("stroke_rect", [](BLContext &self, const BLRect &rect)
-              { self.strokeRect(rect); }, nb::arg("rect"))
-         .def("fill_circle", [](BLContext &self, double cx, double cy, double r)
-              { self.fillCircle(cx, cy, r); }, nb::arg("cx"), nb::arg("cy"), nb::arg("r"))
-         .def("stroke_circle", [](BLContext &self, double cx, double cy, double r)
-              { self.strokeCircle(cx, cy, r); }, nb::arg("cx"), nb::arg("cy"), nb::arg("r"))
-         .def("fill_ellipse", [](BLContext &self, double cx, double cy, double rx, double ry)
-              { self.fillEllipse(cx, cy, rx, ry); }, nb::arg("cx"), nb::arg("cy"), nb::arg("rx"), nb::arg("ry"))
-         .def("stroke_ellipse", [](BLContext &self, double cx, double cy, double rx, double ry)
-              { self.strokeEllipse(cx, cy, rx, ry); }, nb::arg("cx"), nb::arg("cy"), nb::arg("rx"), nb::arg("ry"))
-         .def("fill_path", [](BLContext &self, const BLPath &path)
-              { self.fillPath(path); }, nb::arg("path"))
-         .def("stroke_path", [](BLContext &self, const BLPath &path)
-              { self.strokePath(path); }, nb::arg("path"))
-         .def("fill_text", [](BLContext &self, const BLPoint &pt, const BLFont &font, const std::string &text)
-              { self.fillUtf8Text(pt, font, text.c_str(), text.size()); }, nb::arg("pt"), nb::arg("font"), nb::arg("text"))
-         .def("stroke_text", [](BLContext &self, const BLPoint &pt, const BLFont &font, const std::string &text)
-              { self.strokeUtf8Text(pt, font, text.c_str(), text.size()); }, nb::arg("pt"), nb::arg("font"), nb::arg("text"))
-         .def("blit_image", [](BLContext &self, const BLPoint &pt, const BLImage &image)
-              { self.blitImage(pt, image); }, nb::arg("pt"), nb::arg("image"))
-         .def("blit_image", [](BLContext &self, const BLPoint &pt, const BLImage &image, const BLRectI &area)
-              { self.blitImage(pt, image, area); }, nb::arg("pt"), nb::arg("image"), nb::arg("area"))
-         .def("blit_image", [](BLContext &self, const BLRect &rect, const BLImage &image)
-              { self.blitImage(rect, image); }, nb::arg("rect"), nb::arg("image"))
-         .def("blit_image", [](BLContext &self, const BLRect &rect, const BLImage &image, const BLRectI &area)
-              { self.blitImage(rect, image, area); }, nb::arg("rect"), nb::arg("image"), nb::arg("area"));
+            self.setStrokeStyle(BLRgba32(packed)); }), nb::arg("color"))
+         .def("set_stroke_style", _locked([](BLContext &self, const BLGradient &gradient)
+              { self.setStrokeStyle(gradient); }), nb::arg("gradient"))
+         .def("set_stroke_style", _locked([](BLContext &self, const BLPattern &pattern)
+              { self.setStrokeStyle(pattern); }), nb::arg("pattern"))
+         .def_prop_rw("stroke_width", _locked([](const BLContext &self)
+                      { return self.strokeWidth(); }), _locked([](BLContext &self, double width)
+                      { self.setStrokeWidth(width); }))
+         .def_prop_rw("stroke_miter_limit", _locked([](const BLContext &self)
+                      { return self.strokeMiterLimit(); }), _locked([](BLContext &self, double limit)
+                      { self.setStrokeMiterLimit(limit); }))
+         .def("set_stroke_cap", _locked([](BLContext &self, BLStrokeCapPosition position, BLStrokeCap cap)
+              { self.setStrokeCap(position, cap); }), nb::arg("position"), nb::arg("cap"))
+         .def("set_stroke_caps", _locked([](BLContext &self, BLStrokeCap cap)
+              { self.setStrokeCaps(cap); }), nb::arg("cap"))
+         .def_prop_rw("stroke_join", _locked([](const BLContext &self)
+                      { return self.strokeJoin(); }), _locked([](BLContext &self, BLStrokeJoin join)
+                      { self.setStrokeJoin(join); }))
+         .def_prop_rw("stroke_dash_offset", _locked([](const BLContext &self)
+                      { return self.strokeDashOffset(); }), _locked([](BLContext &self, double offset)
+                      { self.setStrokeDashOffset(offset); }))
+         .def("set_stroke_dash_array", _locked([](BLContext &self, const BLArray<double> &array)
+              { self.setStrokeDashArray(array); }), nb::arg("array"))
+         .def("clear_rect", _native([](BLContext &self, const BLRect &rect)
+              {
+            self.clearRect(rect);
+            _record_clear(self);
+            _record_draw_fill(self, _rect_box(rect)); }), nb::arg("rect"))
+         .def("fill_rect", _native([](BLContext &self, const BLRect &rect)
+              {
+            self.fillRect(rect);
+            _record_draw_fill(self, _rect_box(rect)); }), nb::arg("rect"))
+         .def("fill_rect", _native([](BLContext &self, double x, double y, double w, double h)
+              {
+            self.fillRect(x, y, w, h);
+            _record_draw_fill(self, _rect_box(x, y, w, h)); }), nb::arg("x"), nb::arg("y"), nb::arg("w"), nb::arg("h"))
+         .def("fill_rect", _native([](BLContext &self, const BLRect &rect, const ContextState &state)
+              { _draw_with_state(self, state, [&]
+                                 {
+                self.fillRect(rect);
+                _record_draw_fill(self, _rect_box(rect)); }); }), nb::arg("rect"), nb::arg("state"))
+         .def("stroke_rect", _native([](BLContext &self, const BLRect &rect)
+              {
+            self.strokeRect(rect);
+            _record_draw_stroke(self, _rect_box(rect)); }), nb::arg("rect"))
+         .def("stroke_rect", _native([](BLContext &self, double x, double y, double w, double h)
+              {
+            self.strokeRect(x, y, w, h);
+            _record_draw_stroke(self, _rect_box(x, y, w, h)); }), nb::arg("x"), nb::arg("y"), nb::arg("w"), nb::arg("h"))
+         .def("stroke_rect", _native([](BLContext &self, const BLRect &rect, const ContextState &state)
+              { _draw_with_state(self, state, [&]
+                                 {
+                self.strokeRect(rect);
+                _record_draw_stroke(self, _rect_box(rect)); }); }), nb::arg("rect"), nb::arg("state"))
+         .def("fill_circle", _native([](BLContext &self, double cx, double cy, double r)
+              {
+            self.fillCircle(cx, cy, r);
+            _record_draw_fill(self, _circle_box(cx, cy, r, r)); }), nb::arg("cx"), nb::arg("cy"), nb::arg("r"))
+         .def("fill_circle", _native([](BLContext &self, double cx, double cy, double r, const ContextState &state)
+              { _draw_with_state(self, state, [&]
+                                 {
+                self.fillCircle(cx, cy, r);
+                _record_draw_fill(self, _circle_box(cx, cy, r, r)); }); }), nb::arg("cx"), nb::arg("cy"), nb::arg("r"), nb::arg("state"))
+         .def("stroke_circle", _native([](BLContext &self, double cx, double cy, double r)
+              {
+            self.strokeCircle(cx, cy, r);
+            _record_draw_stroke(self, _circle_box(cx, cy, r, r)); }), nb::arg("cx"), nb::arg("cy"), nb::arg("r"))
+         .def("stroke_circle", _native([](BLContext &self, double cx, double cy, double r, const ContextState &state)
+              { _draw_with_state(self, state, [&]
+                                 {
+                self.strokeCircle(cx, cy, r);
+                _record_draw_stroke(self, _circle_box(cx, cy, r, r)); }); }), nb::arg("cx"), nb::arg("cy"), nb::arg("r"), nb::arg("state"))
+         .def("fill_ellipse", _native([](BLContext &self, double cx, double cy, double rx, double ry)
+              {
+            self.fillEllipse(cx, cy, rx, ry);
+            _record_draw_fill(self, _circle_box(cx, cy, rx, ry)); }), nb::arg("cx"), nb::arg("cy"), nb::arg("rx"), nb::arg("ry"))
+         .def("stroke_ellipse", _native([](BLContext &self, double cx, double cy, double rx, double ry)
+              {
+            self.strokeEllipse(cx, cy, rx, ry);
+            _record_draw_stroke(self, _circle_box(cx, cy, rx, ry)); }), nb::arg("cx"), nb::arg("cy"), nb::arg("rx"), nb::arg("ry"))
+         .def("fill_rects", _locked([](BLContext &self, const BatchArray<4> &rects, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_fill(self, colors.has_value());
+            _draw_batch(rects, colors, [&](const double *v, const auto &...style)
+                        {
+                self.fillRect(v[0], v[1], v[2], v[3], style...);
+                if (damage)
+                    damage->addFill(self, _rect_box(v[0], v[1], v[2], v[3]));
+                if (stats)
+                    stats->add(self, ContextStats::Fill, _rect_box(v[0], v[1], v[2], v[3])); }); }), nb::arg("rects"), nb::arg("colors") = nb::none())
+         .def("stroke_rects", _locked([](BLContext &self, const BatchArray<4> &rects, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_stroke(self, colors.has_value());
+            _draw_batch(rects, colors, [&](const double *v, const auto &...style)
+                        {
+                self.strokeRect(v[0], v[1], v[2], v[3], style...);
+                if (damage)
+                    damage->addStroke(self, _rect_box(v[0], v[1], v[2], v[3]));
+                if (stats)
+                    stats->add(self, ContextStats::Stroke, _rect_box(v[0], v[1], v[2], v[3]), true); }); }), nb::arg("rects"), nb::arg("colors") = nb::none())
+         .def("fill_circles", _locked([](BLContext &self, const BatchArray<3> &circles, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_fill(self, colors.has_value());
+            _draw_batch(circles, colors, [&](const double *v, const auto &...style)
+                        {
+                self.fillCircle(v[0], v[1], v[2], style...);
+                if (damage)
+                    damage->addFill(self, _circle_box(v[0], v[1], v[2], v[2]));
+                if (stats)
+                    stats->add(self, ContextStats::Fill, _circle_box(v[0], v[1], v[2], v[2])); }); }), nb::arg("circles"), nb::arg("colors") = nb::none())
+         .def("stroke_circles", _locked([](BLContext &self, const BatchArray<3> &circles, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_stroke(self, colors.has_value());
+            _draw_batch(circles, colors, [&](const double *v, const auto &...style)
+                        {
+                self.strokeCircle(v[0], v[1], v[2], style...);
+                if (damage)
+                    damage->addStroke(self, _circle_box(v[0], v[1], v[2], v[2]));
+                if (stats)
+                    stats->add(self, ContextStats::Stroke, _circle_box(v[0], v[1], v[2], v[2]), true); }); }), nb::arg("circles"), nb::arg("colors") = nb::none())
+         .def("stroke_lines", _locked([](BLContext &self, const BatchArray<4> &lines, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_stroke(self, colors.has_value());
+            _draw_batch(lines, colors, [&](const double *v, const auto &...style)
+                        {
+                self.strokeLine(v[0], v[1], v[2], v[3], style...);
+                if (damage)
+                    damage->addStroke(self, _line_box(v[0], v[1], v[2], v[3]));
+                if (stats)
+                    stats->add(self, ContextStats::Stroke, _line_box(v[0], v[1], v[2], v[3]), true); }); }), nb::arg("lines"), nb::arg("colors") = nb::none())
+         .def("fill_path", _native([](BLContext &self, const BLPath &path)
+              {
+            self.fillPath(path);
+            _record_draw_fill(self, _path_box(path)); }), nb::arg("path"))
+         .def("fill_path", _native([](BLContext &self, const BLPath &path, const ContextState &state)
+              { _draw_with_state(self, state, [&]
+                                 {
+                self.fillPath(path);
+                _record_draw_fill(self, _path_box(path)); }); }), nb::arg("path"), nb::arg("state"))
+         .def("stroke_path", _native([](BLContext &self, const BLPath &path)
+              {
+            self.strokePath(path);
+            _record_draw_stroke(self, _path_box(path)); }), nb::arg("path"))
+         .def("stroke_path", _native([](BLContext &self, const BLPath &path, const ContextState &state)
+              { _draw_with_state(self, state, [&]
+                                 {
+                self.strokePath(path);
+                _record_draw_stroke(self, _path_box(path)); }); }), nb::arg("path"), nb::arg("state"))
+         .def("fill_path_instances", _locked([](BLContext &self, const BLPath &path, const BatchArray<2> &offsets, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_fill(self, colors.has_value());
+            BLBox box = _path_box(path);
+            _draw_batch(offsets, colors, [&](const double *v, const auto &...style)
+                        {
+                self.fillPath(BLPoint(v[0], v[1]), path, style...);
+                if (damage)
+                    damage->addFill(self, BLBox(box.x0 + v[0], box.y0 + v[1], box.x1 + v[0], box.y1 + v[1]));
+                if (stats)
+                    stats->add(self, ContextStats::Fill, BLBox(box.x0 + v[0], box.y0 + v[1], box.x1 + v[0], box.y1 + v[1])); }); }), nb::arg("path"), nb::arg("offsets"), nb::arg("colors") = nb::none())
+         .def("fill_path_instances", _locked([](BLContext &self, const BLPath &path, const BatchArray<6> &transforms, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_fill(self, colors.has_value());
+            BLBox box = _path_box(path);
+            _draw_transformed(self, transforms, colors, [&](const auto &...style)
+                              {
+                self.fillPath(path, style...);
+                if (damage)
+                    damage->addFill(self, box);
+                if (stats)
+                    stats->add(self, ContextStats::Fill, box); }); }), nb::arg("path"), nb::arg("transforms"), nb::arg("colors") = nb::none())
+         .def("stroke_path_instances", _locked([](BLContext &self, const BLPath &path, const BatchArray<2> &offsets, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_stroke(self, colors.has_value());
+            BLBox box = _path_box(path);
+            _draw_batch(offsets, colors, [&](const double *v, const auto &...style)
+                        {
+                self.strokePath(BLPoint(v[0], v[1]), path, style...);
+                if (damage)
+                    damage->addStroke(self, BLBox(box.x0 + v[0], box.y0 + v[1], box.x1 + v[0], box.y1 + v[1]));
+                if (stats)
+                    stats->add(self, ContextStats::Stroke, BLBox(box.x0 + v[0], box.y0 + v[1], box.x1 + v[0], box.y1 + v[1]), true); }); }), nb::arg("path"), nb::arg("offsets"), nb::arg("colors") = nb::none())
+         .def("stroke_path_instances", _locked([](BLContext &self, const BLPath &path, const BatchArray<6> &transforms, const std::optional<ColorArray> &colors)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_stroke(self, colors.has_value());
+            BLBox box = _path_box(path);
+            _draw_transformed(self, transforms, colors, [&](const auto &...style)
+                              {
+                self.strokePath(path, style...);
+                if (damage)
+                    damage->addStroke(self, box);
+                if (stats)
+                    stats->add(self, ContextStats::Stroke, box, true); }); }), nb::arg("path"), nb::arg("transforms"), nb::arg("colors") = nb::none())
+         // decimate="minmax" trades exact antialiasing for a path with a few
+         // vertices per 1/16 of a device pixel column, for signals far denser
+         // than that
+         .def("stroke_polyline", _locked([](BLContext &self, const SampleArray &xs, const SampleArray &ys, const std::optional<std::string> &decimate)
+              {
+            if (xs.shape(0) != ys.shape(0)) {
+                throw nb::value_error("xs and ys must have the same length");
+            }
+            bool minmax = decimate && *decimate == "minmax";
+            if (decimate && !minmax && *decimate != "none") {
+                throw nb::value_error("decimate must be 'minmax', 'none' or None");
+            }
+
+            native_section release;
+            BLPath path;
+            BLMatrix2D transform = self.finalTransform();
+            _append_polyline(path, xs.data(), ys.data(), xs.shape(0), minmax ? &transform : nullptr);
+            self.strokePath(path);
+            _record_draw_stroke(self, _path_box(path)); }), nb::arg("xs"), nb::arg("ys"), nb::arg("decimate").none() = nb::none())
+         .def("fill_text", _native([](BLContext &self, const BLPoint &pt, const BLFont &font, const std::string &text)
+              {
+            self.fillUtf8Text(pt, font, text.c_str(), text.size());
+            _record_draw_text(self, pt, font, text, false); }), nb::arg("pt"), nb::arg("font"), nb::arg("text"))
+         .def("fill_text", _native([](BLContext &self, double x, double y, const BLFont &font, const std::string &text)
+              {
+            self.fillUtf8Text(BLPoint(x, y), font, text.c_str(), text.size());
+            _record_draw_text(self, BLPoint(x, y), font, text, false); }), nb::arg("x"), nb::arg("y"), nb::arg("font"), nb::arg("text"))
+         .def("stroke_text", _native([](BLContext &self, const BLPoint &pt, const BLFont &font, const std::string &text)
+              {
+            self.strokeUtf8Text(pt, font, text.c_str(), text.size());
+            _record_draw_text(self, pt, font, text, true); }), nb::arg("pt"), nb::arg("font"), nb::arg("text"))
+         .def("stroke_text", _native([](BLContext &self, double x, double y, const BLFont &font, const std::string &text)
+              {
+            self.strokeUtf8Text(BLPoint(x, y), font, text.c_str(), text.size());
+            _record_draw_text(self, BLPoint(x, y), font, text, true); }), nb::arg("x"), nb::arg("y"), nb::arg("font"), nb::arg("text"))
+         .def("fill_glyph_run", _native([](BLContext &self, const BLPoint &pt, const ShapedText &shaped)
+              {
+            self.fillGlyphRun(pt, shaped.font, shaped.glyphRun());
+            _record_draw_glyphs(self, pt, shaped.font, shaped.metrics, shaped.glyphBuffer.size(), false); }), nb::arg("pt"), nb::arg("shaped"))
+         .def("fill_glyph_run", _native([](BLContext &self, double x, double y, const ShapedText &shaped)
+              {
+            self.fillGlyphRun(BLPoint(x, y), shaped.font, shaped.glyphRun());
+            _record_draw_glyphs(self, BLPoint(x, y), shaped.font, shaped.metrics, shaped.glyphBuffer.size(), false); }), nb::arg("x"), nb::arg("y"), nb::arg("shaped"))
+         .def("stroke_glyph_run", _native([](BLContext &self, const BLPoint &pt, const ShapedText &shaped)
+              {
+            self.strokeGlyphRun(pt, shaped.font, shaped.glyphRun());
+            _record_draw_glyphs(self, pt, shaped.font, shaped.metrics, shaped.glyphBuffer.size(), true); }), nb::arg("pt"), nb::arg("shaped"))
+         .def("stroke_glyph_run", _native([](BLContext &self, double x, double y, const ShapedText &shaped)
+              {
+            self.strokeGlyphRun(BLPoint(x, y), shaped.font, shaped.glyphRun());
+            _record_draw_glyphs(self, BLPoint(x, y), shaped.font, shaped.metrics, shaped.glyphBuffer.size(), true); }), nb::arg("x"), nb::arg("y"), nb::arg("shaped"))
+         .def("replay", _native([](BLContext &self, const DisplayList &displayList, const std::optional<BLMatrix2D> &matrix)
+              {
+            // The cookie keeps unbalanced restore() calls in the list from
+            // popping the caller's saved states
+            BLContextCookie cookie;
+            self.save(cookie);
+            if (matrix)
+                self.applyTransform(*matrix);
+            // Make the current transform the list's origin, so that a recorded
+            // reset_transform() or transform() stays relative to it
+            self.userToMeta();
+            {
+                std::lock_guard<std::mutex> lock(displayList.mutex);
+                displayList.replay(self, DamageTracker::of(self), ContextStats::of(self));
+            }
+            self.restore(cookie);
+            _track_restore(self); }), nb::arg("display_list"), nb::arg("matrix") = nb::none())
+         .def("blit_image", _native([](BLContext &self, const BLPoint &pt, const BLImage &image)
+              {
+            self.blitImage(pt, image);
+            _record_draw_image(self, pt, image); }), nb::arg("pt"), nb::arg("image"))
+         .def("blit_image", _native([](BLContext &self, double x, double y, const BLImage &image)
+              {
+            self.blitImage(BLPoint(x, y), image);
+            _record_draw_image(self, BLPoint(x, y), image); }), nb::arg("x"), nb::arg("y"), nb::arg("image"))
+         .def("blit_image", _native([](BLContext &self, const BLPoint &pt, const BLImage &image, const BLRectI &area)
+              {
+            self.blitImage(pt, image, area);
+            _record_draw_image(self, pt, image, &area); }), nb::arg("pt"), nb::arg("image"), nb::arg("area"))
+         .def("blit_image", _native([](BLContext &self, const BLRect &rect, const BLImage &image)
+              {
+            self.blitImage(rect, image);
+            _record_draw_blit(self, _rect_box(rect)); }), nb::arg("rect"), nb::arg("image"))
+         .def("blit_image", _native([](BLContext &self, const BLRect &rect, const BLImage &image, const BLRectI &area)
+              {
+            self.blitImage(rect, image, area);
+            _record_draw_blit(self, _rect_box(rect)); }), nb::arg("rect"), nb::arg("image"), nb::arg("area"))
+         .def("blit_batch", _locked([](BLContext &self, const BLImage &atlas, const AreaArray &src_rects, const BatchArray<2> &dst_points, const std::optional<AlphaArray> &alphas)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_blit(self);
+            _blit_batch(self, src_rects, dst_points, alphas, [&](const double *v, const BLRectI &area)
+                        {
+                self.blitImage(BLPoint(v[0], v[1]), atlas, area);
+                _record_draw_image(self, damage, stats, BLPoint(v[0], v[1]), atlas, &area); }); }), nb::arg("atlas"), nb::arg("src_rects"), nb::arg("dst_points"), nb::arg("alphas") = nb::none())
+         .def("blit_batch", _locked([](BLContext &self, const BLImage &atlas, const AreaArray &src_rects, const BatchArray<4> &dst_rects, const std::optional<AlphaArray> &alphas)
+              {
+            DamageTracker *damage = DamageTracker::of(self);
+            ContextStats *stats = ContextStats::of(self);
+            _record_blit(self);
+            _blit_batch(self, src_rects, dst_rects, alphas, [&](const double *v, const BLRectI &area)
+                        {
+                self.blitImage(BLRect(v[0], v[1], v[2], v[3]), atlas, area);
+                _record_draw_blit(self, damage, stats, _rect_box(v[0], v[1], v[2], v[3])); }); }), nb::arg("atlas"), nb::arg("src_rects"), nb::arg("dst_rects"), nb::arg("alphas") = nb::none())
+         .def("fill_mask", _native([](BLContext &self, const BLPoint &origin, const MaskArray &mask)
+              {
+            BLImage image = _image_from_array(mask, BL_FORMAT_A8);
+            self.fillMask(origin, image);
+            _record_draw_mask(self, origin, image); }), nb::arg("origin"), nb::arg("mask"))
+         .def("fill_mask", _native([](BLContext &self, const BLPoint &origin, const BLImage &mask)
+              {
+            self.fillMask(origin, mask);
+            _record_draw_mask(self, origin, mask); }), nb::arg("origin"), nb::arg("mask"))
+         .def("blit_array", _native([](BLContext &self, const BLPoint &origin, const PixelArray &pixels, bool premultiplied)
+              {
+            BLImage image = premultiplied ? _image_from_array(pixels, BL_FORMAT_PRGB32) : _premultiplied_image(pixels);
+            self.blitImage(origin, image);
+            _record_draw_image(self, origin, image); }), nb::arg("origin"), nb::arg("pixels"), nb::arg("premultiplied") = true)
+         .def("blit_array", _native([](BLContext &self, const BLRect &rect, const PixelArray &pixels, bool premultiplied)
+              {
+            BLImage image = premultiplied ? _image_from_array(pixels, BL_FORMAT_PRGB32) : _premultiplied_image(pixels);
+            self.blitImage(rect, image);
+            _record_draw_blit(self, _rect_box(rect)); }), nb::arg("rect"), nb::arg("pixels"), nb::arg("premultiplied") = true);
+
+     // Applies to contexts created afterwards without their own cpu_features
+     m.def("set_cpu_features", [](std::optional<BLRuntimeCpuFeatures> features)
+           {
+          std::lock_guard<std::mutex> lock(cpuFeaturesMutex);
+          globalCpuFeatures = features; }, nb::arg("features").none());
+     m.def("get_cpu_features", []()
+           {
+          std::lock_guard<std::mutex> lock(cpuFeaturesMutex);
+          return globalCpuFeatures; });
+
+     // The flush thread must not touch the interpreter once it is finalizing
+     nb::module_::import_("atexit").attr("register")(nb::cpp_function([]()
+                                                                      { FlushWorker::shutdown(); }, release_gil()));
 }
\ No newline at end of file
@@ -0,0 +1,112 @@
+#include "nanobind_common.h"
+#include "nanobind_damage.h"
+#include "nanobind_stats.h"
+
+#include <algorithm>
+#include <stdexcept>
+
+// Keeps a live context for each target image between frames.
+//
+// Blend2D builds a new rendering context on every begin(), so alternating
+// between buffers is cheapest when each buffer keeps its own context. The
+// pool hands it back with the state it had right after creation, the same
+// as a freshly constructed context.
+//
+// Entries are keyed by the image's impl. The pool holds no reference to the
+// image, which would make Blend2D copy it on begin() and render into the
+// copy. An attached context keeps the impl from being freed, so a key that
+// still matches the context's target is the same image.
+class ContextPool
+{
+public:
+    struct Entry
+    {
+        const void *image;
+        nb::object context;
+        BLContextCookie cookie;
+        uint64_t lastUse;
+    };
+
+    uint32_t threadCount;
+    uint32_t commandQueueLimit;
+    BLContextCreateFlags flags;
+    uint32_t savedStateLimit;
+    size_t capacity;
+    std::vector<Entry> entries;
+    uint64_t clock = 0;
+    // Held for every call, so threads can share a pool
+    mutable std::mutex mutex;
+
+    ContextPool(size_t capacity, uint32_t threadCount, uint32_t commandQueueLimit, BLContextCreateFlags flags, uint32_t savedStateLimit)
+        : threadCount(threadCount), commandQueueLimit(commandQueueLimit), flags(flags), savedStateLimit(savedStateLimit), capacity(capacity)
+    {
+        if (capacity == 0) {
+            throw nb::value_error("capacity must be at least 1");
+        }
+    }
+
+    nb::object acquire(nb::handle_t<BLImage> image)
+    {
+        const void *key = nb::cast<const BLImage &>(image)._impl();
+        auto it = std::find_if(entries.begin(), entries.end(), [&](const Entry &entry)
+                               { return entry.image == key; });
+        if (it != entries.end()) {
+            BLContext &ctx = nb::cast<BLContext &>(it->context);
+            {
+                object_lock lock(_context_mutex(ctx));
+                if (ctx.isValid() && ctx.targetImage()->_impl() == key) {
+                    // Drops whatever the last user left on the state stack
+                    ctx.restore(it->cookie);
+                    _track_restore(ctx);
+                    ctx.save(it->cookie);
+                    it->lastUse = ++clock;
+                    return it->context;
+                }
+            }
+            // Ended or retargeted by its user, replace it
+            entries.erase(it);
+        }
+
+        if (entries.size() >= capacity) {
+            // Contexts still referenced from Python stay usable, the pool just
+            // stops handing them out
+            entries.erase(std::min_element(entries.begin(), entries.end(), [](const Entry &a, const Entry &b)
+                                           { return a.lastUse < b.lastUse; }));
+        }
+
+        nb::object context = nb::type<BLContext>()(image, "thread_count"_a = threadCount, "command_queue_limit"_a = commandQueueLimit,
+                                                   "flags"_a = flags, "saved_state_limit"_a = savedStateLimit);
+        // Passing the caller's object lets the context draw into its pixels
+        BLContext &ctx = nb::cast<BLContext &>(context);
+        object_lock lock(_context_mutex(ctx));
+        Entry entry{ctx.targetImage()->_impl(), context, BLContextCookie(), ++clock};
+        ctx.save(entry.cookie);
+        entries.push_back(std::move(entry));
+        return context;
+    }
+};
+
+inline std::mutex &_object_mutex(const ContextPool &pool) { return pool.mutex; }
+
+void register_context_pool(nb::module_ &m)
+{
+     nb::class_<ContextPool>(m, "ContextPool")
+         .def(nb::init<size_t, uint32_t, uint32_t, BLContextCreateFlags, uint32_t>(), nb::arg("capacity") = 4, nb::arg("thread_count") = 0,
+              nb::arg("command_queue_limit") = 0, nb::arg("flags") = BL_CONTEXT_CREATE_NO_FLAGS, nb::arg("saved_state_limit") = 0)
+         .def("acquire", _locked([](ContextPool &self, nb::handle_t<BLImage> image)
+              { return self.acquire(image); }), nb::arg("image"))
+         .def("release", [](ContextPool &self, BLContext &context)
+              {
+            // Finish rendering so the image can be read or displayed
+            native_section release;
+            std::lock_guard<std::mutex> lock(_context_mutex(context));
+            _timed_flush(context, BL_CONTEXT_FLUSH_SYNC); }, nb::arg("context"))
+         .def("clear", _locked([](ContextPool &self)
+              { self.entries.clear(); }))
+         .def("__len__", _locked([](const ContextPool &self)
+              { return self.entries.size(); }))
+         .def_prop_ro("capacity", [](const ContextPool &self)
+                      { return self.capacity; })
+         .def_prop_ro("thread_count", [](const ContextPool &self)
+                      { return self.threadCount; });
+}
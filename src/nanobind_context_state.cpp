@@ -0,0 +1,88 @@
+#include "nanobind_context_state.h"
+
+using Field = ContextState::Field;
+
+// Python-side style values are converted once, when they are assigned
+static void _set_style(ContextState &self, Field field, BLVar &member, nb::handle value)
+{
+    if (value.is_none()) {
+        self.fields &= ~uint32_t(field);
+    }
+    else {
+        member = _style_from_object(value);
+        self.fields |= field;
+    }
+}
+
+void register_context_state(nb::module_ &m)
+{
+     nb::class_<ContextState>(m, "ContextState")
+         .def("__init__", [](ContextState *self, nb::handle fill_style, nb::handle stroke_style,
+                             std::optional<double> stroke_width, std::optional<double> stroke_miter_limit,
+                             std::optional<BLStrokeJoin> stroke_join, std::optional<BLStrokeCap> stroke_caps,
+                             std::optional<BLCompOp> comp_op, std::optional<double> global_alpha,
+                             std::optional<double> fill_alpha, std::optional<double> stroke_alpha,
+                             std::optional<BLFillRule> fill_rule)
+              {
+            new (self) ContextState();
+            _set_style(*self, ContextState::kFillStyle, self->fillStyle, fill_style);
+            _set_style(*self, ContextState::kStrokeStyle, self->strokeStyle, stroke_style);
+            self->set(ContextState::kStrokeWidth, self->strokeWidth, stroke_width);
+            self->set(ContextState::kStrokeMiterLimit, self->strokeMiterLimit, stroke_miter_limit);
+            self->set(ContextState::kStrokeJoin, self->strokeJoin, stroke_join);
+            self->set(ContextState::kStrokeStartCap, self->strokeStartCap, stroke_caps);
+            self->set(ContextState::kStrokeEndCap, self->strokeEndCap, stroke_caps);
+            self->set(ContextState::kCompOp, self->compOp, comp_op);
+            self->set(ContextState::kGlobalAlpha, self->globalAlpha, global_alpha);
+            self->set(ContextState::kFillAlpha, self->fillAlpha, fill_alpha);
+            self->set(ContextState::kStrokeAlpha, self->strokeAlpha, stroke_alpha);
+            self->set(ContextState::kFillRule, self->fillRule, fill_rule); },
+              nb::arg("fill_style") = nb::none(), nb::arg("stroke_style") = nb::none(),
+              nb::arg("stroke_width") = nb::none(), nb::arg("stroke_miter_limit") = nb::none(),
+              nb::arg("stroke_join") = nb::none(), nb::arg("stroke_caps") = nb::none(),
+              nb::arg("comp_op") = nb::none(), nb::arg("global_alpha") = nb::none(),
+              nb::arg("fill_alpha") = nb::none(), nb::arg("stroke_alpha") = nb::none(),
+              nb::arg("fill_rule") = nb::none())
+         .def("copy", _locked([](const ContextState &self)
+              { return ContextState(self); }))
+         .def_prop_rw("fill_style", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kFillStyle, self.fillStyle); }), _locked([](ContextState &self, nb::handle value)
+                      { _set_style(self, ContextState::kFillStyle, self.fillStyle, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_style", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeStyle, self.strokeStyle); }), _locked([](ContextState &self, nb::handle value)
+                      { _set_style(self, ContextState::kStrokeStyle, self.strokeStyle, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_width", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeWidth, self.strokeWidth); }), _locked([](ContextState &self, std::optional<double> value)
+                      { self.set(ContextState::kStrokeWidth, self.strokeWidth, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_miter_limit", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeMiterLimit, self.strokeMiterLimit); }), _locked([](ContextState &self, std::optional<double> value)
+                      { self.set(ContextState::kStrokeMiterLimit, self.strokeMiterLimit, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_join", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeJoin, self.strokeJoin); }), _locked([](ContextState &self, std::optional<BLStrokeJoin> value)
+                      { self.set(ContextState::kStrokeJoin, self.strokeJoin, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_start_cap", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeStartCap, self.strokeStartCap); }), _locked([](ContextState &self, std::optional<BLStrokeCap> value)
+                      { self.set(ContextState::kStrokeStartCap, self.strokeStartCap, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_end_cap", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeEndCap, self.strokeEndCap); }), _locked([](ContextState &self, std::optional<BLStrokeCap> value)
+                      { self.set(ContextState::kStrokeEndCap, self.strokeEndCap, value); }), nb::for_setter(nb::arg("value").none()))
+         .def("set_stroke_caps", _locked([](ContextState &self, std::optional<BLStrokeCap> cap)
+              {
+            self.set(ContextState::kStrokeStartCap, self.strokeStartCap, cap);
+            self.set(ContextState::kStrokeEndCap, self.strokeEndCap, cap); }), nb::arg("cap").none())
+         .def_prop_rw("comp_op", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kCompOp, self.compOp); }), _locked([](ContextState &self, std::optional<BLCompOp> value)
+                      { self.set(ContextState::kCompOp, self.compOp, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("global_alpha", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kGlobalAlpha, self.globalAlpha); }), _locked([](ContextState &self, std::optional<double> value)
+                      { self.set(ContextState::kGlobalAlpha, self.globalAlpha, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("fill_alpha", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kFillAlpha, self.fillAlpha); }), _locked([](ContextState &self, std::optional<double> value)
+                      { self.set(ContextState::kFillAlpha, self.fillAlpha, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("stroke_alpha", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kStrokeAlpha, self.strokeAlpha); }), _locked([](ContextState &self, std::optional<double> value)
+                      { self.set(ContextState::kStrokeAlpha, self.strokeAlpha, value); }), nb::for_setter(nb::arg("value").none()))
+         .def_prop_rw("fill_rule", _locked([](const ContextState &self)
+                      { return self.get(ContextState::kFillRule, self.fillRule); }), _locked([](ContextState &self, std::optional<BLFillRule> value)
+                      { self.set(ContextState::kFillRule, self.fillRule, value); }), nb::for_setter(nb::arg("value").none()));
+}
@@ -0,0 +1,129 @@
+#pragma once
+
+#include "nanobind_common.h"
+
+// A bundle of BLContext state applied with a single call. Only the fields
+// that were set are applied, everything else on the context is left alone.
+struct ContextState
+{
+    enum Field : uint32_t
+    {
+        kFillStyle = 1u << 0,
+        kStrokeStyle = 1u << 1,
+        kStrokeWidth = 1u << 2,
+        kStrokeMiterLimit = 1u << 3,
+        kStrokeJoin = 1u << 4,
+        kStrokeStartCap = 1u << 5,
+        kStrokeEndCap = 1u << 6,
+        kCompOp = 1u << 7,
+        kGlobalAlpha = 1u << 8,
+        kFillAlpha = 1u << 9,
+        kStrokeAlpha = 1u << 10,
+        kFillRule = 1u << 11,
+        kAll = (1u << 12) - 1
+    };
+
+    uint32_t fields = 0;
+    BLVar fillStyle;
+    BLVar strokeStyle;
+    double strokeWidth = 1.0;
+    double strokeMiterLimit = 4.0;
+    BLStrokeJoin strokeJoin = BL_STROKE_JOIN_MITER_CLIP;
+    BLStrokeCap strokeStartCap = BL_STROKE_CAP_BUTT;
+    BLStrokeCap strokeEndCap = BL_STROKE_CAP_BUTT;
+    BLCompOp compOp = BL_COMP_OP_SRC_OVER;
+    double globalAlpha = 1.0;
+    double fillAlpha = 1.0;
+    double strokeAlpha = 1.0;
+    BLFillRule fillRule = BL_FILL_RULE_NON_ZERO;
+
+    // Python threads may share a state, so its fields are read and written
+    // under this lock. A copy gets a lock of its own, the caller holds the
+    // lock of the state it copies.
+    struct Mutex : std::mutex
+    {
+        Mutex() = default;
+        Mutex(const Mutex &) {}
+    };
+    mutable Mutex mutex;
+
+    bool has(Field field) const { return (fields & field) != 0; }
+
+    // Stores `value` into `member` and marks the field as set, or clears it
+    template <typename T, typename V>
+    void set(Field field, T &member, const std::optional<V> &value)
+    {
+        if (value) {
+            member = T(*value);
+            fields |= field;
+        }
+        else {
+            fields &= ~uint32_t(field);
+        }
+    }
+
+    template <typename T>
+    std::optional<T> get(Field field, const T &member) const
+    {
+        return has(field) ? std::optional<T>(member) : std::nullopt;
+    }
+
+    void apply(BLContext &ctx) const
+    {
+        if (has(kFillStyle)) ctx.setFillStyle(fillStyle);
+        if (has(kStrokeStyle)) ctx.setStrokeStyle(strokeStyle);
+        if (has(kStrokeWidth)) ctx.setStrokeWidth(strokeWidth);
+        if (has(kStrokeMiterLimit)) ctx.setStrokeMiterLimit(strokeMiterLimit);
+        if (has(kStrokeJoin)) ctx.setStrokeJoin(strokeJoin);
+        if (has(kStrokeStartCap)) ctx.setStrokeCap(BL_STROKE_CAP_POSITION_START, strokeStartCap);
+        if (has(kStrokeEndCap)) ctx.setStrokeCap(BL_STROKE_CAP_POSITION_END, strokeEndCap);
+        if (has(kCompOp)) ctx.setCompOp(compOp);
+        if (has(kGlobalAlpha)) ctx.setGlobalAlpha(globalAlpha);
+        if (has(kFillAlpha)) ctx.setFillAlpha(fillAlpha);
+        if (has(kStrokeAlpha)) ctx.setStrokeAlpha(strokeAlpha);
+        if (has(kFillRule)) ctx.setFillRule(fillRule);
+    }
+
+    // Snapshot of every field of the context's current state
+    static ContextState capture(const BLContext &ctx)
+    {
+        ContextState state;
+        state.fields = kAll;
+        ctx.getFillStyle(state.fillStyle);
+        ctx.getStrokeStyle(state.strokeStyle);
+        state.strokeWidth = ctx.strokeWidth();
+        state.strokeMiterLimit = ctx.strokeMiterLimit();
+        state.strokeJoin = ctx.strokeJoin();
+        state.strokeStartCap = ctx.strokeStartCap();
+        state.strokeEndCap = ctx.strokeEndCap();
+        state.compOp = ctx.compOp();
+        state.globalAlpha = ctx.globalAlpha();
+        state.fillAlpha = ctx.fillAlpha();
+        state.strokeAlpha = ctx.strokeAlpha();
+        state.fillRule = ctx.fillRule();
+        return state;
+    }
+};
+
+inline std::mutex &_object_mutex(const ContextState &state) { return state.mutex; }
+
+// Copies a state under its lock. For attached threads.
+static ContextState _copy_state(const ContextState &state)
+{
+    object_lock lock(_object_mutex(state));
+    return ContextState(state);
+}
+
+// Draws with `state` applied on top of the current state, then puts the
+// context back the way it was. For detached threads.
+template <typename DrawFn>
+static void _draw_with_state(BLContext &ctx, const ContextState &state, DrawFn &&draw)
+{
+    ctx.save();
+    {
+        std::lock_guard<std::mutex> lock(_object_mutex(state));
+        state.apply(ctx);
+    }
+    draw();
+    ctx.restore();
+}
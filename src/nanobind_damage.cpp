@@ -0,0 +1,227 @@
+#include "nanobind_damage.h"
+#include "nanobind_stats.h"
+
+#include <algorithm>
+#include <atomic>
+#include <cmath>
+#include <cstring>
+#include <mutex>
+#include <unordered_map>
+
+// Trackers live outside of BLContext, keyed by the context object. Drawing
+// calls run without the GIL, so the table is guarded by a mutex; the counter
+// keeps the lookup free for the common case of no tracked contexts at all.
+static std::mutex trackersMutex;
+static std::unordered_map<const BLContext *, DamageTracker> trackers;
+static std::atomic<size_t> trackerCount{0};
+
+DamageTracker *DamageTracker::of(const BLContext &ctx)
+{
+    if (trackerCount.load(std::memory_order_relaxed) == 0)
+        return nullptr;
+
+    std::lock_guard<std::mutex> lock(trackersMutex);
+    auto it = trackers.find(&ctx);
+    return it != trackers.end() ? &it->second : nullptr;
+}
+
+void DamageTracker::setEnabled(const BLContext &ctx, bool enabled)
+{
+    std::lock_guard<std::mutex> lock(trackersMutex);
+    if (enabled)
+        trackers.try_emplace(&ctx);
+    else
+        trackers.erase(&ctx);
+    trackerCount.store(trackers.size(), std::memory_order_relaxed);
+}
+
+static int64_t _area(const BLRectI &rect) { return int64_t(rect.w) * rect.h; }
+
+static BLRectI _union(const BLRectI &a, const BLRectI &b)
+{
+    int x0 = std::min(a.x, b.x);
+    int y0 = std::min(a.y, b.y);
+    int x1 = std::max(a.x + a.w, b.x + b.w);
+    int y1 = std::max(a.y + a.h, b.y + b.h);
+    return BLRectI(x0, y0, x1 - x0, y1 - y0);
+}
+
+// Overlapping or edge-adjacent
+static bool _touches(const BLRectI &a, const BLRectI &b)
+{
+    return a.x <= b.x + b.w && b.x <= a.x + a.w && a.y <= b.y + b.h && b.y <= a.y + a.h;
+}
+
+void DamageTracker::merge(std::vector<BLRectI> &rects, BLRectI rect)
+{
+    for (;;)
+    {
+        auto it = std::find_if(rects.begin(), rects.end(), [&](const BLRectI &other)
+                               { return _touches(rect, other); });
+        if (it == rects.end() && rects.size() >= kMaxRects)
+        {
+            // Out of slots, grow whichever rect gets the least bigger
+            it = std::min_element(rects.begin(), rects.end(), [&](const BLRectI &a, const BLRectI &b)
+                                  { return _area(_union(rect, a)) - _area(a) < _area(_union(rect, b)) - _area(b); });
+        }
+        if (it == rects.end())
+            break;
+
+        rect = _union(rect, *it);
+        *it = rects.back();
+        rects.pop_back();
+    }
+    rects.push_back(rect);
+}
+
+void DamageTracker::addDeviceBox(const BLContext &ctx, const BLBox &box)
+{
+    if (!(box.x0 <= box.x1 && box.y0 <= box.y1))
+        return;
+
+    // One extra pixel on every side for anti-aliasing, nothing outside of
+    // the clip or the target
+    syncClip(ctx);
+    BLSize size = ctx.targetSize();
+    double x0 = std::max({std::floor(box.x0) - 1.0, std::floor(clip.x0), 0.0});
+    double y0 = std::max({std::floor(box.y0) - 1.0, std::floor(clip.y0), 0.0});
+    double x1 = std::min({std::ceil(box.x1) + 1.0, std::ceil(clip.x1), size.w});
+    double y1 = std::min({std::ceil(box.y1) + 1.0, std::ceil(clip.y1), size.h});
+    if (x0 >= x1 || y0 >= y1)
+        return;
+
+    merge(drawn, BLRectI(int(x0), int(y0), int(x1 - x0), int(y1 - y0)));
+}
+
+BLBox _device_box(const BLContext &ctx, BLBox box, bool stroke)
+{
+    if (!(box.x0 <= box.x1 && box.y0 <= box.y1))
+        return box;
+
+    // Miter joins can reach miterLimit * width / 2 out, square caps sqrt(2) * width / 2
+    double inflate = 0.0;
+    if (stroke)
+    {
+        double factor = std::sqrt(2.0);
+        if (ctx.strokeJoin() == BL_STROKE_JOIN_MITER_CLIP || ctx.strokeJoin() == BL_STROKE_JOIN_MITER_BEVEL || ctx.strokeJoin() == BL_STROKE_JOIN_MITER_ROUND)
+            factor = std::max(factor, ctx.strokeMiterLimit());
+        inflate = ctx.strokeWidth() * 0.5 * factor;
+    }
+
+    bool inflateInDeviceSpace = ctx.strokeTransformOrder() == BL_STROKE_TRANSFORM_ORDER_BEFORE;
+    if (!inflateInDeviceSpace)
+        box = BLBox(box.x0 - inflate, box.y0 - inflate, box.x1 + inflate, box.y1 + inflate);
+
+    const BLMatrix2D &m = ctx.finalTransform();
+    BLPoint corners[4] = {m.mapPoint(box.x0, box.y0), m.mapPoint(box.x1, box.y0), m.mapPoint(box.x0, box.y1), m.mapPoint(box.x1, box.y1)};
+    BLBox device(corners[0].x, corners[0].y, corners[0].x, corners[0].y);
+    for (const BLPoint &p : corners)
+    {
+        device.x0 = std::min(device.x0, p.x);
+        device.y0 = std::min(device.y0, p.y);
+        device.x1 = std::max(device.x1, p.x);
+        device.y1 = std::max(device.y1, p.y);
+    }
+
+    if (inflateInDeviceSpace)
+        device = BLBox(device.x0 - inflate, device.y0 - inflate, device.x1 + inflate, device.y1 + inflate);
+
+    return device;
+}
+
+void DamageTracker::addUserBox(const BLContext &ctx, BLBox box, bool stroke)
+{
+    addDeviceBox(ctx, _device_box(ctx, box, stroke));
+}
+
+void DamageTracker::addText(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const std::string &text, bool stroke)
+{
+    BLGlyphBuffer gb;
+    gb.setText(text.c_str(), text.size(), BL_TEXT_ENCODING_UTF8);
+    font.shape(gb);
+
+    BLTextMetrics tm;
+    font.getTextMetrics(gb, tm);
+    addTextMetrics(ctx, pt, font, tm, stroke);
+}
+
+void DamageTracker::addTextMetrics(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const BLTextMetrics &tm, bool stroke)
+{
+    addUserBox(ctx, _text_box(pt, font, tm), stroke);
+}
+
+void DamageTracker::addImage(const BLContext &ctx, const BLPoint &pt, const BLImage &image, const BLRectI *area)
+{
+    addUserBox(ctx, _image_box(pt, image, area), false);
+}
+
+void DamageTracker::addAll(const BLContext &ctx)
+{
+    syncClip(ctx);
+    BLSize size = ctx.targetSize();
+    if (clip.x0 <= 0 && clip.y0 <= 0 && clip.x1 >= size.w && clip.y1 >= size.h)
+        drawn.clear();
+    addDeviceBox(ctx, BLBox(0, 0, size.w, size.h));
+}
+
+void DamageTracker::clipToRect(const BLContext &ctx, const BLRect &rect)
+{
+    // Blend2D clips to the device bounds of the rect too
+    syncClip(ctx);
+    BLBox device = _device_box(ctx, _rect_box(rect), false);
+    clip = BLBox(std::max(clip.x0, device.x0), std::max(clip.y0, device.y0), std::min(clip.x1, device.x1), std::min(clip.y1, device.y1));
+}
+
+void DamageTracker::restoreClipping(const BLContext &ctx)
+{
+    syncClip(ctx);
+    clip = savedClips.empty() ? kNoClip : savedClips.back();
+}
+
+void DamageTracker::syncClip(const BLContext &ctx)
+{
+    // States saved since the last call share the current clip, restored
+    // ones bring back the clip they were saved with
+    size_t count = ctx.savedStateCount();
+    if (count < savedClips.size()) {
+        clip = savedClips[count];
+        savedClips.resize(count);
+    }
+    else {
+        savedClips.resize(count, clip);
+    }
+}
+
+std::vector<BLRectI> DamageTracker::rects() const
+{
+    std::vector<BLRectI> result = cleared;
+    for (const BLRectI &rect : drawn)
+        merge(result, rect);
+    return result;
+}
+
+void DamageTracker::clear(BLContext &ctx)
+{
+    cleared = std::move(drawn);
+    drawn.clear();
+    if (cleared.empty())
+        return;
+
+    // Cleared in the target's memory: drawing would go through the caller's
+    // clip, which can't be lifted (restoreClipping() only goes back to the
+    // clip of the last saved state). The context must finish what it has
+    // queued first.
+    const BLImage *target = ctx.targetImage();
+    BLImageData data;
+    if (_timed_flush(ctx, BL_CONTEXT_FLUSH_SYNC) != BL_SUCCESS || !target || target->getData(&data) != BL_SUCCESS)
+        return;
+
+    // Zeroes, the same as clearRect() writes in every format
+    uint32_t depth = blFormatInfo[data.format].depth / 8;
+    for (const BLRectI &rect : cleared) {
+        for (int y = rect.y; y < rect.y + rect.h; y++) {
+            uint8_t *row = static_cast<uint8_t *>(data.pixelData) + intptr_t(y) * data.stride + intptr_t(rect.x) * depth;
+            std::memset(row, 0, size_t(rect.w) * depth);
+        }
+    }
+}
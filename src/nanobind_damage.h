@@ -0,0 +1,130 @@
+#pragma once
+
+#include "nanobind_common.h"
+
+#include <algorithm>
+#include <limits>
+#include <string>
+#include <vector>
+
+// Device-space regions a BLContext has drawn to, for contexts that opted in
+// with `damage_tracking = True`. Rectangles are kept coalesced and capped at
+// kMaxRects, so the list stays short even for scenes with many small draws.
+class DamageTracker
+{
+public:
+    static constexpr size_t kMaxRects = 32;
+
+    // Drawn since the last clear_damage() / reset_damage()
+    std::vector<BLRectI> drawn;
+    // Cleared by the last clear_damage(), still part of the frame's damage
+    std::vector<BLRectI> cleared;
+
+    // Device-space clip box, mirrored from the clipping calls since Blend2D
+    // doesn't report it, and the clip at each of the context's saved states.
+    // Only ever larger than the real clip: a tracker enabled while a clip is
+    // set assumes none.
+    BLBox clip = kNoClip;
+    std::vector<BLBox> savedClips;
+
+    // Returns the tracker of `ctx` or nullptr when tracking is disabled
+    static DamageTracker *of(const BLContext &ctx);
+    static void setEnabled(const BLContext &ctx, bool enabled);
+
+    void reset()
+    {
+        drawn.clear();
+        cleared.clear();
+    }
+
+    // For a new target, which starts unclipped
+    void resetClip()
+    {
+        clip = kNoClip;
+        savedClips.clear();
+    }
+
+    // Called after the context's clipToRect() / restoreClipping()
+    void clipToRect(const BLContext &ctx, const BLRect &rect);
+    void restoreClipping(const BLContext &ctx);
+    // Follows save() and restore() by the context's saved state count. Must
+    // be called after every restore() that may undo a clip, before the next
+    // save().
+    void syncClip(const BLContext &ctx);
+
+    // `box` is in user space, strokes are inflated by the current stroke options
+    void addFill(const BLContext &ctx, const BLBox &box) { addUserBox(ctx, box, false); }
+    void addStroke(const BLContext &ctx, const BLBox &box) { addUserBox(ctx, box, true); }
+    void addText(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const std::string &text, bool stroke);
+    void addTextMetrics(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const BLTextMetrics &tm, bool stroke);
+    void addImage(const BLContext &ctx, const BLPoint &pt, const BLImage &image, const BLRectI *area);
+    void addAll(const BLContext &ctx);
+
+    // Union of `cleared` and `drawn`
+    std::vector<BLRectI> rects() const;
+    // Clears the pixels of `drawn` and makes them the new `cleared` set
+    void clear(BLContext &ctx);
+
+    static void merge(std::vector<BLRectI> &rects, BLRectI rect);
+
+private:
+    static constexpr double kInf = std::numeric_limits<double>::infinity();
+    static constexpr BLBox kNoClip = BLBox(-kInf, -kInf, kInf, kInf);
+
+    void addUserBox(const BLContext &ctx, BLBox box, bool stroke);
+    void addDeviceBox(const BLContext &ctx, const BLBox &box);
+};
+
+inline BLBox _rect_box(double x, double y, double w, double h) { return BLBox(x, y, x + w, y + h); }
+inline BLBox _rect_box(const BLRect &rect) { return _rect_box(rect.x, rect.y, rect.w, rect.h); }
+inline BLBox _line_box(double x0, double y0, double x1, double y1) { return BLBox(std::min(x0, x1), std::min(y0, y1), std::max(x0, x1), std::max(y0, y1)); }
+inline BLBox _circle_box(double cx, double cy, double rx, double ry) { return BLBox(cx - rx, cy - ry, cx + rx, cy + ry); }
+
+// Device-space bounds of a user-space box drawn with the current transform,
+// strokes are inflated by the current stroke options. Inverted boxes stay inverted.
+BLBox _device_box(const BLContext &ctx, BLBox box, bool stroke);
+
+// Glyph bounds can be tighter than the em box, takes whichever is larger
+inline BLBox _text_box(const BLPoint &pt, const BLFont &font, const BLTextMetrics &tm)
+{
+    const BLFontMetrics &fm = font.metrics();
+    return BLBox(pt.x + std::min(tm.boundingBox.x0, 0.0),
+                 pt.y + std::min(tm.boundingBox.y0, -double(fm.ascent)),
+                 pt.x + std::max(tm.boundingBox.x1, tm.advance.x),
+                 pt.y + std::max(tm.boundingBox.y1, double(fm.descent)));
+}
+
+inline BLBox _image_box(const BLPoint &pt, const BLImage &image, const BLRectI *area)
+{
+    double w = area ? area->w : image.width();
+    double h = area ? area->h : image.height();
+    return _rect_box(pt.x, pt.y, w, h);
+}
+
+// Keep the tracker's clip in step with the context, after the context call
+inline void _track_clip(const BLContext &ctx, const BLRect &rect)
+{
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->clipToRect(ctx, rect);
+}
+
+inline void _track_restore_clipping(const BLContext &ctx)
+{
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->restoreClipping(ctx);
+}
+
+inline void _track_restore(const BLContext &ctx)
+{
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->syncClip(ctx);
+}
+
+// Inverted boxes (x1 < x0) are ignored by the tracker
+inline BLBox _path_box(const BLPath &path)
+{
+    BLBox box;
+    if (path.empty() || path.getBoundingBox(&box) != BL_SUCCESS)
+        return BLBox(0, 0, -1, -1);
+    return box;
+}
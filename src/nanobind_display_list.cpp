@@ -0,0 +1,173 @@
+#include "nanobind_display_list.h"
+
+using Op = DisplayList::Op;
+
+void register_display_list(nb::module_ &m)
+{
+     // DisplayList mirrors the BLContext drawing API; calls are recorded and
+     // later replayed with BLContext.replay()
+     nb::class_<DisplayList>(m, "DisplayList")
+         .def(nb::init<>())
+         .def("__len__", _locked([](const DisplayList &self)
+              { return self.commands.size(); }))
+         .def("empty", _locked([](const DisplayList &self)
+              { return self.commands.empty(); }))
+         .def("clear", _locked([](DisplayList &self)
+              { self.clear(); }))
+         .def("save", _locked([](DisplayList &self)
+              {
+            self.states.push_back(self.state());
+            self.add(Op::Save); }))
+         .def("restore", _locked([](DisplayList &self)
+              {
+            if (self.states.size() > 1)
+                self.states.pop_back();
+            self.add(Op::Restore); }))
+         .def("reset_transform", _locked([](DisplayList &self)
+              { self.add(Op::ResetTransform); }))
+         .def("translate", _locked([](DisplayList &self, double x, double y)
+              { self.add(Op::Translate, {x, y}); }), nb::arg("x"), nb::arg("y"))
+         .def("scale", _locked([](DisplayList &self, double x, double y)
+              { self.add(Op::Scale, {x, y}); }), nb::arg("x"), nb::arg("y"))
+         .def("skew", _locked([](DisplayList &self, double x, double y)
+              { self.add(Op::Skew, {x, y}); }), nb::arg("x"), nb::arg("y"))
+         .def("rotate", _locked([](DisplayList &self, double angle)
+              { self.add(Op::Rotate, {angle}); }), nb::arg("angle"))
+         .def("rotate_around", _locked([](DisplayList &self, double angle, double x, double y)
+              { self.add(Op::RotateAround, {angle, x, y}); }), nb::arg("angle"), nb::arg("x"), nb::arg("y"))
+         .def("transform", _locked([](DisplayList &self, const BLMatrix2D &matrix)
+              {
+            const double *v = matrix.m;
+            self.add(Op::SetTransform, {v[0], v[1], v[2], v[3], v[4], v[5]}); }), nb::arg("matrix"))
+         .def("user_to_meta", _locked([](DisplayList &self)
+              { self.add(Op::UserToMeta); }))
+         .def_prop_rw("comp_op", _locked([](DisplayList &self)
+                      { return self.state().compOp; }), _locked([](DisplayList &self, BLCompOp op)
+                      {
+            self.state().compOp = op;
+            self.add(Op::CompOp, {}, uint32_t(op)); }))
+         .def_prop_rw("global_alpha", _locked([](DisplayList &self)
+                      { return self.state().globalAlpha; }), _locked([](DisplayList &self, double alpha)
+                      {
+            self.state().globalAlpha = alpha;
+            self.add(Op::GlobalAlpha, {alpha}); }))
+         .def_prop_rw("fill_alpha", _locked([](DisplayList &self)
+                      { return self.state().fillAlpha; }), _locked([](DisplayList &self, double alpha)
+                      {
+            self.state().fillAlpha = alpha;
+            self.add(Op::FillAlpha, {alpha}); }))
+         .def_prop_rw("stroke_alpha", _locked([](DisplayList &self)
+                      { return self.state().strokeAlpha; }), _locked([](DisplayList &self, double alpha)
+                      {
+            self.state().strokeAlpha = alpha;
+            self.add(Op::StrokeAlpha, {alpha}); }))
+         .def_prop_rw("fill_rule", _locked([](DisplayList &self)
+                      { return self.state().fillRule; }), _locked([](DisplayList &self, BLFillRule rule)
+                      {
+            self.state().fillRule = rule;
+            self.add(Op::FillRule, {}, uint32_t(rule)); }))
+         .def("set_fill_style", _locked([](DisplayList &self, uint32_t rgba32)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, BLVar(BLRgba32(rgba32)))); }), nb::arg("rgba32"))
+         .def("set_fill_style", _locked([](DisplayList &self, const BLVar &style)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, _copy_style(style))); }), nb::arg("style"))
+         .def("set_fill_style", _locked([](DisplayList &self, const BLRgba32 &color)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, BLVar(color))); }), nb::arg("color"))
+         .def("set_fill_style", _locked([](DisplayList &self, const BLRgba &color)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, BLVar(color))); }), nb::arg("color"))
+         .def("set_fill_style", _locked([](DisplayList &self, const nb::tuple &color)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, BLVar(BLRgba32(_get_rgba32_value(color))))); }), nb::arg("color"))
+         .def("set_fill_style", _locked([](DisplayList &self, const BLGradient &gradient)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, BLVar(gradient))); }), nb::arg("gradient"))
+         .def("set_fill_style", _locked([](DisplayList &self, const BLPattern &pattern)
+              { self.add(Op::FillStyle, {}, DisplayList::push(self.styles, BLVar(pattern))); }), nb::arg("pattern"))
+         .def("set_stroke_style", _locked([](DisplayList &self, uint32_t rgba32)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, BLVar(BLRgba32(rgba32)))); }), nb::arg("rgba32"))
+         .def("set_stroke_style", _locked([](DisplayList &self, const BLVar &style)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, _copy_style(style))); }), nb::arg("style"))
+         .def("set_stroke_style", _locked([](DisplayList &self, const BLRgba32 &color)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, BLVar(color))); }), nb::arg("color"))
+         .def("set_stroke_style", _locked([](DisplayList &self, const BLRgba &color)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, BLVar(color))); }), nb::arg("color"))
+         .def("set_stroke_style", _locked([](DisplayList &self, const nb::tuple &color)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, BLVar(BLRgba32(_get_rgba32_value(color))))); }), nb::arg("color"))
+         .def("set_stroke_style", _locked([](DisplayList &self, const BLGradient &gradient)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, BLVar(gradient))); }), nb::arg("gradient"))
+         .def("set_stroke_style", _locked([](DisplayList &self, const BLPattern &pattern)
+              { self.add(Op::StrokeStyle, {}, DisplayList::push(self.styles, BLVar(pattern))); }), nb::arg("pattern"))
+         .def_prop_rw("stroke_width", _locked([](DisplayList &self)
+                      { return self.state().strokeWidth; }), _locked([](DisplayList &self, double width)
+                      {
+            self.state().strokeWidth = width;
+            self.add(Op::StrokeWidth, {width}); }))
+         .def_prop_rw("stroke_miter_limit", _locked([](DisplayList &self)
+                      { return self.state().strokeMiterLimit; }), _locked([](DisplayList &self, double limit)
+                      {
+            self.state().strokeMiterLimit = limit;
+            self.add(Op::StrokeMiterLimit, {limit}); }))
+         .def_prop_rw("stroke_join", _locked([](DisplayList &self)
+                      { return self.state().strokeJoin; }), _locked([](DisplayList &self, BLStrokeJoin join)
+                      {
+            self.state().strokeJoin = join;
+            self.add(Op::StrokeJoin, {}, uint32_t(join)); }))
+         .def_prop_rw("stroke_dash_offset", _locked([](DisplayList &self)
+                      { return self.state().strokeDashOffset; }), _locked([](DisplayList &self, double offset)
+                      {
+            self.state().strokeDashOffset = offset;
+            self.add(Op::StrokeDashOffset, {offset}); }))
+         .def("set_stroke_cap", _locked([](DisplayList &self, BLStrokeCapPosition position, BLStrokeCap cap)
+              { self.add(Op::StrokeCap, {double(position)}, uint32_t(cap)); }), nb::arg("position"), nb::arg("cap"))
+         .def("set_stroke_caps", _locked([](DisplayList &self, BLStrokeCap cap)
+              { self.add(Op::StrokeCaps, {}, uint32_t(cap)); }), nb::arg("cap"))
+         .def("set_state", _locked([](DisplayList &self, const ContextState &shared)
+              {
+            ContextState state = _copy_state(shared);
+            // Keep the recorded property values in sync with what the state sets
+            DisplayList::State &recorded = self.state();
+            if (state.has(ContextState::kCompOp)) recorded.compOp = state.compOp;
+            if (state.has(ContextState::kGlobalAlpha)) recorded.globalAlpha = state.globalAlpha;
+            if (state.has(ContextState::kFillAlpha)) recorded.fillAlpha = state.fillAlpha;
+            if (state.has(ContextState::kStrokeAlpha)) recorded.strokeAlpha = state.strokeAlpha;
+            if (state.has(ContextState::kFillRule)) recorded.fillRule = state.fillRule;
+            if (state.has(ContextState::kStrokeWidth)) recorded.strokeWidth = state.strokeWidth;
+            if (state.has(ContextState::kStrokeMiterLimit)) recorded.strokeMiterLimit = state.strokeMiterLimit;
+            if (state.has(ContextState::kStrokeJoin)) recorded.strokeJoin = state.strokeJoin;
+            self.add(Op::SetState, {}, DisplayList::push(self.contextStates, std::move(state))); }), nb::arg("state"))
+         .def("clip_to_rect", _locked([](DisplayList &self, const BLRect &rect)
+              { self.add(Op::ClipToRect, {rect.x, rect.y, rect.w, rect.h}); }), nb::arg("rect"))
+         .def("restore_clipping", _locked([](DisplayList &self)
+              { self.add(Op::RestoreClipping); }))
+         .def("clear_all", _locked([](DisplayList &self)
+              { self.add(Op::ClearAll); }))
+         .def("fill_all", _locked([](DisplayList &self)
+              { self.add(Op::FillAll); }))
+         .def("clear_rect", _locked([](DisplayList &self, const BLRect &rect)
+              { self.add(Op::ClearRect, {rect.x, rect.y, rect.w, rect.h}); }), nb::arg("rect"))
+         .def("fill_rect", _locked([](DisplayList &self, const BLRect &rect)
+              { self.add(Op::FillRect, {rect.x, rect.y, rect.w, rect.h}); }), nb::arg("rect"))
+         .def("stroke_rect", _locked([](DisplayList &self, const BLRect &rect)
+              { self.add(Op::StrokeRect, {rect.x, rect.y, rect.w, rect.h}); }), nb::arg("rect"))
+         .def("fill_circle", _locked([](DisplayList &self, double cx, double cy, double r)
+              { self.add(Op::FillCircle, {cx, cy, r}); }), nb::arg("cx"), nb::arg("cy"), nb::arg("r"))
+         .def("stroke_circle", _locked([](DisplayList &self, double cx, double cy, double r)
+              { self.add(Op::StrokeCircle, {cx, cy, r}); }), nb::arg("cx"), nb::arg("cy"), nb::arg("r"))
+         .def("fill_ellipse", _locked([](DisplayList &self, double cx, double cy, double rx, double ry)
+              { self.add(Op::FillEllipse, {cx, cy, rx, ry}); }), nb::arg("cx"), nb::arg("cy"), nb::arg("rx"), nb::arg("ry"))
+         .def("stroke_ellipse", _locked([](DisplayList &self, double cx, double cy, double rx, double ry)
+              { self.add(Op::StrokeEllipse, {cx, cy, rx, ry}); }), nb::arg("cx"), nb::arg("cy"), nb::arg("rx"), nb::arg("ry"))
+         .def("fill_path", _locked([](DisplayList &self, const BLPath &path)
+              { self.add(Op::FillPath, {}, DisplayList::push(self.paths, BLPath(path))); }), nb::arg("path"))
+         .def("stroke_path", _locked([](DisplayList &self, const BLPath &path)
+              { self.add(Op::StrokePath, {}, DisplayList::push(self.paths, BLPath(path))); }), nb::arg("path"))
+         .def("fill_text", _locked([](DisplayList &self, const BLPoint &pt, const BLFont &font, const std::string &text)
+              { self.add(Op::FillText, {pt.x, pt.y}, DisplayList::push(self.texts, std::make_pair(BLFont(font), text))); }), nb::arg("pt"), nb::arg("font"), nb::arg("text"))
+         .def("stroke_text", _locked([](DisplayList &self, const BLPoint &pt, const BLFont &font, const std::string &text)
+              { self.add(Op::StrokeText, {pt.x, pt.y}, DisplayList::push(self.texts, std::make_pair(BLFont(font), text))); }), nb::arg("pt"), nb::arg("font"), nb::arg("text"))
+         .def("blit_image", _locked([](DisplayList &self, const BLPoint &pt, const BLImage &image)
+              { self.add(Op::BlitImage, {pt.x, pt.y}, DisplayList::push(self.images, BLImage(image))); }), nb::arg("pt"), nb::arg("image"))
+         .def("blit_image", _locked([](DisplayList &self, const BLPoint &pt, const BLImage &image, const BLRectI &area)
+              { self.add(Op::BlitImageArea, {pt.x, pt.y, double(area.x), double(area.y), double(area.w), double(area.h)}, DisplayList::push(self.images, BLImage(image))); }), nb::arg("pt"), nb::arg("image"), nb::arg("area"))
+         .def("blit_image", _locked([](DisplayList &self, const BLRect &rect, const BLImage &image)
+              { self.add(Op::BlitImageRect, {rect.x, rect.y, rect.w, rect.h}, DisplayList::push(self.images, BLImage(image))); }), nb::arg("rect"), nb::arg("image"))
+         .def("blit_image", _locked([](DisplayList &self, const BLRect &rect, const BLImage &image, const BLRectI &area)
+              { self.add(Op::BlitImageRectArea, {rect.x, rect.y, rect.w, rect.h, double(area.x), double(area.y), double(area.w), double(area.h)}, DisplayList::push(self.images, BLImage(image))); }), nb::arg("rect"), nb::arg("image"), nb::arg("area"));
+}
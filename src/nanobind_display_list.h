@@ -0,0 +1,306 @@
+#pragma once
+
+#include "nanobind_common.h"
+#include "nanobind_context_state.h"
+#include "nanobind_draw_record.h"
+
+#include <mutex>
+#include <utility>
+#include <vector>
+
+// A recorded sequence of BLContext calls.
+//
+// Recording only stores the arguments (paths, fonts and images are kept as
+// reference-counted Blend2D copies), so replaying a list is a tight C++ loop
+// that never goes back to Python.
+class DisplayList
+{
+public:
+    enum class Op : uint32_t
+    {
+        Save,
+        Restore,
+        ResetTransform,
+        Translate,
+        Scale,
+        Skew,
+        Rotate,
+        RotateAround,
+        SetTransform,
+        UserToMeta,
+        CompOp,
+        GlobalAlpha,
+        FillAlpha,
+        StrokeAlpha,
+        FillRule,
+        FillStyle,
+        StrokeStyle,
+        StrokeWidth,
+        StrokeMiterLimit,
+        StrokeJoin,
+        StrokeCap,
+        StrokeCaps,
+        StrokeDashOffset,
+        SetState,
+        ClipToRect,
+        RestoreClipping,
+        ClearAll,
+        FillAll,
+        ClearRect,
+        FillRect,
+        StrokeRect,
+        FillCircle,
+        StrokeCircle,
+        FillEllipse,
+        StrokeEllipse,
+        FillPath,
+        StrokePath,
+        FillText,
+        StrokeText,
+        BlitImage,
+        BlitImageArea,
+        BlitImageRect,
+        BlitImageRectArea
+    };
+
+    struct Command
+    {
+        Op op;
+        // Enum value or index into one of the resource vectors below
+        uint32_t index;
+        double v[8];
+    };
+
+    // Values reported back by the recording properties; tracks save/restore
+    struct State
+    {
+        BLCompOp compOp = BL_COMP_OP_SRC_OVER;
+        double globalAlpha = 1.0;
+        double fillAlpha = 1.0;
+        double strokeAlpha = 1.0;
+        BLFillRule fillRule = BL_FILL_RULE_NON_ZERO;
+        double strokeWidth = 1.0;
+        double strokeMiterLimit = 4.0;
+        BLStrokeJoin strokeJoin = BL_STROKE_JOIN_MITER_CLIP;
+        double strokeDashOffset = 0.0;
+    };
+
+    std::vector<Command> commands;
+    std::vector<BLVar> styles;
+    std::vector<BLPath> paths;
+    std::vector<std::pair<BLFont, std::string>> texts;
+    std::vector<BLImage> images;
+    std::vector<ContextState> contextStates;
+    std::vector<State> states{State()};
+
+    // Held while recording and while a context replays the list
+    mutable std::mutex mutex;
+
+    State &state() { return states.back(); }
+
+    void add(Op op, std::initializer_list<double> values = {}, uint32_t index = 0)
+    {
+        Command cmd{op, index, {}};
+        size_t i = 0;
+        for (double value : values)
+            cmd.v[i++] = value;
+        commands.push_back(cmd);
+    }
+
+    template <typename T>
+    static uint32_t push(std::vector<T> &pool, T &&value)
+    {
+        pool.push_back(std::move(value));
+        return uint32_t(pool.size() - 1);
+    }
+
+    void clear()
+    {
+        commands.clear();
+        styles.clear();
+        paths.clear();
+        texts.clear();
+        images.clear();
+        contextStates.clear();
+        states.assign(1, State());
+    }
+
+    // Records the area touched by a drawing command, after it was issued
+    void recordDamage(const BLContext &ctx, const Command &cmd, DamageTracker &damage) const
+    {
+        const double *v = cmd.v;
+        switch (cmd.op)
+        {
+        case Op::ClearAll:
+        case Op::FillAll: damage.addAll(ctx); break;
+        case Op::ClearRect:
+        case Op::FillRect: damage.addFill(ctx, _rect_box(v[0], v[1], v[2], v[3])); break;
+        case Op::StrokeRect: damage.addStroke(ctx, _rect_box(v[0], v[1], v[2], v[3])); break;
+        case Op::FillCircle: damage.addFill(ctx, _circle_box(v[0], v[1], v[2], v[2])); break;
+        case Op::StrokeCircle: damage.addStroke(ctx, _circle_box(v[0], v[1], v[2], v[2])); break;
+        case Op::FillEllipse: damage.addFill(ctx, _circle_box(v[0], v[1], v[2], v[3])); break;
+        case Op::StrokeEllipse: damage.addStroke(ctx, _circle_box(v[0], v[1], v[2], v[3])); break;
+        case Op::FillPath: damage.addFill(ctx, _path_box(paths[cmd.index])); break;
+        case Op::StrokePath: damage.addStroke(ctx, _path_box(paths[cmd.index])); break;
+        case Op::FillText:
+        case Op::StrokeText:
+        {
+            const auto &text = texts[cmd.index];
+            damage.addText(ctx, BLPoint(v[0], v[1]), text.first, text.second, cmd.op == Op::StrokeText);
+            break;
+        }
+        case Op::BlitImage: damage.addImage(ctx, BLPoint(v[0], v[1]), images[cmd.index], nullptr); break;
+        case Op::BlitImageArea:
+        {
+            BLRectI area{int(v[2]), int(v[3]), int(v[4]), int(v[5])};
+            damage.addImage(ctx, BLPoint(v[0], v[1]), images[cmd.index], &area);
+            break;
+        }
+        case Op::BlitImageRect:
+        case Op::BlitImageRectArea: damage.addFill(ctx, _rect_box(v[0], v[1], v[2], v[3])); break;
+        case Op::Restore: damage.syncClip(ctx); break;
+        case Op::ClipToRect: damage.clipToRect(ctx, BLRect(v[0], v[1], v[2], v[3])); break;
+        case Op::RestoreClipping: damage.restoreClipping(ctx); break;
+        default: break;
+        }
+    }
+
+    void recordStats(const BLContext &ctx, const Command &cmd, ContextStats &stats) const
+    {
+        const double *v = cmd.v;
+        switch (cmd.op)
+        {
+        case Op::ClearAll:
+        case Op::FillAll: stats.addAll(ctx, ContextStats::Fill); break;
+        case Op::ClearRect:
+        case Op::FillRect: stats.add(ctx, ContextStats::Fill, _rect_box(v[0], v[1], v[2], v[3])); break;
+        case Op::StrokeRect: stats.add(ctx, ContextStats::Stroke, _rect_box(v[0], v[1], v[2], v[3]), true); break;
+        case Op::FillCircle: stats.add(ctx, ContextStats::Fill, _circle_box(v[0], v[1], v[2], v[2])); break;
+        case Op::StrokeCircle: stats.add(ctx, ContextStats::Stroke, _circle_box(v[0], v[1], v[2], v[2]), true); break;
+        case Op::FillEllipse: stats.add(ctx, ContextStats::Fill, _circle_box(v[0], v[1], v[2], v[3])); break;
+        case Op::StrokeEllipse: stats.add(ctx, ContextStats::Stroke, _circle_box(v[0], v[1], v[2], v[3]), true); break;
+        case Op::FillPath: stats.add(ctx, ContextStats::Fill, _path_box(paths[cmd.index])); break;
+        case Op::StrokePath: stats.add(ctx, ContextStats::Stroke, _path_box(paths[cmd.index]), true); break;
+        case Op::FillText:
+        case Op::StrokeText:
+        {
+            const auto &text = texts[cmd.index];
+            stats.addText(ctx, BLPoint(v[0], v[1]), text.first, text.second, cmd.op == Op::StrokeText);
+            break;
+        }
+        case Op::BlitImage: stats.add(ctx, ContextStats::Blit, _image_box(BLPoint(v[0], v[1]), images[cmd.index], nullptr)); break;
+        case Op::BlitImageArea:
+        {
+            BLRectI area{int(v[2]), int(v[3]), int(v[4]), int(v[5])};
+            stats.add(ctx, ContextStats::Blit, _image_box(BLPoint(v[0], v[1]), images[cmd.index], &area));
+            break;
+        }
+        case Op::BlitImageRect:
+        case Op::BlitImageRectArea: stats.add(ctx, ContextStats::Blit, _rect_box(v[0], v[1], v[2], v[3])); break;
+        default: break;
+        }
+    }
+
+    void recordPipeline(const BLContext &ctx, const Command &cmd) const
+    {
+        switch (cmd.op)
+        {
+        case Op::ClearAll:
+        case Op::ClearRect: _record_clear(ctx); break;
+        case Op::FillAll:
+        case Op::FillRect:
+        case Op::FillCircle:
+        case Op::FillEllipse:
+        case Op::FillPath:
+        case Op::FillText: _record_fill(ctx); break;
+        case Op::StrokeRect:
+        case Op::StrokeCircle:
+        case Op::StrokeEllipse:
+        case Op::StrokePath:
+        case Op::StrokeText: _record_stroke(ctx); break;
+        case Op::BlitImage:
+        case Op::BlitImageArea:
+        case Op::BlitImageRect:
+        case Op::BlitImageRectArea: _record_blit(ctx); break;
+        default: break;
+        }
+    }
+
+    void replay(BLContext &ctx, DamageTracker *damage = nullptr, ContextStats *stats = nullptr) const
+    {
+        bool recording = PipelineRecorder::enabled.load(std::memory_order_relaxed);
+        for (const Command &cmd : commands)
+        {
+            const double *v = cmd.v;
+            switch (cmd.op)
+            {
+            case Op::Save: ctx.save(); break;
+            case Op::Restore: ctx.restore(); break;
+            case Op::ResetTransform: ctx.resetTransform(); break;
+            case Op::Translate: ctx.translate(v[0], v[1]); break;
+            case Op::Scale: ctx.scale(v[0], v[1]); break;
+            case Op::Skew: ctx.skew(v[0], v[1]); break;
+            case Op::Rotate: ctx.rotate(v[0]); break;
+            case Op::RotateAround: ctx.rotate(v[0], v[1], v[2]); break;
+            case Op::SetTransform: ctx.setTransform(BLMatrix2D(v[0], v[1], v[2], v[3], v[4], v[5])); break;
+            case Op::UserToMeta: ctx.userToMeta(); break;
+            case Op::CompOp: ctx.setCompOp(BLCompOp(cmd.index)); break;
+            case Op::GlobalAlpha: ctx.setGlobalAlpha(v[0]); break;
+            case Op::FillAlpha: ctx.setFillAlpha(v[0]); break;
+            case Op::StrokeAlpha: ctx.setStrokeAlpha(v[0]); break;
+            case Op::FillRule: ctx.setFillRule(BLFillRule(cmd.index)); break;
+            case Op::FillStyle: ctx.setFillStyle(styles[cmd.index]); break;
+            case Op::StrokeStyle: ctx.setStrokeStyle(styles[cmd.index]); break;
+            case Op::StrokeWidth: ctx.setStrokeWidth(v[0]); break;
+            case Op::StrokeMiterLimit: ctx.setStrokeMiterLimit(v[0]); break;
+            case Op::StrokeJoin: ctx.setStrokeJoin(BLStrokeJoin(cmd.index)); break;
+            case Op::StrokeCap: ctx.setStrokeCap(BLStrokeCapPosition(uint32_t(v[0])), BLStrokeCap(cmd.index)); break;
+            case Op::StrokeCaps: ctx.setStrokeCaps(BLStrokeCap(cmd.index)); break;
+            case Op::StrokeDashOffset: ctx.setStrokeDashOffset(v[0]); break;
+            case Op::SetState: contextStates[cmd.index].apply(ctx); break;
+            case Op::ClipToRect: ctx.clipToRect(BLRect(v[0], v[1], v[2], v[3])); break;
+            case Op::RestoreClipping: ctx.restoreClipping(); break;
+            case Op::ClearAll: ctx.clearAll(); break;
+            case Op::FillAll: ctx.fillAll(); break;
+            case Op::ClearRect: ctx.clearRect(BLRect(v[0], v[1], v[2], v[3])); break;
+            case Op::FillRect: ctx.fillRect(v[0], v[1], v[2], v[3]); break;
+            case Op::StrokeRect: ctx.strokeRect(v[0], v[1], v[2], v[3]); break;
+            case Op::FillCircle: ctx.fillCircle(v[0], v[1], v[2]); break;
+            case Op::StrokeCircle: ctx.strokeCircle(v[0], v[1], v[2]); break;
+            case Op::FillEllipse: ctx.fillEllipse(v[0], v[1], v[2], v[3]); break;
+            case Op::StrokeEllipse: ctx.strokeEllipse(v[0], v[1], v[2], v[3]); break;
+            case Op::FillPath: ctx.fillPath(paths[cmd.index]); break;
+            case Op::StrokePath: ctx.strokePath(paths[cmd.index]); break;
+            case Op::FillText:
+            {
+                const auto &text = texts[cmd.index];
+                ctx.fillUtf8Text(BLPoint(v[0], v[1]), text.first, text.second.c_str(), text.second.size());
+                break;
+            }
+            case Op::StrokeText:
+            {
+                const auto &text = texts[cmd.index];
+                ctx.strokeUtf8Text(BLPoint(v[0], v[1]), text.first, text.second.c_str(), text.second.size());
+                break;
+            }
+            case Op::BlitImage: ctx.blitImage(BLPoint(v[0], v[1]), images[cmd.index]); break;
+            case Op::BlitImageArea:
+                ctx.blitImage(BLPoint(v[0], v[1]), images[cmd.index], BLRectI(int(v[2]), int(v[3]), int(v[4]), int(v[5])));
+                break;
+            case Op::BlitImageRect: ctx.blitImage(BLRect(v[0], v[1], v[2], v[3]), images[cmd.index]); break;
+            case Op::BlitImageRectArea:
+                ctx.blitImage(BLRect(v[0], v[1], v[2], v[3]), images[cmd.index], BLRectI(int(v[4]), int(v[5]), int(v[6]), int(v[7])));
+                break;
+            }
+
+            if (damage)
+                recordDamage(ctx, cmd, *damage);
+            if (stats)
+                recordStats(ctx, cmd, *stats);
+            if (recording)
+                recordPipeline(ctx, cmd);
+        }
+    }
+};
+
+inline std::mutex &_object_mutex(const DisplayList &list) { return list.mutex; }
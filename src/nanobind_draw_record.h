@@ -0,0 +1,109 @@
+#pragma once
+
+#include "nanobind_damage.h"
+#include "nanobind_pipelines.h"
+#include "nanobind_stats.h"
+
+// Called after each draw. They hand the command to each of the per-context
+// recorders that want it: the pipeline recorder, the damage tracker and the
+// stats, so a new drawing call only has to call one of these.
+
+inline void _record_draw_fill(const BLContext &ctx, const BLBox &box)
+{
+    _record_fill(ctx);
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->addFill(ctx, box);
+    if (ContextStats *stats = ContextStats::of(ctx))
+        stats->add(ctx, ContextStats::Fill, box);
+}
+
+inline void _record_draw_stroke(const BLContext &ctx, const BLBox &box)
+{
+    _record_stroke(ctx);
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->addStroke(ctx, box);
+    if (ContextStats *stats = ContextStats::of(ctx))
+        stats->add(ctx, ContextStats::Stroke, box, true);
+}
+
+inline void _record_draw_all(const BLContext &ctx)
+{
+    _record_fill(ctx);
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->addAll(ctx);
+    if (ContextStats *stats = ContextStats::of(ctx))
+        stats->addAll(ctx, ContextStats::Fill);
+}
+
+// For text that is already shaped
+inline void _record_draw_glyphs(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const BLTextMetrics &tm, size_t glyphCount, bool stroke)
+{
+    if (stroke)
+        _record_stroke(ctx);
+    else
+        _record_fill(ctx);
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->addTextMetrics(ctx, pt, font, tm, stroke);
+    if (ContextStats *stats = ContextStats::of(ctx)) {
+        stats->add(ctx, ContextStats::Text, _text_box(pt, font, tm), stroke);
+        stats->glyphs += glyphCount;
+    }
+}
+
+inline void _record_draw_text(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const std::string &text, bool stroke)
+{
+    if (!DamageTracker::of(ctx) && !ContextStats::of(ctx)) {
+        if (stroke)
+            _record_stroke(ctx);
+        else
+            _record_fill(ctx);
+        return;
+    }
+
+    // Shaped again only to measure it
+    BLGlyphBuffer gb;
+    gb.setText(text.c_str(), text.size(), BL_TEXT_ENCODING_UTF8);
+    font.shape(gb);
+    BLTextMetrics tm;
+    font.getTextMetrics(gb, tm);
+    _record_draw_glyphs(ctx, pt, font, tm, gb.size(), stroke);
+}
+
+// Batch calls look `damage` and `stats` up once and record the pipeline once
+inline void _record_draw_image(const BLContext &ctx, DamageTracker *damage, ContextStats *stats, const BLPoint &pt, const BLImage &image, const BLRectI *area)
+{
+    if (damage)
+        damage->addImage(ctx, pt, image, area);
+    if (stats)
+        stats->add(ctx, ContextStats::Blit, _image_box(pt, image, area));
+}
+
+inline void _record_draw_image(const BLContext &ctx, const BLPoint &pt, const BLImage &image, const BLRectI *area = nullptr)
+{
+    _record_blit(ctx);
+    _record_draw_image(ctx, DamageTracker::of(ctx), ContextStats::of(ctx), pt, image, area);
+}
+
+// Images scaled into `box`
+inline void _record_draw_blit(const BLContext &ctx, DamageTracker *damage, ContextStats *stats, const BLBox &box)
+{
+    if (damage)
+        damage->addFill(ctx, box);
+    if (stats)
+        stats->add(ctx, ContextStats::Blit, box);
+}
+
+inline void _record_draw_blit(const BLContext &ctx, const BLBox &box)
+{
+    _record_blit(ctx);
+    _record_draw_blit(ctx, DamageTracker::of(ctx), ContextStats::of(ctx), box);
+}
+
+inline void _record_draw_mask(const BLContext &ctx, const BLPoint &pt, const BLImage &mask)
+{
+    _record_fill(ctx);
+    if (DamageTracker *damage = DamageTracker::of(ctx))
+        damage->addImage(ctx, pt, mask, nullptr);
+    if (ContextStats *stats = ContextStats::of(ctx))
+        stats->add(ctx, ContextStats::Fill, _image_box(pt, mask, nullptr));
+}
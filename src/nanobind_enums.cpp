@@ -85,6 +85,29 @@ void register_enums(nb::module_ &m)
         .value("JOIN_BEVEL", BL_STROKE_JOIN_BEVEL)
         .value("JOIN_ROUND", BL_STROKE_JOIN_ROUND);
 
+    nb::enum_<BLContextCreateFlags>(m, "BLContextCreateFlags", nb::is_flag())
+        .value("NO_FLAGS", BL_CONTEXT_CREATE_NO_FLAGS)
+        .value("DISABLE_JIT", BL_CONTEXT_CREATE_FLAG_DISABLE_JIT)
+        .value("FALLBACK_TO_SYNC", BL_CONTEXT_CREATE_FLAG_FALLBACK_TO_SYNC)
+        .value("ISOLATED_THREAD_POOL", BL_CONTEXT_CREATE_FLAG_ISOLATED_THREAD_POOL)
+        .value("ISOLATED_JIT_RUNTIME", BL_CONTEXT_CREATE_FLAG_ISOLATED_JIT_RUNTIME)
+        .value("ISOLATED_JIT_LOGGING", BL_CONTEXT_CREATE_FLAG_ISOLATED_JIT_LOGGING)
+        .value("OVERRIDE_CPU_FEATURES", BL_CONTEXT_CREATE_FLAG_OVERRIDE_CPU_FEATURES);
+
+    // X86 and ARM share bit values, only the ones of the build's architecture apply
+    nb::enum_<BLRuntimeCpuFeatures>(m, "BLRuntimeCpuFeatures", nb::is_flag())
+        .value("X86_SSE2", BL_RUNTIME_CPU_FEATURE_X86_SSE2)
+        .value("X86_SSE3", BL_RUNTIME_CPU_FEATURE_X86_SSE3)
+        .value("X86_SSSE3", BL_RUNTIME_CPU_FEATURE_X86_SSSE3)
+        .value("X86_SSE4_1", BL_RUNTIME_CPU_FEATURE_X86_SSE4_1)
+        .value("X86_SSE4_2", BL_RUNTIME_CPU_FEATURE_X86_SSE4_2)
+        .value("X86_AVX", BL_RUNTIME_CPU_FEATURE_X86_AVX)
+        .value("X86_AVX2", BL_RUNTIME_CPU_FEATURE_X86_AVX2)
+        .value("X86_AVX512", BL_RUNTIME_CPU_FEATURE_X86_AVX512)
+        .value("ARM_ASIMD", BL_RUNTIME_CPU_FEATURE_ARM_ASIMD)
+        .value("ARM_CRC32", BL_RUNTIME_CPU_FEATURE_ARM_CRC32)
+        .value("ARM_PMULL", BL_RUNTIME_CPU_FEATURE_ARM_PMULL);
+
     // Font-related enums
     m.attr("OPENTYPE_GDEF") = BL_MAKE_TAG('G', 'D', 'E', 'F');
     m.attr("OPENTYPE_GPOS") = BL_MAKE_TAG('G', 'P', 'O', 'S');
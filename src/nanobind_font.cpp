@@ -1,4 +1,5 @@
 #include "nanobind_common.h"
+#include "nanobind_shaped_text.h"
 #include <cstring>
 #include <stdexcept>
 
@@ -19,7 +20,7 @@ void register_font(nb::module_ &m)
                     {
              BLFontData data;
              data.createFromFile(fileName, BL_FILE_READ_MMAP_ENABLED);
-             return data; }, nb::arg("fileName"))
+             return data; }, nb::arg("fileName"), release_gil())
         .def_static("create_from_data", [](nb::bytes data)
                     {
              // Copy the data to a new buffer
@@ -42,7 +43,7 @@ void register_font(nb::module_ &m)
              BLFontFace face;
              // Use BL_FILE_READ_NO_FLAGS as second parameter
              face.createFromFile(fileName, BL_FILE_READ_NO_FLAGS);
-             return face; }, nb::arg("fileName"), nb::arg("index") = 0)
+             return face; }, nb::arg("fileName"), nb::arg("index") = 0, release_gil())
         .def_static("create_from_data", [](const BLFontData &fontData, uint32_t index)
                     {
              BLFontFace face;
@@ -100,9 +101,13 @@ void register_font(nb::module_ &m)
         .def("shape", [](const BLFont &self, const char *text)
              {
              BLGlyphBuffer gb;
-             // Use BL_TEXT_ENCODING_UTF8 as the text encoding
-             gb.setText(text, strlen(text), BL_TEXT_ENCODING_UTF8);
-             self.shape(gb);
+             {
+                 // Shaping doesn't touch Python objects, building the result does
+                 nb::gil_scoped_release release;
+                 // Use BL_TEXT_ENCODING_UTF8 as the text encoding
+                 gb.setText(text, strlen(text), BL_TEXT_ENCODING_UTF8);
+                 self.shape(gb);
+             }
              
              size_t size = gb.size();
              nb::list indices;
@@ -125,14 +130,17 @@ void register_font(nb::module_ &m)
         .def("get_text_metrics", [](const BLFont &self, const char *text)
              {
              BLTextMetrics tm;
-             BLGlyphBuffer gb;
-             gb.setText(text, strlen(text), BL_TEXT_ENCODING_UTF8);
-             self.shape(gb);
-             
-             // Use a temporary BLTextMetrics for the out parameter
-             BLTextMetrics out;
-             self.getTextMetrics(gb, out);
-             tm = out;
+             {
+                 nb::gil_scoped_release release;
+                 BLGlyphBuffer gb;
+                 gb.setText(text, strlen(text), BL_TEXT_ENCODING_UTF8);
+                 self.shape(gb);
+
+                 // Use a temporary BLTextMetrics for the out parameter
+                 BLTextMetrics out;
+                 self.getTextMetrics(gb, out);
+                 tm = out;
+             }
              
              return nb::make_tuple(
                  tm.advance.x,
@@ -159,4 +167,29 @@ void register_font(nb::module_ &m)
                      { return self.size(); })
         .def_prop_ro("empty", [](const BLGlyphBuffer &self)
                      { return self.empty(); });
+
+    // ShapedText
+    nb::class_<ShapedText>(m, "ShapedText")
+        .def(nb::init<const BLFont &, const std::string &>(), nb::arg("font"), nb::arg("text"), release_gil())
+        .def("__len__", [](const ShapedText &self)
+             { return self.glyphBuffer.size(); })
+        .def_prop_ro("font", [](const ShapedText &self)
+                     { return self.font; })
+        .def_prop_ro("text", [](const ShapedText &self)
+                     { return self.text; })
+        .def_prop_ro("width", [](const ShapedText &self)
+                     { return self.metrics.advance.x; })
+        .def_prop_ro("bounding_box", [](const ShapedText &self)
+                     { return self.metrics.boundingBox; })
+        .def_prop_ro("metrics", [](const ShapedText &self)
+                     {
+             // Same layout as BLFont.get_text_metrics()
+             const BLTextMetrics &tm = self.metrics;
+             return nb::make_tuple(
+                 tm.advance.x,
+                 tm.advance.y,
+                 tm.boundingBox.x0,
+                 tm.boundingBox.y0,
+                 tm.boundingBox.x1,
+                 tm.boundingBox.y1); });
 }
\ No newline at end of file
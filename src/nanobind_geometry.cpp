@@ -73,6 +73,8 @@ void register_geometry(nb::module_ &m)
      nb::class_<BLRect>(m, "BLRect")
          .def(nb::init<float, float, float, float>(),
               nb::arg("x"), nb::arg("y"), nb::arg("w"), nb::arg("h"))
+         .def("__init__", [](BLRect *self, const std::tuple<double, double, double, double> &rect)
+              { new (self) BLRect(std::get<0>(rect), std::get<1>(rect), std::get<2>(rect), std::get<3>(rect)); }, nb::arg("rect"))
          .def_rw("x", &BLRect::x)
          .def_rw("y", &BLRect::y)
          .def_rw("w", &BLRect::w)
@@ -87,6 +89,8 @@ void register_geometry(nb::module_ &m)
      nb::class_<BLRectI>(m, "BLRectI")
          .def(nb::init<int, int, int, int>(),
               nb::arg("x"), nb::arg("y"), nb::arg("w"), nb::arg("h"))
+         .def("__init__", [](BLRectI *self, const std::tuple<int, int, int, int> &rect)
+              { new (self) BLRectI(std::get<0>(rect), std::get<1>(rect), std::get<2>(rect), std::get<3>(rect)); }, nb::arg("rect"))
          .def_rw("x", &BLRectI::x)
          .def_rw("y", &BLRectI::y)
          .def_rw("w", &BLRectI::w)
@@ -115,6 +119,8 @@ void register_geometry(nb::module_ &m)
      nb::class_<BLPoint>(m, "BLPoint")
          .def(nb::init<double, double>(),
               nb::arg("x"), nb::arg("y"))
+         .def("__init__", [](BLPoint *self, const std::pair<double, double> &pt)
+              { new (self) BLPoint(pt.first, pt.second); }, nb::arg("pt"))
          .def_rw("x", &BLPoint::x)
          .def_rw("y", &BLPoint::y)
          .def("__repr__", [](const BLPoint &self)
@@ -125,6 +131,8 @@ void register_geometry(nb::module_ &m)
      nb::class_<BLPointI>(m, "BLPointI")
          .def(nb::init<int, int>(),
               nb::arg("x"), nb::arg("y"))
+         .def("__init__", [](BLPointI *self, const std::pair<int, int> &pt)
+              { new (self) BLPointI(pt.first, pt.second); }, nb::arg("pt"))
          .def_rw("x", &BLPointI::x)
          .def_rw("y", &BLPointI::y)
          .def("__repr__", [](const BLPointI &self)
@@ -150,4 +158,10 @@ void register_geometry(nb::module_ &m)
          .def("__repr__", [](const BLSizeI &self)
               { return "SizeI(w=" + std::to_string(self.w) +
                        ", h=" + std::to_string(self.h) + ")"; });
+
+     // Plain tuples are accepted wherever a point or rect is expected
+     nb::implicitly_convertible<std::tuple<double, double, double, double>, BLRect>();
+     nb::implicitly_convertible<std::tuple<int, int, int, int>, BLRectI>();
+     nb::implicitly_convertible<std::pair<double, double>, BLPoint>();
+     nb::implicitly_convertible<std::pair<int, int>, BLPointI>();
 }
\ No newline at end of file
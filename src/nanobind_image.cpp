@@ -1,9 +1,113 @@
 #include "nanobind_common.h"
+#include "nanobind_array_image.h"
+#include <algorithm>
+#include <cctype>
 #include <cstring>
 #include <stdexcept>
 
 namespace nb = nanobind;
 
+// Encoder of the codec named `name` ("png", "qoi", "bmp"), by codec name or
+// file extension
+static BLImageEncoder _image_encoder(const std::string &name)
+{
+    std::string upper = name;
+    std::transform(upper.begin(), upper.end(), upper.begin(), [](unsigned char c)
+                   { return char(std::toupper(c)); });
+
+    BLImageCodec codec;
+    if (codec.findByName(upper.c_str()) != BL_SUCCESS && codec.findByExtension(name.c_str()) != BL_SUCCESS) {
+        throw nb::value_error(("Unknown image codec '" + name + "'").c_str());
+    }
+    BLImageEncoder encoder;
+    if (codec.createEncoder(&encoder) != BL_SUCCESS) {
+        throw nb::value_error(("The " + name + " codec can't encode images").c_str());
+    }
+    return encoder;
+}
+
+// Encoder options are plain numbers, e.g. compression=9 for PNG
+static BLVar _option_value(nb::handle value)
+{
+    if (nb::isinstance<nb::bool_>(value))
+        return BLVar(nb::cast<bool>(value));
+    if (nb::isinstance<nb::int_>(value))
+        return BLVar(nb::cast<int64_t>(value));
+    if (nb::isinstance<nb::float_>(value))
+        return BLVar(nb::cast<double>(value));
+    throw nb::type_error("Encoder options must be numbers");
+}
+
+using PixelView = nb::ndarray<uint8_t, nb::device::cpu>;
+
+// Owns a reference to the data of `image` for the arrays that view it
+static nb::capsule _data_owner(const BLImage &image)
+{
+    return nb::capsule(new BLImage(image), [](void *p) noexcept { delete static_cast<BLImage *>(p); });
+}
+
+// Returns the pixels of `image` as a (height, width, 4) array, (height, width)
+// for A8. The array owns a reference to the image data, so the pixels stay
+// valid after the image is reset or collected. Views alias the memory a
+// context attached to the image keeps drawing into, so they show its
+// drawing once it is flushed. The image data is only copied, leaving the
+// views as they were, when a context attaches to the image or the image is
+// converted while views exist.
+static PixelView _pixel_view(const BLImage &image)
+{
+    if (image.empty()) {
+        throw nb::value_error("Image is empty");
+    }
+
+    BLImageData data;
+    if (image.getData(&data) != BL_SUCCESS || !data.pixelData) {
+        throw nb::value_error("Failed to get pixel data");
+    }
+
+    size_t height = size_t(data.size.h);
+    size_t width = size_t(data.size.w);
+    int64_t stride = int64_t(data.stride);
+    switch (data.format) {
+        case BL_FORMAT_PRGB32:
+        case BL_FORMAT_XRGB32:
+        {
+            size_t shape[3] = {height, width, 4};
+            int64_t strides[3] = {stride, 4, 1};
+            return PixelView(data.pixelData, 3, shape, _data_owner(image), strides);
+        }
+        case BL_FORMAT_A8:
+        {
+            size_t shape[2] = {height, width};
+            int64_t strides[2] = {stride, 1};
+            return PixelView(data.pixelData, 2, shape, _data_owner(image), strides);
+        }
+        default:
+            throw nb::value_error("Unsupported format for numpy conversion");
+    }
+}
+
+// Buffer protocol: hands out the buffer of a _pixel_view() NumPy array, which
+// then owns the export and keeps the pixels alive until it is released
+static int _image_getbuffer(PyObject *exporter, Py_buffer *view, int flags)
+{
+    try {
+        nb::object array = nb::cast(nb::ndarray<nb::numpy, uint8_t>(_pixel_view(nb::cast<const BLImage &>(nb::handle(exporter)))));
+        return PyObject_GetBuffer(array.ptr(), view, flags);
+    }
+    catch (nb::python_error &e) {
+        e.restore();
+    }
+    catch (const std::exception &e) {
+        PyErr_SetString(PyExc_BufferError, e.what());
+    }
+    view->obj = nullptr;
+    return -1;
+}
+
+static PyType_Slot imageSlots[] = {
+    {Py_bf_getbuffer, (void *)_image_getbuffer},
+    {0, nullptr}};
+
 void register_image(nb::module_ &m)
 {
     // First register the image filter enum
@@ -15,7 +119,7 @@ void register_image(nb::module_ &m)
         .value("LANCZOS", BL_IMAGE_SCALE_FILTER_LANCZOS);
 
     // BLImage class - use BLImage as the class name to match C++ code
-    nb::class_<BLImage>(m, "BLImage")
+    nb::class_<BLImage>(m, "BLImage", nb::type_slots(imageSlots))
         .def(nb::init<>())
         .def(nb::init<int, int, BLFormat>(), nb::arg("w"), nb::arg("h"), nb::arg("format") = BL_FORMAT_PRGB32)
 
@@ -41,20 +145,62 @@ void register_image(nb::module_ &m)
             }
             return img; }, nb::arg("w"), nb::arg("h"), nb::arg("format") = BL_FORMAT_PRGB32)
 
+        // Draws go straight into the buffer, which the image keeps exported
+        .def_static("from_buffer", [](nb::handle buffer, BLFormat format, std::optional<intptr_t> stride)
+                    { return _image_from_buffer(buffer, format, stride); }, nb::arg("buffer"), nb::arg("format") = BL_FORMAT_PRGB32, nb::arg("stride") = nb::none())
+
         // Image IO
         .def("readFromFile", [](BLImage &self, const std::string &fileName)
              {
             BLResult result = self.readFromFile(fileName.c_str());
             if (result != BL_SUCCESS) {
                 throw std::runtime_error("Failed to read image from file");
-            } }, nb::arg("fileName"))
+            } }, nb::arg("fileName"), release_gil())
+
+        .def("read_from_data", [](BLImage &self, nb::handle data)
+             {
+            BufferRef ref;
+            if (PyObject_GetBuffer(data.ptr(), &ref.view, PyBUF_SIMPLE) != 0) {
+                throw nb::python_error();
+            }
+            ref.held = true;
+
+            BLResult result;
+            {
+                native_section release;
+                result = self.readFromData(ref.view.buf, size_t(ref.view.len));
+            }
+            if (result != BL_SUCCESS) {
+                throw std::runtime_error("Failed to read image from data");
+            } }, nb::arg("data"))
+
+        .def("write_to_data", [](const BLImage &self, const std::string &codec, nb::kwargs options)
+             {
+            BLImageEncoder encoder = _image_encoder(codec);
+            for (auto [key, value] : options) {
+                std::string name = nb::cast<std::string>(key);
+                if (encoder.setProperty(name.c_str(), _option_value(value)) != BL_SUCCESS) {
+                    throw nb::value_error(("Unknown option '" + name + "' for the " + codec + " encoder").c_str());
+                }
+            }
+
+            BLArray<uint8_t> buffer;
+            BLResult result;
+            {
+                native_section release;
+                result = encoder.writeFrame(buffer, self);
+            }
+            if (result != BL_SUCCESS) {
+                throw std::runtime_error("Failed to write image to data");
+            }
+            return nb::bytes(reinterpret_cast<const char *>(buffer.data()), buffer.size()); }, nb::arg("codec") = "png", nb::arg("options"))
 
         .def("writeToFile", [](const BLImage &self, const std::string &fileName)
              {
             BLResult result = self.writeToFile(fileName.c_str());
             if (result != BL_SUCCESS) {
                 throw std::runtime_error("Failed to write image to file");
-            } }, nb::arg("fileName"))
+            } }, nb::arg("fileName"), release_gil())
 
         // Image conversion
         .def("convert", [](BLImage &self, BLFormat format)
@@ -62,7 +208,7 @@ void register_image(nb::module_ &m)
             BLResult result = self.convert(format);
             if (result != BL_SUCCESS) {
                 throw std::runtime_error("Failed to convert image format");
-            } }, nb::arg("format"))
+            } }, nb::arg("format"), release_gil())
 
         // Scaling - use the proper enum type
         .def_static("scale", [](BLImage &dst, const BLImage &src, int w, int h, BLImageScaleFilter filter)
@@ -71,7 +217,7 @@ void register_image(nb::module_ &m)
             BLResult result = BLImage::scale(dst, src, size, filter);
             if (result != BL_SUCCESS) {
                 throw std::runtime_error("Failed to scale image");
-            } }, nb::arg("dst"), nb::arg("src"), nb::arg("w"), nb::arg("h"), nb::arg("filter") = BL_IMAGE_SCALE_FILTER_BILINEAR)
+            } }, nb::arg("dst"), nb::arg("src"), nb::arg("w"), nb::arg("h"), nb::arg("filter") = BL_IMAGE_SCALE_FILTER_BILINEAR, release_gil())
 
         // Convenience method for in-place scaling - use the proper enum type
         .def("scaleToSize", [](BLImage &self, int w, int h, BLImageScaleFilter filter)
@@ -82,7 +228,7 @@ void register_image(nb::module_ &m)
             if (result != BL_SUCCESS) {
                 throw std::runtime_error("Failed to scale image");
             }
-            self = std::move(dst); }, nb::arg("w"), nb::arg("h"), nb::arg("filter") = BL_IMAGE_SCALE_FILTER_BILINEAR)
+            self = std::move(dst); }, nb::arg("w"), nb::arg("h"), nb::arg("filter") = BL_IMAGE_SCALE_FILTER_BILINEAR, release_gil())
 
         // Properties
         .def_prop_ro("width", &BLImage::width)
@@ -115,51 +261,36 @@ void register_image(nb::module_ &m)
             
             return result; })
 
-        // Create a NumPy array from image data
+        // Views of the pixels share the image data, see _pixel_view()
         .def("getDataAsNumPy", [](const BLImage &self)
-             {
-            if (self.empty()) {
-                throw nb::value_error("Image is empty");
+             { return nb::ndarray<nb::numpy, uint8_t>(_pixel_view(self)); })
+        .def_prop_ro("__array_interface__", [](const BLImage &self)
+                     {
+            PixelView view = _pixel_view(self);
+            nb::list shape, strides;
+            size_t size = 1;
+            for (size_t i = 0; i < view.ndim(); i++) {
+                shape.append(view.shape(i));
+                strides.append(view.stride(i));
+                size += (view.shape(i) - 1) * size_t(view.stride(i));
             }
 
-            BLImageData data;
-            self.getData(&data);
-            
-            if (!data.pixelData) {
-                throw nb::value_error("Failed to get pixel data");
-            }
-
-            int width = self.width();
-            int height = self.height();
-            intptr_t stride = data.stride;
-            uint32_t format = self.format();
-
-            // Determine shape and format for numpy array
-            std::vector<size_t> shape;
-            std::vector<int64_t> strides;
-            int channels;
-
-            switch (format) {
-                case BL_FORMAT_PRGB32:
-                case BL_FORMAT_XRGB32:
-                    channels = 4;
-                    shape = {static_cast<size_t>(height), static_cast<size_t>(width), static_cast<size_t>(channels)};
-                    strides = {stride, static_cast<int64_t>(channels), 1};
-                    break;
-                case BL_FORMAT_A8:
-                    channels = 1;
-                    shape = {static_cast<size_t>(height), static_cast<size_t>(width)};
-                    strides = {stride, 1};
-                    break;
-                default:
-                    throw nb::value_error("Unsupported format for numpy conversion");
-            }
-
-            // Create a numpy array that references the image data (no copy)
-            return nb::ndarray<nb::numpy, uint8_t>(
-                static_cast<uint8_t*>(data.pixelData),
-                shape.size(), shape.data(),
-                nullptr,  // No owner - the data is owned by the BLImage
-                strides.data()
-            ); });
-}
\ No newline at end of file
+            // A bare pointer wouldn't keep the pixels alive once the image is
+            // reset. The data is passed as a flat array over all the rows
+            // instead, which consumers hold on to like any other view.
+            nb::dict result;
+            result["version"] = 3;
+            result["shape"] = nb::tuple(shape);
+            result["typestr"] = "|u1";
+            result["data"] = nb::ndarray<nb::numpy, uint8_t>(view.data(), 1, &size, _data_owner(self));
+            result["strides"] = nb::tuple(strides);
+            return result; })
+        .def("__dlpack__", [](const BLImage &self, nb::kwargs kwargs)
+             {
+            // A framework-less ndarray converts to a DLPack capsule. Like
+            // nanobind's own arrays, the stream and version arguments are
+            // ignored, CPU data needs no synchronization.
+            return nb::cast(_pixel_view(self)); })
+        .def("__dlpack_device__", [](const BLImage &self)
+             { return nb::make_tuple(int(nb::device::cpu::value), 0); });
+}
@@ -0,0 +1,182 @@
+#include "nanobind_common.h"
+
+#include <algorithm>
+#include <condition_variable>
+#include <deque>
+#include <mutex>
+#include <stdexcept>
+#include <thread>
+
+// Decodes image files on native worker threads.
+//
+// Workers claim paths in order, but never run more than `prefetch` images
+// ahead of the consumer, so a slow consumer holds at most that many decoded
+// images in memory. Results are handed out in path order, or as soon as each
+// one is done.
+class ImageLoader
+{
+public:
+    struct Result
+    {
+        size_t index = 0;
+        BLImage image;
+        BLResult result = BL_SUCCESS;
+    };
+
+    ImageLoader(std::vector<std::string> paths, size_t workers, std::optional<BLFormat> format, size_t prefetch, bool ordered)
+        : paths(std::move(paths)), format(format), ordered(ordered)
+    {
+        if (workers == 0)
+            workers = std::max(std::thread::hardware_concurrency(), 1u);
+        workers = std::min(workers, std::max<size_t>(this->paths.size(), 1));
+        this->prefetch = prefetch ? prefetch : workers * 4;
+        if (ordered)
+            slots.resize(this->paths.size());
+
+        for (size_t i = 0; i < workers; i++) {
+            threads.emplace_back([this]
+                                 { run(); });
+        }
+    }
+
+    ~ImageLoader()
+    {
+        {
+            std::lock_guard<std::mutex> lock(mutex);
+            stopped = true;
+        }
+        claimable.notify_all();
+        for (std::thread &thread : threads)
+            thread.join();
+    }
+
+    size_t size() const { return paths.size(); }
+
+    // Blocks until the next image is decoded, returns false when all were
+    // handed out. Call without the GIL.
+    bool next(Result &out)
+    {
+        std::unique_lock<std::mutex> lock(mutex);
+        if (consumed == paths.size())
+            return false;
+
+        if (ordered) {
+            finished.wait(lock, [this]
+                          { return slots[consumed].has_value(); });
+            out = std::move(*slots[consumed]);
+            slots[consumed].reset();
+        }
+        else {
+            finished.wait(lock, [this]
+                          { return !done.empty(); });
+            out = std::move(done.front());
+            done.pop_front();
+        }
+        consumed++;
+        lock.unlock();
+        claimable.notify_one();
+        return true;
+    }
+
+    const std::string &path(size_t index) const { return paths[index]; }
+
+private:
+    std::vector<std::string> paths;
+    std::optional<BLFormat> format;
+    size_t prefetch;
+    bool ordered;
+
+    std::mutex mutex;
+    std::condition_variable claimable;
+    std::condition_variable finished;
+    size_t claimed = 0;
+    size_t consumed = 0;
+    bool stopped = false;
+    std::vector<std::optional<Result>> slots;
+    std::deque<Result> done;
+    std::vector<std::thread> threads;
+
+    void run()
+    {
+        for (;;) {
+            size_t index;
+            {
+                std::unique_lock<std::mutex> lock(mutex);
+                claimable.wait(lock, [this]
+                               { return stopped || claimed == paths.size() || claimed < consumed + prefetch; });
+                if (stopped || claimed == paths.size())
+                    return;
+                index = claimed++;
+            }
+
+            Result result{index, BLImage(), BL_SUCCESS};
+            result.result = result.image.readFromFile(paths[index].c_str());
+            if (result.result == BL_SUCCESS && format && result.image.format() != *format)
+                result.result = result.image.convert(*format);
+
+            {
+                std::lock_guard<std::mutex> lock(mutex);
+                if (ordered)
+                    slots[index] = std::move(result);
+                else
+                    done.push_back(std::move(result));
+            }
+            finished.notify_all();
+        }
+    }
+};
+
+static std::vector<std::string> _fspaths(nb::iterable paths)
+{
+    nb::object fspath = nb::module_::import_("os").attr("fspath");
+    std::vector<std::string> result;
+    for (nb::handle path : paths)
+        result.push_back(nb::cast<std::string>(fspath(path)));
+    return result;
+}
+
+static BLImage _loaded_image(const ImageLoader &loader, ImageLoader::Result &result)
+{
+    if (result.result != BL_SUCCESS) {
+        throw std::runtime_error("Failed to read image from file '" + loader.path(result.index) + "'");
+    }
+    return std::move(result.image);
+}
+
+void register_image_loader(nb::module_ &m)
+{
+     nb::class_<ImageLoader>(m, "ImageLoader")
+         .def("__init__", [](ImageLoader *self, nb::iterable paths, size_t workers, std::optional<BLFormat> format, size_t prefetch, bool ordered)
+              { new (self) ImageLoader(_fspaths(paths), workers, format, prefetch, ordered); }, nb::arg("paths"), nb::arg("workers") = 0,
+              nb::arg("format") = nb::none(), nb::arg("prefetch") = 0, nb::arg("ordered") = true)
+         .def("__iter__", [](nb::handle self)
+              { return self; })
+         .def("__next__", [](ImageLoader &self)
+              {
+            ImageLoader::Result result;
+            bool found;
+            {
+                native_section release;
+                found = self.next(result);
+            }
+            if (!found) {
+                throw nb::stop_iteration();
+            }
+            return nb::make_tuple(self.path(result.index), _loaded_image(self, result)); })
+         .def("__len__", &ImageLoader::size);
+
+     m.def("load_images", [](nb::iterable paths, size_t workers, std::optional<BLFormat> format)
+           {
+            ImageLoader loader(_fspaths(paths), workers, format, 0, true);
+            std::vector<ImageLoader::Result> results(loader.size());
+            {
+                native_section release;
+                for (ImageLoader::Result &result : results)
+                    loader.next(result);
+            }
+
+            std::vector<BLImage> images;
+            for (ImageLoader::Result &result : results)
+                images.push_back(_loaded_image(loader, result));
+            return images; }, nb::arg("paths"), nb::arg("workers") = 0, nb::arg("format") = nb::none());
+}
@@ -10,11 +10,19 @@ NB_MODULE(_capi, m)
     register_geometry(m);
     register_array(m);
     register_image(m);
+    register_image_loader(m);
     register_font(m);
     register_path(m);
     register_gradient(m);
     register_pattern(m);
+    register_style(m);
+    register_context_state(m);
+    register_display_list(m);
     register_context(m);
+    register_context_pool(m);
+    register_tiled_renderer(m);
+    register_pipelines(m);
     register_misc(m);
     register_pixel_convert(m);
+    register_composite(m);
 }
\ No newline at end of file
@@ -0,0 +1,154 @@
+#include "nanobind_pipelines.h"
+
+#include <mutex>
+#include <set>
+#include <tuple>
+
+using PipelineKey = std::tuple<BLFormat, BLCompOp, StyleKind>;
+
+std::atomic<bool> PipelineRecorder::enabled{false};
+
+static std::mutex recordedMutex;
+static std::set<PipelineKey> recorded;
+
+void PipelineRecorder::add(const BLContext &ctx, StyleKind kind, BLCompOp compOp)
+{
+    const BLImage *target = ctx.targetImage();
+    if (!target)
+        return;
+
+    std::lock_guard<std::mutex> lock(recordedMutex);
+    recorded.emplace(target->format(), compOp, kind);
+}
+
+void PipelineRecorder::addStyle(const BLContext &ctx, BLContextStyleSlot slot)
+{
+    StyleKind kind = StyleKind::Solid;
+    switch (ctx.styleType(slot)) {
+    case BL_OBJECT_TYPE_PATTERN:
+        kind = StyleKind::Pattern;
+        break;
+    case BL_OBJECT_TYPE_GRADIENT:
+    {
+        BLVar style;
+        ctx.getStyle(slot, style);
+        switch (style.as<BLGradient>().type()) {
+        case BL_GRADIENT_TYPE_RADIAL: kind = StyleKind::RadialGradient; break;
+        case BL_GRADIENT_TYPE_CONIC: kind = StyleKind::ConicGradient; break;
+        default: kind = StyleKind::LinearGradient; break;
+        }
+        break;
+    }
+    default:
+        break;
+    }
+    add(ctx, kind);
+}
+
+size_t _pipeline_count()
+{
+    BLRuntimeResourceInfo info;
+    blRuntimeQueryInfo(BL_RUNTIME_INFO_TYPE_RESOURCE, &info);
+    return info.dynamicPipelineCount;
+}
+
+static BLGradient _warmup_gradient(StyleKind kind)
+{
+    BLGradient gradient;
+    switch (kind) {
+    case StyleKind::RadialGradient: gradient.create(BLRadialGradientValues(32, 32, 24, 24, 32)); break;
+    case StyleKind::ConicGradient: gradient.create(BLConicGradientValues(32, 32, 0)); break;
+    default: gradient.create(BLLinearGradientValues(0, 0, 64, 64)); break;
+    }
+    gradient.addStop(0.0, BLRgba32(0xFF000000));
+    gradient.addStop(1.0, BLRgba32(0x80FFFFFF));
+    return gradient;
+}
+
+// Draws the shapes that select distinct fill pipelines: pixel-aligned
+// rects, fractional rects and anti-aliased paths. Blits add the aligned,
+// fractional and scaled pattern fetchers. The context deliberately ignores
+// the CPU feature overrides: they give a context its own JIT runtime, which
+// would take the pipelines with it when the context is destroyed.
+static void _warm_up(BLFormat format, BLCompOp compOp, StyleKind kind)
+{
+    BLImage target(64, 64, format);
+    BLContext ctx(target);
+    ctx.setCompOp(compOp);
+
+    auto drawShapes = [&]
+    {
+        ctx.fillRect(BLRectI(1, 1, 30, 30));
+        ctx.fillRect(1.5, 1.5, 30, 30);
+        ctx.fillCircle(32, 32, 20);
+    };
+
+    if (kind == StyleKind::Solid) {
+        // Opaque and translucent colors can take different paths
+        ctx.setFillStyle(BLRgba32(0xFFFFFFFF));
+        drawShapes();
+        ctx.setFillStyle(BLRgba32(0x80FFFFFF));
+        drawShapes();
+    }
+    else if (kind == StyleKind::Pattern) {
+        BLImage source(16, 16, BL_FORMAT_PRGB32);
+        BLContext(source).clearAll();
+        ctx.blitImage(BLPointI(1, 1), source);
+        ctx.blitImage(BLPoint(1.5, 1.5), source);
+        ctx.blitImage(BLRect(1.5, 1.5, 30, 30), source);
+        ctx.setFillStyle(BLPattern(source));
+        drawShapes();
+    }
+    else {
+        ctx.setFillStyle(_warmup_gradient(kind));
+        drawShapes();
+    }
+    ctx.end();
+}
+
+static size_t _warm_up_all(const std::vector<PipelineKey> &keys)
+{
+    nb::gil_scoped_release release;
+    size_t before = _pipeline_count();
+    for (const PipelineKey &key : keys)
+        _warm_up(std::get<0>(key), std::get<1>(key), std::get<2>(key));
+    return _pipeline_count() - before;
+}
+
+void register_pipelines(nb::module_ &m)
+{
+     nb::enum_<StyleKind>(m, "StyleKind")
+         .value("SOLID", StyleKind::Solid)
+         .value("PATTERN", StyleKind::Pattern)
+         .value("LINEAR_GRADIENT", StyleKind::LinearGradient)
+         .value("RADIAL_GRADIENT", StyleKind::RadialGradient)
+         .value("CONIC_GRADIENT", StyleKind::ConicGradient);
+
+     m.def("warmup_pipelines", [](const std::vector<BLFormat> &formats, const std::vector<BLCompOp> &comp_ops, const std::vector<StyleKind> &style_kinds)
+           {
+          std::vector<PipelineKey> keys;
+          for (BLFormat format : formats)
+               for (BLCompOp compOp : comp_ops)
+                    for (StyleKind kind : style_kinds)
+                         keys.emplace_back(format, compOp, kind);
+          return _warm_up_all(keys); },
+           nb::arg("formats") = std::vector<BLFormat>{BL_FORMAT_PRGB32},
+           nb::arg("comp_ops") = std::vector<BLCompOp>{BL_COMP_OP_SRC_OVER, BL_COMP_OP_SRC_COPY},
+           nb::arg("style_kinds") = std::vector<StyleKind>{StyleKind::Solid, StyleKind::Pattern, StyleKind::LinearGradient,
+                                                           StyleKind::RadialGradient, StyleKind::ConicGradient});
+     m.def("warmup_pipelines", [](const std::vector<PipelineKey> &profile)
+           { return _warm_up_all(profile); }, nb::arg("profile"));
+
+     m.def("start_pipeline_recording", []()
+           {
+          std::lock_guard<std::mutex> lock(recordedMutex);
+          recorded.clear();
+          PipelineRecorder::enabled.store(true); });
+     m.def("stop_pipeline_recording", []()
+           {
+          PipelineRecorder::enabled.store(false);
+          std::lock_guard<std::mutex> lock(recordedMutex);
+          std::vector<PipelineKey> profile(recorded.begin(), recorded.end());
+          recorded.clear();
+          return profile; });
+}
@@ -0,0 +1,64 @@
+#pragma once
+
+#include "nanobind_common.h"
+
+#include <atomic>
+
+// What a pipeline fetches its source pixels from
+enum class StyleKind : uint32_t
+{
+    Solid,
+    Pattern,
+    LinearGradient,
+    RadialGradient,
+    ConicGradient,
+};
+
+// Records the (target format, comp op, style kind) combinations that draw
+// calls use, so that a later run can compile their pipelines up front with
+// warmup_pipelines(). Off unless started from Python.
+class PipelineRecorder
+{
+public:
+    static std::atomic<bool> enabled;
+
+    static void add(const BLContext &ctx, StyleKind kind, BLCompOp compOp);
+    static void add(const BLContext &ctx, StyleKind kind) { add(ctx, kind, ctx.compOp()); }
+    static void addStyle(const BLContext &ctx, BLContextStyleSlot slot);
+};
+
+// Pipelines compiled so far by the shared JIT runtime
+size_t _pipeline_count();
+
+inline void _record_fill(const BLContext &ctx, bool solid = false)
+{
+    if (PipelineRecorder::enabled.load(std::memory_order_relaxed)) {
+        if (solid)
+            PipelineRecorder::add(ctx, StyleKind::Solid);
+        else
+            PipelineRecorder::addStyle(ctx, BL_CONTEXT_STYLE_SLOT_FILL);
+    }
+}
+
+inline void _record_stroke(const BLContext &ctx, bool solid = false)
+{
+    if (PipelineRecorder::enabled.load(std::memory_order_relaxed)) {
+        if (solid)
+            PipelineRecorder::add(ctx, StyleKind::Solid);
+        else
+            PipelineRecorder::addStyle(ctx, BL_CONTEXT_STYLE_SLOT_STROKE);
+    }
+}
+
+// Clearing fills with BL_COMP_OP_CLEAR whatever the current comp op is
+inline void _record_clear(const BLContext &ctx)
+{
+    if (PipelineRecorder::enabled.load(std::memory_order_relaxed))
+        PipelineRecorder::add(ctx, StyleKind::Solid, BL_COMP_OP_CLEAR);
+}
+
+inline void _record_blit(const BLContext &ctx)
+{
+    if (PipelineRecorder::enabled.load(std::memory_order_relaxed))
+        PipelineRecorder::add(ctx, StyleKind::Pattern);
+}
@@ -2,6 +2,47 @@
 
 void register_pixel_convert(nb::module_ &m)
 {
+    // Packed 32-bit color (0xAARRGGBB), accepted directly as a style
+    nb::class_<BLRgba32>(m, "BLRgba32")
+        .def(nb::init<>())
+        .def(nb::init<uint32_t>(), nb::arg("value"))
+        .def(nb::init<uint32_t, uint32_t, uint32_t, uint32_t>(),
+             nb::arg("r"), nb::arg("g"), nb::arg("b"), nb::arg("a") = 255)
+        .def_rw("value", &BLRgba32::value)
+        .def_prop_rw("r", [](const BLRgba32 &self)
+                     { return self.r(); }, [](BLRgba32 &self, uint32_t r)
+                     { self.setR(r); })
+        .def_prop_rw("g", [](const BLRgba32 &self)
+                     { return self.g(); }, [](BLRgba32 &self, uint32_t g)
+                     { self.setG(g); })
+        .def_prop_rw("b", [](const BLRgba32 &self)
+                     { return self.b(); }, [](BLRgba32 &self, uint32_t b)
+                     { self.setB(b); })
+        .def_prop_rw("a", [](const BLRgba32 &self)
+                     { return self.a(); }, [](BLRgba32 &self, uint32_t a)
+                     { self.setA(a); })
+        .def("__eq__", [](const BLRgba32 &self, const BLRgba32 &other)
+             { return self == other; })
+        .def("__repr__", [](const BLRgba32 &self)
+             { return "Rgba32(r=" + std::to_string(self.r()) +
+                      ", g=" + std::to_string(self.g()) +
+                      ", b=" + std::to_string(self.b()) +
+                      ", a=" + std::to_string(self.a()) + ")"; });
+
+    // Floating point color with components in [0, 1]
+    nb::class_<BLRgba>(m, "BLRgba")
+        .def(nb::init<float, float, float, float>(),
+             nb::arg("r"), nb::arg("g"), nb::arg("b"), nb::arg("a") = 1.0f)
+        .def_rw("r", &BLRgba::r)
+        .def_rw("g", &BLRgba::g)
+        .def_rw("b", &BLRgba::b)
+        .def_rw("a", &BLRgba::a)
+        .def("__repr__", [](const BLRgba &self)
+             { return "Rgba(r=" + std::to_string(self.r) +
+                      ", g=" + std::to_string(self.g) +
+                      ", b=" + std::to_string(self.b) +
+                      ", a=" + std::to_string(self.a) + ")"; });
+
     // Pixel format conversion functions
     m.def("rgba32_from_argb32", [](uint32_t argb32)
           { return BLRgba32(argb32).value; }, nb::arg("argb32"));
@@ -0,0 +1,22 @@
+#pragma once
+
+#include "nanobind_common.h"
+
+// Text shaped once with a font. Drawing it as a glyph run skips the UTF-8
+// decoding and shaping that fill_text() repeats on every call.
+struct ShapedText
+{
+    BLFont font;
+    std::string text;
+    BLGlyphBuffer glyphBuffer;
+    BLTextMetrics metrics{};
+
+    ShapedText(const BLFont &font, const std::string &text) : font(font), text(text)
+    {
+        glyphBuffer.setText(text.c_str(), text.size(), BL_TEXT_ENCODING_UTF8);
+        font.shape(glyphBuffer);
+        font.getTextMetrics(glyphBuffer, metrics);
+    }
+
+    const BLGlyphRun &glyphRun() const { return glyphBuffer.glyphRun(); }
+};
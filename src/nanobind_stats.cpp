@@ -0,0 +1,125 @@
+#include "nanobind_stats.h"
+#include "nanobind_damage.h"
+#include "nanobind_pipelines.h"
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <cmath>
+#include <mutex>
+#include <unordered_map>
+
+// Same layout as the damage trackers: stats live outside of BLContext, keyed
+// by the context object, and the counter keeps the lookup free when no
+// context collects them.
+static std::mutex statsMutex;
+static std::unordered_map<const BLContext *, ContextStats> contextStats;
+static std::atomic<size_t> statsCount{0};
+
+ContextStats *ContextStats::of(const BLContext &ctx)
+{
+    if (statsCount.load(std::memory_order_relaxed) == 0)
+        return nullptr;
+
+    std::lock_guard<std::mutex> lock(statsMutex);
+    auto it = contextStats.find(&ctx);
+    return it != contextStats.end() ? &it->second : nullptr;
+}
+
+void ContextStats::setEnabled(const BLContext &ctx, bool enabled)
+{
+    std::lock_guard<std::mutex> lock(statsMutex);
+    if (enabled) {
+        auto result = contextStats.try_emplace(&ctx);
+        if (result.second)
+            result.first->second.reset();
+    }
+    else {
+        contextStats.erase(&ctx);
+    }
+    statsCount.store(contextStats.size(), std::memory_order_relaxed);
+}
+
+void ContextStats::reset()
+{
+    *this = ContextStats();
+    pipelineCount = _pipeline_count();
+}
+
+void ContextStats::addCommand(const BLContext &ctx, Kind kind, const BLBox &device)
+{
+    commands[kind]++;
+
+    const BLImage *target = ctx.targetImage();
+    if (!target || !(device.x0 <= device.x1 && device.y0 <= device.y1))
+        return;
+
+    BLSize size = ctx.targetSize();
+    double x0 = std::max(std::floor(device.x0), 0.0);
+    double y0 = std::max(std::floor(device.y0), 0.0);
+    double x1 = std::min(std::ceil(device.x1), size.w);
+    double y1 = std::min(std::ceil(device.y1), size.h);
+    if (x0 >= x1 || y0 >= y1)
+        return;
+
+    uint64_t bytesPerPixel = blFormatInfo[target->format()].depth / 8;
+    bytesTouched += uint64_t(x1 - x0) * uint64_t(y1 - y0) * bytesPerPixel;
+}
+
+void ContextStats::add(const BLContext &ctx, Kind kind, const BLBox &box, bool stroke)
+{
+    addCommand(ctx, kind, _device_box(ctx, box, stroke));
+}
+
+void ContextStats::addAll(const BLContext &ctx, Kind kind)
+{
+    BLSize size = ctx.targetSize();
+    addCommand(ctx, kind, BLBox(0, 0, size.w, size.h));
+}
+
+void ContextStats::addText(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const std::string &text, bool stroke)
+{
+    BLGlyphBuffer gb;
+    gb.setText(text.c_str(), text.size(), BL_TEXT_ENCODING_UTF8);
+    font.shape(gb);
+
+    BLTextMetrics tm;
+    font.getTextMetrics(gb, tm);
+    add(ctx, Text, _text_box(pt, font, tm), stroke);
+    glyphs += gb.size();
+}
+
+void ContextStats::addFlush(double seconds)
+{
+    flushes++;
+    flushSeconds += seconds;
+}
+
+nb::dict ContextStats::toDict() const
+{
+    nb::dict result;
+    result["fills"] = commands[Fill];
+    result["strokes"] = commands[Stroke];
+    result["texts"] = commands[Text];
+    result["blits"] = commands[Blit];
+    result["glyphs"] = glyphs;
+    // Includes pipelines other contexts and threads compiled meanwhile
+    result["process_pipelines_compiled"] = _pipeline_count() - pipelineCount;
+    result["flushes"] = flushes;
+    result["flush_time"] = flushSeconds;
+    result["bytes_touched"] = bytesTouched;
+    return result;
+}
+
+BLResult _timed_flush(BLContext &ctx, BLContextFlushFlags flags)
+{
+    ContextStats *stats = ContextStats::of(ctx);
+    if (!stats)
+        return ctx.flush(flags);
+
+    auto start = std::chrono::steady_clock::now();
+    BLResult result = ctx.flush(flags);
+    if (result == BL_SUCCESS)
+        stats->addFlush(std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count());
+    return result;
+}
@@ -0,0 +1,54 @@
+#pragma once
+
+#include "nanobind_common.h"
+
+#include <cstdint>
+#include <string>
+
+// Counters of what a BLContext has drawn since the last reset, for contexts
+// that opted in with `collect_stats = True`.
+class ContextStats
+{
+public:
+    enum Kind
+    {
+        Fill,
+        Stroke,
+        Text,
+        Blit,
+        kKindCount
+    };
+
+    uint64_t commands[kKindCount] = {};
+    uint64_t glyphs = 0;
+    uint64_t flushes = 0;
+    double flushSeconds = 0.0;
+    // Pixels inside the device-space bounds of each command, times the
+    // pixel size of the target; an upper bound of what was written
+    uint64_t bytesTouched = 0;
+
+    // Returns the stats of `ctx` or nullptr when collection is disabled
+    static ContextStats *of(const BLContext &ctx);
+    static void setEnabled(const BLContext &ctx, bool enabled);
+
+    void reset();
+
+    // `box` is in user space, strokes are inflated by the current stroke options
+    void add(const BLContext &ctx, Kind kind, const BLBox &box, bool stroke = false);
+    void addAll(const BLContext &ctx, Kind kind);
+    void addText(const BLContext &ctx, const BLPoint &pt, const BLFont &font, const std::string &text, bool stroke);
+    void addFlush(double seconds);
+
+    nb::dict toDict() const;
+
+private:
+    // Pipelines the shared JIT runtime held at the last reset. The runtime
+    // counts for the whole process, so it is only sampled here and when the
+    // stats are read, never per command.
+    size_t pipelineCount = 0;
+
+    void addCommand(const BLContext &ctx, Kind kind, const BLBox &device);
+};
+
+// Flushes `ctx`, timing the flush when it collects stats
+BLResult _timed_flush(BLContext &ctx, BLContextFlushFlags flags);
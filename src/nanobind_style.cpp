@@ -0,0 +1,58 @@
+#include "nanobind_common.h"
+
+#include <shared_mutex>
+#include <unordered_map>
+
+// Locks of the styles Python threads have shared so far, like the context
+// ones: added on first use and removed when the style is deleted
+static std::shared_mutex styleMutexesMutex;
+static std::unordered_map<const BLVar *, std::mutex> styleMutexes;
+
+std::mutex &_style_mutex(const BLVar &style)
+{
+    {
+        std::shared_lock<std::shared_mutex> lock(styleMutexesMutex);
+        auto it = styleMutexes.find(&style);
+        if (it != styleMutexes.end())
+            return it->second;
+    }
+    std::unique_lock<std::shared_mutex> lock(styleMutexesMutex);
+    return styleMutexes[&style];
+}
+
+void _forget_style_mutex(const BLVar &style)
+{
+    std::unique_lock<std::shared_mutex> lock(styleMutexesMutex);
+    styleMutexes.erase(&style);
+}
+
+void register_style(nb::module_ &m)
+{
+     // Style holds a solid color, gradient or pattern in a BLVar, which
+     // set_fill_style()/set_stroke_style() pass to Blend2D as is. Gradients
+     // and patterns are captured when the style is created.
+     nb::class_<BLVar>(m, "Style")
+         .def(nb::init<>())
+         .def("__init__", [](BLVar *self, uint32_t rgba32)
+              { new (self) BLVar(BLRgba32(rgba32)); }, nb::arg("rgba32"))
+         .def("__init__", [](BLVar *self, const BLRgba32 &color)
+              { new (self) BLVar(color); }, nb::arg("color"))
+         .def("__init__", [](BLVar *self, const BLRgba &color)
+              { new (self) BLVar(color); }, nb::arg("color"))
+         .def("__init__", [](BLVar *self, const nb::tuple &color)
+              { new (self) BLVar(BLRgba32(_get_rgba32_value(color))); }, nb::arg("color"))
+         .def("__init__", [](BLVar *self, const BLGradient &gradient)
+              { new (self) BLVar(gradient); }, nb::arg("gradient"))
+         .def("__init__", [](BLVar *self, const BLPattern &pattern)
+              { new (self) BLVar(pattern); }, nb::arg("pattern"))
+         .def("__del__", [](BLVar *self)
+              { _forget_style_mutex(*self); })
+         .def("reset", _locked([](BLVar &self)
+              { self.reset(); }))
+         .def_prop_ro("is_color", _locked([](const BLVar &self)
+                      { return self.isRgba() || self.isRgba32() || self.isRgba64(); }))
+         .def_prop_ro("is_gradient", _locked([](const BLVar &self)
+                      { return self.isGradient(); }))
+         .def_prop_ro("is_pattern", _locked([](const BLVar &self)
+                      { return self.isPattern(); }));
+}
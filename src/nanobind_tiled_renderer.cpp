@@ -0,0 +1,319 @@
+#include "nanobind_common.h"
+#include "nanobind_display_list.h"
+
+#include <algorithm>
+#include <cstdio>
+#include <memory>
+#include <stdexcept>
+
+// Writable HxWx4 destination for direct rendering, e.g. a np.memmap
+using CanvasArray = nb::ndarray<uint8_t, nb::shape<-1, -1, 4>, nb::device::cpu>;
+
+// Streams PRGB32 rows into a QOI file. QOI is encoded strictly in pixel
+// order, so rows can be appended band by band without holding the image.
+class QoiStreamWriter
+{
+public:
+    QoiStreamWriter(const std::string &path, uint32_t width, uint32_t height)
+    {
+        file = std::fopen(path.c_str(), "wb");
+        if (!file) {
+            throw std::runtime_error("Failed to open '" + path + "' for writing");
+        }
+        uint8_t header[14] = {'q', 'o', 'i', 'f',
+                              uint8_t(width >> 24), uint8_t(width >> 16), uint8_t(width >> 8), uint8_t(width),
+                              uint8_t(height >> 24), uint8_t(height >> 16), uint8_t(height >> 8), uint8_t(height),
+                              4, 0};
+        write(header, sizeof(header));
+    }
+
+    ~QoiStreamWriter()
+    {
+        if (file)
+            std::fclose(file);
+    }
+
+    void writeRow(const uint8_t *pixels, size_t width)
+    {
+        out.clear();
+        for (size_t i = 0; i < width; i++, pixels += 4)
+            encode(_unpremultiply(pixels));
+        write(out.data(), out.size());
+    }
+
+    void finish()
+    {
+        out.clear();
+        flushRun();
+        static const uint8_t padding[8] = {0, 0, 0, 0, 0, 0, 0, 1};
+        out.insert(out.end(), padding, padding + sizeof(padding));
+        write(out.data(), out.size());
+        if (std::fclose(file) != 0) {
+            file = nullptr;
+            throw std::runtime_error("Failed to write QOI file");
+        }
+        file = nullptr;
+    }
+
+private:
+    struct Rgba
+    {
+        uint8_t r, g, b, a;
+        bool operator==(const Rgba &other) const { return r == other.r && g == other.g && b == other.b && a == other.a; }
+    };
+
+    std::FILE *file = nullptr;
+    std::vector<uint8_t> out;
+    Rgba index[64]{};
+    Rgba prev{0, 0, 0, 255};
+    uint32_t run = 0;
+
+    // PRGB32 is stored as premultiplied B, G, R, A bytes; QOI wants straight RGBA
+    static Rgba _unpremultiply(const uint8_t *p)
+    {
+        uint32_t a = p[3];
+        if (a == 0)
+            return Rgba{0, 0, 0, 0};
+        if (a == 255)
+            return Rgba{p[2], p[1], p[0], 255};
+        auto un = [a](uint32_t c)
+        { return uint8_t(std::min<uint32_t>(255, (c * 255 + a / 2) / a)); };
+        return Rgba{un(p[2]), un(p[1]), un(p[0]), uint8_t(a)};
+    }
+
+    void write(const void *data, size_t size)
+    {
+        if (size && std::fwrite(data, 1, size, file) != size) {
+            throw std::runtime_error("Failed to write QOI file");
+        }
+    }
+
+    void flushRun()
+    {
+        if (run) {
+            out.push_back(uint8_t(0xC0 | (run - 1)));
+            run = 0;
+        }
+    }
+
+    void encode(const Rgba &px)
+    {
+        if (px == prev) {
+            if (++run == 62)
+                flushRun();
+            return;
+        }
+        flushRun();
+
+        uint32_t slot = (px.r * 3 + px.g * 5 + px.b * 7 + px.a * 11) % 64;
+        if (index[slot] == px) {
+            out.push_back(uint8_t(slot));
+        }
+        else {
+            index[slot] = px;
+            if (px.a == prev.a) {
+                int8_t dr = int8_t(px.r - prev.r);
+                int8_t dg = int8_t(px.g - prev.g);
+                int8_t db = int8_t(px.b - prev.b);
+                int8_t drdg = int8_t(dr - dg);
+                int8_t dbdg = int8_t(db - dg);
+                if (dr >= -2 && dr <= 1 && dg >= -2 && dg <= 1 && db >= -2 && db <= 1) {
+                    out.push_back(uint8_t(0x40 | (dr + 2) << 4 | (dg + 2) << 2 | (db + 2)));
+                }
+                else if (dg >= -32 && dg <= 31 && drdg >= -8 && drdg <= 7 && dbdg >= -8 && dbdg <= 7) {
+                    out.push_back(uint8_t(0x80 | (dg + 32)));
+                    out.push_back(uint8_t((drdg + 8) << 4 | (dbdg + 8)));
+                }
+                else {
+                    out.insert(out.end(), {0xFE, px.r, px.g, px.b});
+                }
+            }
+            else {
+                out.insert(out.end(), {0xFF, px.r, px.g, px.b, px.a});
+            }
+        }
+        prev = px;
+    }
+};
+
+// Renders a canvas of any size one tile at a time. Each tile gets its own
+// image, translated so that the source draws in canvas coordinates; the
+// tile bounds do the clipping.
+class TiledRenderer
+{
+public:
+    uint32_t width;
+    uint32_t height;
+    uint32_t tileWidth;
+    uint32_t tileHeight;
+    BLContextCreateInfo createInfo{};
+
+    TiledRenderer(uint32_t width, uint32_t height, uint32_t tileWidth, uint32_t tileHeight, uint32_t threadCount)
+        : width(width), height(height), tileWidth(std::min(tileWidth, width)), tileHeight(std::min(tileHeight, height))
+    {
+        if (width == 0 || height == 0 || tileWidth == 0 || tileHeight == 0) {
+            throw nb::value_error("Canvas and tile sizes must be non-zero");
+        }
+        createInfo.threadCount = threadCount;
+        _apply_cpu_features(createInfo);
+    }
+
+    // Calls `fn(x, y, w, h)` for every tile in the band starting at `y`
+    template <typename Fn>
+    void forEachTile(uint32_t y, Fn &&fn) const
+    {
+        uint32_t h = std::min(tileHeight, height - y);
+        for (uint32_t x = 0; x < width; x += tileWidth)
+            fn(x, y, std::min(tileWidth, width - x), h);
+    }
+
+    // Draws `source` into `tile`, whose top-left corner is (x, y) on the canvas.
+    // The GIL must be held, it is only released around native work.
+    void renderTile(nb::handle context, BLImage &tile, uint32_t x, uint32_t y, uint32_t w, uint32_t h, nb::handle source) const
+    {
+        BLContext &ctx = nb::cast<BLContext &>(context);
+        const DisplayList *displayList = nb::isinstance<DisplayList>(source) ? &nb::cast<const DisplayList &>(source) : nullptr;
+        {
+            // A callback source may hand the context to other threads
+            native_section release;
+            std::lock_guard<std::mutex> lock(_context_mutex(ctx));
+            if (ctx.begin(tile, createInfo) != BL_SUCCESS) {
+                throw std::runtime_error("Failed to begin rendering a tile");
+            }
+            ctx.clearAll();
+            ctx.translate(-double(x), -double(y));
+            ctx.userToMeta();
+            if (displayList) {
+                std::lock_guard<std::mutex> listLock(displayList->mutex);
+                displayList->replay(ctx);
+            }
+        }
+        if (!displayList) {
+            try {
+                source(context, BLRectI(int(x), int(y), int(w), int(h)));
+            }
+            catch (...) {
+                // The tile may point into memory that goes away with the error
+                object_lock lock(_context_mutex(ctx));
+                ctx.end();
+                throw;
+            }
+        }
+        {
+            native_section release;
+            std::lock_guard<std::mutex> lock(_context_mutex(ctx));
+            ctx.end();
+        }
+    }
+
+    void renderToArray(nb::handle source, const CanvasArray &canvas) const
+    {
+        if (canvas.shape(0) != height || canvas.shape(1) != width || canvas.stride(1) != 4 || canvas.stride(2) != 1) {
+            throw nb::value_error("The array must have shape (height, width, 4) with packed pixels");
+        }
+
+        // Owned by Python, so a callback source may safely keep a reference
+        nb::object context = nb::type<BLContext>()();
+        for (uint32_t y = 0; y < height; y += tileHeight) {
+            forEachTile(y, [&](uint32_t x, uint32_t y, uint32_t w, uint32_t h)
+                        {
+                // Tiles render straight into the array, no copy
+                BLImage tile;
+                uint8_t *pixels = canvas.data() + int64_t(y) * canvas.stride(0) + int64_t(x) * 4;
+                if (tile.createFromData(int(w), int(h), BL_FORMAT_PRGB32, pixels, intptr_t(canvas.stride(0))) != BL_SUCCESS) {
+                    throw std::runtime_error("Failed to map a tile into the array");
+                }
+                renderTile(context, tile, x, y, w, h, source); });
+        }
+    }
+
+    void renderToCallback(nb::handle source, nb::handle sink) const
+    {
+        nb::object context = nb::type<BLContext>()();
+        for (uint32_t y = 0; y < height; y += tileHeight) {
+            forEachTile(y, [&](uint32_t x, uint32_t y, uint32_t w, uint32_t h)
+                        {
+                // Every tile gets its own buffer, owned by the array handed to
+                // the sink, so the sink may keep it
+                BLImage tile;
+                if (tile.create(int(w), int(h), BL_FORMAT_PRGB32) != BL_SUCCESS) {
+                    throw std::runtime_error("Failed to allocate a tile");
+                }
+                renderTile(context, tile, x, y, w, h, source);
+
+                BLImageData data;
+                tile.getData(&data);
+                auto *owner = new BLImage(std::move(tile));
+                nb::capsule capsule(owner, [](void *p) noexcept
+                                    { delete static_cast<BLImage *>(p); });
+                size_t shape[3] = {h, w, 4};
+                int64_t strides[3] = {int64_t(data.stride), 4, 1};
+                nb::ndarray<nb::numpy, uint8_t> pixels(data.pixelData, 3, shape, capsule, strides);
+                sink(x, y, pixels); });
+        }
+    }
+
+    void renderToQoi(nb::handle source, const std::string &path) const
+    {
+        // A band of tiles is rendered into one full-width buffer, then its
+        // rows are appended to the file
+        std::vector<uint8_t> band(size_t(width) * tileHeight * 4);
+        intptr_t stride = intptr_t(width) * 4;
+        QoiStreamWriter writer(path, width, height);
+
+        nb::object context = nb::type<BLContext>()();
+        for (uint32_t y = 0; y < height; y += tileHeight) {
+            uint32_t bandHeight = std::min(tileHeight, height - y);
+            forEachTile(y, [&](uint32_t x, uint32_t y, uint32_t w, uint32_t h)
+                        {
+                BLImage tile;
+                if (tile.createFromData(int(w), int(h), BL_FORMAT_PRGB32, band.data() + size_t(x) * 4, stride) != BL_SUCCESS) {
+                    throw std::runtime_error("Failed to map a tile into the band");
+                }
+                renderTile(context, tile, x, y, w, h, source); });
+
+            nb::gil_scoped_release release;
+            for (uint32_t row = 0; row < bandHeight; row++)
+                writer.writeRow(band.data() + row * stride, width);
+        }
+        writer.finish();
+    }
+};
+
+void register_tiled_renderer(nb::module_ &m)
+{
+     nb::class_<TiledRenderer>(m, "TiledRenderer")
+         .def(nb::init<uint32_t, uint32_t, uint32_t, uint32_t, uint32_t>(), nb::arg("width"), nb::arg("height"),
+              nb::arg("tile_width") = 1024, nb::arg("tile_height") = 1024, nb::arg("thread_count") = 0)
+         .def_ro("width", &TiledRenderer::width)
+         .def_ro("height", &TiledRenderer::height)
+         .def_ro("tile_width", &TiledRenderer::tileWidth)
+         .def_ro("tile_height", &TiledRenderer::tileHeight)
+         .def("render", [](const TiledRenderer &self, nb::handle source, nb::handle sink)
+              {
+            if (!nb::isinstance<DisplayList>(source) && !PyCallable_Check(source.ptr())) {
+                throw nb::type_error("source must be a DisplayList or a callable taking (ctx, tile_rect)");
+            }
+
+            CanvasArray canvas;
+            if (nb::isinstance<nb::str>(sink)) {
+                std::string path = nb::cast<std::string>(sink);
+                if (path.size() < 4 || path.compare(path.size() - 4, 4, ".qoi") != 0) {
+                    throw nb::value_error("Streaming file output supports the .qoi format only");
+                }
+                self.renderToQoi(source, path);
+            }
+            else if (nb::try_cast(sink, canvas, false)) {
+                self.renderToArray(source, canvas);
+            }
+            else if (PyObject_CheckBuffer(sink.ptr())) {
+                // A converted copy would be rendered and thrown away
+                throw nb::type_error("The array must be a writable (height, width, 4) uint8 array");
+            }
+            else if (PyCallable_Check(sink.ptr())) {
+                self.renderToCallback(source, sink);
+            }
+            else {
+                throw nb::type_error("sink must be a .qoi path, a writable (height, width, 4) uint8 array or a callable taking (x, y, pixels)");
+            } }, nb::arg("source"), nb::arg("sink"));
+}